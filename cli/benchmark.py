@@ -0,0 +1,379 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+import click
+import numpy as np
+
+# The scenario families of the fixed benchmark matrix. Each one is benchmarked with
+# the given agent counts, which must either match the number of ego missions of the
+# scenario or the scenario must define none. A family is skipped until the files
+# matching `requires` have been built (see `scl scenario build-all`).
+_FAMILIES = {
+    "loop": dict(
+        scenario="scenarios/loop", requires="traffic/*.rou.xml", agents=(1, 4)
+    ),
+    "intersection": dict(
+        scenario="scenarios/intersections/4lane",
+        requires="traffic/*.rou.xml",
+        agents=(1, 2),
+    ),
+    "ngsim": dict(scenario="scenarios/NGSIM/i80", requires="*.shf", agents=(1,)),
+    "ultra": dict(
+        scenario="ultra/ultra/scenarios/task1/*-flow-*",
+        requires="traffic/*.rou.xml",
+        agents=(1,),
+    ),
+}
+
+# The agent interface options of each sensor configuration. The camera sensors
+# require the renderer.
+_SENSORS = {
+    "none": dict(accelerometer=False),
+    "vector": dict(neighborhood_vehicles=True, waypoints=True, road_waypoints=True),
+    "lidar": dict(lidar=True),
+    "camera": dict(rgb=True, ogm=True, drivable_area_grid_map=True),
+}
+
+# Compared against the baseline, and whether a higher value is better
+_COMPARED_METRICS = {
+    "steps_per_second": True,
+    "reset_ms": False,
+    "peak_rss_mb": False,
+}
+
+
+class BenchmarkCell(NamedTuple):
+    """A single entry of the benchmark matrix."""
+
+    family: str
+    scenario: str
+    agents: int
+    sensors: str
+
+    @property
+    def key(self) -> str:
+        """Identifies the entry across benchmark runs."""
+        return f"{self.family}/{self.agents}-agents/{self.sensors}"
+
+
+def benchmark_matrix(
+    families: Sequence[str],
+    sensors: Sequence[str],
+    scenarios: Sequence[str] = (),
+):
+    """Returns the `(cells, skipped)` of the benchmark matrix. `scenarios` are extra
+    scenario roots benchmarked with a single agent.
+    """
+    cells, skipped = [], []
+    roots = []
+    for family in families:
+        spec = _FAMILIES[family]
+        matches = sorted(glob.glob(spec["scenario"]))
+        if not matches or not glob.glob(os.path.join(matches[0], spec["requires"])):
+            skipped.append(f"{family}: {spec['scenario']} has not been built")
+            continue
+        roots.append((family, matches[0], spec["agents"]))
+    for scenario in scenarios:
+        roots.append((os.path.basename(os.path.normpath(scenario)), scenario, (1,)))
+
+    for family, scenario, agent_counts in roots:
+        for agents in agent_counts:
+            for sensor in sensors:
+                cells.append(BenchmarkCell(family, scenario, agents, sensor))
+    return cells, skipped
+
+
+def _summarize(durations: List[float]) -> Dict[str, float]:
+    durations_ms = np.array(durations) * 1000
+    return {
+        "count": len(durations),
+        "total_s": float(durations_ms.sum() / 1000),
+        "mean_ms": float(durations_ms.mean()) if len(durations) else 0.0,
+        "p50_ms": float(np.percentile(durations_ms, 50)) if len(durations) else 0.0,
+        "p95_ms": float(np.percentile(durations_ms, 95)) if len(durations) else 0.0,
+    }
+
+
+def run_cell(
+    cell: BenchmarkCell, episodes: int, max_episode_steps: int, seed: int
+) -> Dict[str, Any]:
+    """Runs a benchmark entry headlessly in this process and returns its results."""
+    from smarts.core import seed as smarts_seed
+    from smarts.core.agent_interface import ActionSpaceType, AgentInterface
+    from smarts.core.scenario import Scenario
+    from smarts.core.smarts import SMARTS
+    from smarts.core.sumo_traffic_simulation import SumoTrafficSimulation
+    from smarts.core.utils.episodes import EpisodeLog
+
+    smarts_seed(seed)
+    agent_ids = [f"Agent-{i:03d}" for i in range(cell.agents)]
+    agent_interface = AgentInterface(
+        max_episode_steps=max_episode_steps,
+        action=ActionSpaceType.Lane,
+        **_SENSORS[cell.sensors],
+    )
+
+    start = time.perf_counter()
+    smarts = SMARTS(
+        agent_interfaces={agent_id: agent_interface for agent_id in agent_ids},
+        traffic_sim=SumoTrafficSimulation(headless=True),
+    )
+    scenarios = Scenario.scenario_variations([cell.scenario], agent_ids)
+    load = time.perf_counter() - start
+
+    resets, steps, episode_logs = [], [], []
+    try:
+        for index in range(episodes):
+            start = time.perf_counter()
+            observations = smarts.reset(next(scenarios))
+            resets.append(time.perf_counter() - start)
+
+            episode = EpisodeLog(index, fixed_timestep_sec=smarts.fixed_timestep_sec)
+            while observations and episode.steps < max_episode_steps:
+                actions = {agent_id: "keep_lane" for agent_id in observations}
+                start = time.perf_counter()
+                observations, rewards, dones, _ = smarts.step(actions)
+                steps.append(time.perf_counter() - start)
+                episode.record_step(observations, rewards, dones)
+                observations = {
+                    agent_id: observation
+                    for agent_id, observation in observations.items()
+                    if not dones[agent_id]
+                }
+            episode_logs.append(
+                (episode.steps, episode.steps_per_second, episode.sim2wall_ratio)
+            )
+    finally:
+        start = time.perf_counter()
+        smarts.destroy()
+        teardown = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss_unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "key": cell.key,
+        **cell._asdict(),
+        "steps": sum(steps for steps, _, _ in episode_logs),
+        "steps_per_second": float(np.mean([sps for _, sps, _ in episode_logs])),
+        "sim2wall_ratio": float(np.mean([ratio for _, _, ratio in episode_logs])),
+        "reset_ms": _summarize(resets)["mean_ms"],
+        "step_ms": _summarize(steps)["mean_ms"],
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / rss_unit,
+        "peak_child_rss_mb": (
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / rss_unit
+        ),
+        "timings": {
+            "load": _summarize([load]),
+            "reset": _summarize(resets),
+            "step": _summarize(steps),
+            "teardown": _summarize([teardown]),
+        },
+    }
+
+
+def _run_cell_safely(args) -> Dict[str, Any]:
+    cell = args[0]
+    try:
+        return run_cell(*args)
+    except Exception as e:
+        return {"key": cell.key, **cell._asdict(), "error": repr(e)}
+
+
+def compare_to_baseline(
+    results: Sequence[Dict[str, Any]],
+    baseline: Sequence[Dict[str, Any]],
+    tolerance: float,
+) -> List[Dict[str, Any]]:
+    """Returns the compared metrics of the results that are worse than those of the
+    baseline by more than the `tolerance` fraction.
+    """
+    baseline_by_key = {result["key"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        expected = baseline_by_key.get(result["key"])
+        if "error" in result or not expected or "error" in expected:
+            continue
+        for metric, higher_is_better in _COMPARED_METRICS.items():
+            value, expected_value = result[metric], expected[metric]
+            if not expected_value:
+                continue
+            change = (value - expected_value) / expected_value
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(
+                    {
+                        "key": result["key"],
+                        "metric": metric,
+                        "baseline": expected_value,
+                        "value": value,
+                        "change": change,
+                    }
+                )
+    return regressions
+
+
+@click.command(
+    name="benchmark",
+    help="Run the performance benchmark matrix of scenario families, agent counts "
+    "and sensor configurations headlessly. Optionally compare against the results "
+    "of an earlier run, returning an error on regressions.",
+)
+@click.option(
+    "--family",
+    "families",
+    multiple=True,
+    type=click.Choice(list(_FAMILIES)),
+    default=list(_FAMILIES),
+    show_default=True,
+    help="Scenario families to benchmark.",
+)
+@click.option(
+    "--sensors",
+    multiple=True,
+    type=click.Choice(list(_SENSORS)),
+    default=["none", "vector", "lidar"],
+    show_default=True,
+    help="Sensor configurations to benchmark.",
+)
+@click.option("--episodes", default=3, show_default=True, help="Episodes per entry.")
+@click.option(
+    "--max-episode-steps", default=200, show_default=True, help="Steps per episode."
+)
+@click.option("--seed", default=42, show_default=True, help="The random seed.")
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    default="benchmark.json",
+    show_default=True,
+    help="Where to write the results as JSON.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="The results of an earlier run to compare against.",
+)
+@click.option(
+    "--tolerance",
+    default=0.2,
+    show_default=True,
+    help="The fraction a compared metric may be worse than the baseline by.",
+)
+@click.argument(
+    "scenarios", nargs=-1, type=click.Path(exists=True), metavar="<scenarios>"
+)
+def benchmark_cli(
+    families,
+    sensors,
+    episodes,
+    max_episode_steps,
+    seed,
+    output,
+    baseline,
+    tolerance,
+    scenarios,
+):
+    import tableprint as tp
+
+    from smarts import VERSION
+
+    cells, skipped = benchmark_matrix(families, sensors, scenarios)
+    for reason in skipped:
+        click.echo(f"Skipping {reason}")
+
+    results = []
+    # Each entry runs in a fresh process so that its peak memory is its own
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for cell in cells:
+            click.echo(f"Benchmarking {cell.key} ({cell.scenario})")
+            results.append(
+                pool.apply(
+                    _run_cell_safely, ((cell, episodes, max_episode_steps, seed),)
+                )
+            )
+
+    rows = []
+    for result in results:
+        if "error" in result:
+            rows.append((result["key"], "error", "", "", "", ""))
+            click.echo(f"{result['key']} failed: {result['error']}")
+            continue
+        rows.append(
+            (
+                result["key"],
+                f"{result['steps_per_second']:.1f}",
+                f"{result['sim2wall_ratio']:.2f}",
+                f"{result['reset_ms']:.1f}",
+                f"{result['step_ms']:.2f}",
+                f"{result['peak_rss_mb']:.0f}",
+            )
+        )
+    if rows:
+        tp.table(
+            rows,
+            [
+                "Entry",
+                "Steps / Sec",
+                "Sim T / Wall T",
+                "Reset (ms)",
+                "Step (ms)",
+                "Peak RSS (MB)",
+            ],
+            width=[32, 12, 14, 12, 12, 14],
+            style="round",
+        )
+
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "smarts_version": VERSION,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "episodes": episodes,
+                "max_episode_steps": max_episode_steps,
+                "seed": seed,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    click.echo(f"Results written to {output}")
+
+    if baseline is None:
+        return
+    with open(baseline, "r") as f:
+        regressions = compare_to_baseline(results, json.load(f)["results"], tolerance)
+    for regression in regressions:
+        click.echo(
+            "Regression in {key} {metric}: {baseline:.2f} -> {value:.2f} "
+            "({change:+.0%})".format(**regression)
+        )
+    if regressions:
+        sys.exit(1)
+    click.echo(f"No regressions against {baseline}")
@@ -22,6 +22,7 @@
 
 import click
 
+from cli.benchmark import benchmark_cli
 from cli.envision import envision_cli
 from cli.run import run_experiment
 from cli.studio import scenario_cli
@@ -43,6 +44,7 @@ scl.add_command(scenario_cli)
 scl.add_command(ultra_cli)
 scl.add_command(zoo_cli)
 scl.add_command(run_experiment)
+scl.add_command(benchmark_cli)
 
 if __name__ == "__main__":
     scl()
@@ -19,6 +19,7 @@
 # THE SOFTWARE.
 import click
 
+from envision.recording import convert_jsonl
 from envision.server import run
 
 
@@ -49,8 +50,50 @@ def envision_cli():
     default=500,
     type=float,
 )
-def start_server(port, scenarios, max_capacity):
-    run(scenario_dirs=scenarios, max_capacity_mb=max_capacity, port=port)
+@click.option(
+    "--max_total_capacity",
+    help=(
+        "Max capacity in MB of Envision's playback buffers across all simulations. "
+        "Unlimited if not given."
+    ),
+    default=None,
+    type=float,
+)
+@click.option(
+    "-r",
+    "--recordings",
+    help="Recording files (.envr) or directories of recordings to serve for playback.",
+    multiple=True,
+    default=[],
+)
+def start_server(port, scenarios, max_capacity, max_total_capacity, recordings):
+    run(
+        scenario_dirs=scenarios,
+        max_capacity_mb=max_capacity,
+        port=port,
+        recordings=recordings,
+        max_total_capacity_mb=max_total_capacity,
+    )
+
+
+@envision_cli.command(
+    name="convert",
+    help="Convert `.jsonl` Envision recordings to the indexed and compressed .envr format.",
+)
+@click.argument(
+    "jsonl_paths", nargs=-1, type=click.Path(exists=True), metavar="<jsonl>"
+)
+@click.option(
+    "--frames-per-chunk",
+    help="The number of frames compressed together. Smaller chunks seek faster.",
+    default=200,
+    type=int,
+)
+def convert(jsonl_paths, frames_per_chunk):
+    for jsonl_path in jsonl_paths:
+        output_path = convert_jsonl(jsonl_path, frames_per_chunk=frames_per_chunk)
+        click.echo(f"Converted {jsonl_path} to {output_path}")
 
 
 envision_cli.add_command(start_server)
+envision_cli.add_command(convert)
@@ -17,17 +17,41 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+import hashlib
+import json
 import multiprocessing
 import os
+import shutil
 import subprocess
 import sys
-from multiprocessing import Process, Semaphore, synchronize
+from collections import defaultdict
 from multiprocessing.pool import ThreadPool
 from pathlib import Path
-from typing import Sequence
+from typing import Dict, List, Optional, Sequence
 
 import click
 
+# Records the hash of the inputs each artifact of a scenario was last built from.
+_BUILD_HASHES = ".build_hashes.json"
+
+# The files generated for each artifact, removed before the artifact is rebuilt.
+# The "traffic" and "histories" artifacts are generated by running `scenario.py`.
+_ARTIFACT_OUTPUTS = {
+    "traffic": [
+        "traffic/*",
+        "social_agents/*",
+        "missions.pkl",
+        "bubbles.pkl",
+        "friction_map.pkl",
+        "map_spec.pkl",
+        "history_mission.pkl",
+        "*.rou.xml",
+        "*.rou.alt.xml",
+    ],
+    "histories": ["*.shf"],
+    "map.glb": ["map.glb"],
+}
+
 
 @click.group(
     name="scenario",
@@ -37,7 +61,10 @@ def scenario_cli():
     pass
 
 
-@scenario_cli.command(name="build", help="Generate a single scenario")
+@scenario_cli.command(
+    name="build",
+    help="Generate a single scenario. Only artifacts whose inputs changed since the last build are regenerated.",
+)
 @click.option(
     "--clean",
     is_flag=True,
@@ -55,45 +82,158 @@ def build_scenario(clean: bool, allow_offset_map: bool, scenario: str):
     _build_single_scenario(clean, allow_offset_map, scenario)
 
 
-def _build_single_scenario(clean: bool, allow_offset_map: bool, scenario: str):
+def _build_single_scenario(
+    clean: bool,
+    allow_offset_map: bool,
+    scenario: str,
+    built_glbs: Optional[Dict[str, str]] = None,
+):
     click.echo(f"build-scenario {scenario}")
     if clean:
         _clean(scenario)
 
     scenario_root = Path(scenario)
     scenario_root_str = str(scenario_root)
+    shift_to_origin = not allow_offset_map
 
-    scenario_py = scenario_root / "scenario.py"
-    if scenario_py.exists():
+    built_hashes = _read_build_hashes(scenario_root)
+    input_hashes = _artifact_input_hashes(scenario_root, shift_to_origin)
+
+    def is_stale(artifact):
+        return built_hashes.get(artifact) != input_hashes[artifact]
+
+    stale_generated = {a for a in ("traffic", "histories") if a in input_hashes}
+    stale_generated = set(filter(is_stale, stale_generated))
+    if stale_generated:
+        click.echo(f"{scenario}: rebuilding {', '.join(sorted(stale_generated))}")
+        for artifact in stale_generated:
+            _remove_outputs(scenario_root, artifact)
         _install_requirements(scenario_root)
-        subprocess.check_call([sys.executable, scenario_py])
+        subprocess.check_call([sys.executable, scenario_root / "scenario.py"])
+        # `scenario.py` may have changed which map the scenario uses.
+        input_hashes = _artifact_input_hashes(scenario_root, shift_to_origin)
+
+    glb_path = scenario_root / "map.glb"
+    glb_hash = input_hashes["map.glb"]
+    if glb_path.exists() and not is_stale("map.glb"):
+        click.echo(f"{scenario}: map.glb is up to date")
+    elif built_glbs is not None and glb_hash in built_glbs:
+        click.echo(f"{scenario}: copying map.glb from {built_glbs[glb_hash]}")
+        shutil.copyfile(built_glbs[glb_hash], glb_path)
+    else:
+        from smarts.core.scenario import Scenario
+
+        click.echo(f"{scenario}: rebuilding map.glb")
+        map_spec = Scenario.discover_map(
+            scenario_root_str, shift_to_origin=shift_to_origin
+        )
+        road_map, _ = map_spec.builder_fn(map_spec)
+        if not road_map:
+            click.echo(
+                "No reference to a RoadNetwork file was found in {}, or one could not be created. "
+                "Please make sure the path passed is a valid Scenario with RoadNetwork file required "
+                "(or a way to create one) for scenario building.".format(
+                    scenario_root_str
+                )
+            )
+            return
+
+        road_map.to_glb(str(glb_path))
+    if built_glbs is not None:
+        built_glbs[glb_hash] = str(glb_path)
+
+    _write_build_hashes(scenario_root, input_hashes)
+
+
+def _build_scenario_group(
+    clean: bool, allow_offset_maps: bool, scenarios: List[str]
+) -> List[str]:
+    """Builds scenarios that use the same map one after another in this process so
+    that the loaded map and its glb are reused. Returns the failures.
+    """
+    built_glbs = {}
+    failures = []
+    for scenario in scenarios:
+        try:
+            _build_single_scenario(clean, allow_offset_maps, scenario, built_glbs)
+        except Exception as e:
+            failures.append(f"{scenario}: {e!r}")
+    return failures
+
+
+def _map_files(scenario_root: Path) -> List[Path]:
+    map_dirs = [scenario_root]
+    if (scenario_root / "map_spec.pkl").exists():
+        from smarts.core.scenario import Scenario
+
+        source = Path(Scenario.discover_map(str(scenario_root)).source)
+        if source.is_file():
+            return [source]
+        map_dirs.append(source)
+    return [
+        path
+        for map_dir in map_dirs
+        if map_dir.is_dir()
+        for path in map_dir.iterdir()
+        if path.name.endswith((".net.xml", ".xodr"))
+        and not path.name.endswith("-AUTOGEN.net.xml")
+    ]
 
-    from smarts.core.scenario import Scenario
 
-    traffic_histories = Scenario.discover_traffic_histories(scenario_root_str)
-    shift_to_origin = not allow_offset_map
+def _hash_inputs(paths: Sequence[Path], *values) -> str:
+    hasher = hashlib.md5()
+    for value in values:
+        hasher.update(repr(value).encode())
+    for path in sorted(set(paths)):
+        hasher.update(path.name.encode())
+        with open(path, "rb") as f:
+            hasher.update(f.read())
+    return hasher.hexdigest()
+
+
+def _artifact_input_hashes(
+    scenario_root: Path, shift_to_origin: bool
+) -> Dict[str, str]:
+    """The hash of the inputs of each artifact of the scenario. An artifact is stale
+    once its hash differs from the one it was last built from.
+    """
+    map_files = _map_files(scenario_root)
+    input_hashes = {"map.glb": _hash_inputs(map_files, shift_to_origin)}
+    scenario_py = scenario_root / "scenario.py"
+    if scenario_py.exists():
+        # Seeds are given to `gen_scenario(...)` in `scenario.py`.
+        scenario_inputs = [scenario_py, *map_files]
+        requirements_txt = scenario_root / "requirements.txt"
+        if requirements_txt.exists():
+            scenario_inputs.append(requirements_txt)
+        input_hashes["traffic"] = _hash_inputs(scenario_inputs)
+        history_specs = [
+            path
+            for pattern in ("*.yml", "*.yaml", "*.json")
+            for path in scenario_root.glob(pattern)
+            if path.name != _BUILD_HASHES
+        ]
+        input_hashes["histories"] = _hash_inputs(scenario_inputs + history_specs)
+    return input_hashes
+
+
+def _read_build_hashes(scenario_root: Path) -> Dict[str, str]:
+    try:
+        with open(scenario_root / _BUILD_HASHES, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-    map_spec = Scenario.discover_map(scenario_root_str, shift_to_origin=shift_to_origin)
-    road_map, _ = map_spec.builder_fn(map_spec)
-    if not road_map:
-        click.echo(
-            "No reference to a RoadNetwork file was found in {}, or one could not be created. "
-            "Please make sure the path passed is a valid Scenario with RoadNetwork file required "
-            "(or a way to create one) for scenario building.".format(scenario_root_str)
-        )
-        return
 
-    road_map.to_glb(os.path.join(scenario_root, "map.glb"))
+def _write_build_hashes(scenario_root: Path, input_hashes: Dict[str, str]):
+    with open(scenario_root / _BUILD_HASHES, "w") as f:
+        json.dump(input_hashes, f, indent=2, sort_keys=True)
 
 
-def _build_single_scenario_proc(
-    clean: bool, allow_offset_map: bool, scenario: str, semaphore: synchronize.Semaphore
-):
-    semaphore.acquire()
-    try:
-        _build_single_scenario(clean, allow_offset_map, scenario)
-    finally:
-        semaphore.release()
+def _remove_outputs(scenario_root: Path, artifact: str):
+    for file_name in _ARTIFACT_OUTPUTS[artifact]:
+        for f in scenario_root.glob(file_name):
+            f.unlink()
 
 
 def _install_requirements(scenario_root):
@@ -148,7 +288,7 @@ def _is_scenario_folder_to_build(path: str) -> bool:
 
 @scenario_cli.command(
     name="build-all",
-    help="Generate all scenarios under the given directories",
+    help="Generate all scenarios under the given directories. Only artifacts whose inputs changed since the last build are regenerated.",
 )
 @click.option(
     "--clean",
@@ -169,24 +309,27 @@ def build_all_scenarios(clean: bool, allow_offset_maps: bool, scenarios: str):
         # if scenarios is not given, set /scenarios as default
         scenarios = ["scenarios"]
 
-    concurrency = max(1, multiprocessing.cpu_count() - 1)
-    sema = Semaphore(concurrency)
-    all_processes = []
+    # Scenarios using the same map are built in the same worker so that it only
+    # loads the map and generates its glb once.
+    groups = defaultdict(list)
     for scenarios_path in scenarios:
         for subdir, _, _ in os.walk(scenarios_path):
             if _is_scenario_folder_to_build(subdir):
                 p = Path(subdir)
                 scenario = f"{scenarios_path}/{p.relative_to(scenarios_path)}"
-                proc = Process(
-                    target=_build_single_scenario_proc,
-                    args=(clean, allow_offset_maps, scenario, sema),
-                )
-                all_processes.append((scenario, proc))
-                proc.start()
+                groups[_hash_inputs(_map_files(p))].append(scenario)
 
-    for scenario_path, proc in all_processes:
-        click.echo(f"Waiting on {scenario_path} ...")
-        proc.join()
+    concurrency = max(1, min(multiprocessing.cpu_count() - 1, len(groups)))
+    failures = []
+    with multiprocessing.Pool(concurrency) as pool:
+        for group_failures in pool.starmap(
+            _build_scenario_group,
+            [(clean, allow_offset_maps, group) for group in groups.values()],
+        ):
+            failures.extend(group_failures)
+
+    if failures:
+        raise click.ClickException("Failed to build scenarios:\n" + "\n".join(failures))
 
 
 @scenario_cli.command(
@@ -212,6 +355,7 @@ def _clean(scenario: str):
         "history_mission.pkl",
         "*.shf",
         "*-AUTOGEN.net.xml",
+        _BUILD_HASHES,
     ]
     p = Path(scenario)
     for file_name in to_be_removed:
@@ -228,16 +372,18 @@ def replay(directory: Sequence[str], timestep: float, endpoint: str):
     from envision.client import Client as Envision
 
     for path in directory:
-        jsonl_paths = list(Path(path).glob("*.jsonl"))
+        record_paths = list(Path(path).glob("*.jsonl")) + list(
+            Path(path).glob("*.envr")
+        )
         click.echo(
-            f"Replaying {len(jsonl_paths)} record(s) at path={path} with "
+            f"Replaying {len(record_paths)} record(s) at path={path} with "
             f"timestep={timestep}s"
         )
 
-        with ThreadPool(len(jsonl_paths)) as pool:
+        with ThreadPool(len(record_paths)) as pool:
             pool.starmap(
                 Envision.read_and_send,
-                [(jsonl, endpoint, timestep) for jsonl in jsonl_paths],
+                [(record, endpoint, timestep) for record in record_paths],
             )
 
 
@@ -23,17 +23,25 @@
 import json
 import logging
 import multiprocessing
+import queue
 import re
 import time
 import warnings
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Dict, Iterator, Optional, Union
 
 import numpy as np
 import websocket
 
-from envision import types
+from envision import recording, types
+from envision.state_delta import (
+    StateDeltaDecoder,
+    StateDeltaEncoder,
+    dumps_binary,
+    to_builtin,
+)
+from envision.utils.multiprocessing_queue import Queue
 from smarts.core.utils.file import unpack
 
 
@@ -65,8 +73,32 @@ class JSONEncoder(json.JSONEncoder):
 class Client:
     """Used to push state from SMARTS to Envision server while the simulation is
     running.
+
+    Args:
+        endpoint: The Envision server websocket endpoint.
+        wait_between_retries: Seconds to wait between connection attempts.
+        output_dir: If given, states are also recorded to a `.jsonl` file here.
+        sim_name: A name used to identify the simulation in Envision.
+        headless: If True, no connection to the Envision server is made.
+        delta_encoding: If True, states are sent as keyframes followed by deltas
+            that only carry the actors and fields that changed.
+        keyframe_interval: The number of deltas between keyframes when using
+            `delta_encoding`.
+        binary: If True, messages are sent to the server as msgpack instead of JSON.
+        max_queue_size: The maximum number of states waiting to be sent to the
+            server. If None, the queue is unbounded. Recordings are never dropped.
+        queue_policy: What to do when the queue is full. `"drop_oldest"` discards
+            the oldest waiting state. `"decimate"` halves the rate at which states
+            are accepted until the queue has drained.
+        send_every_n_steps: Only every Nth simulation step is emitted.
+        recording_format: The format of recordings in `output_dir`. Either
+            `"jsonl"`, one JSON message per line, or `"envr"`, the chunked,
+            compressed and indexed format of `envision.recording`.
     """
 
+    QUEUE_POLICIES = ("drop_oldest", "decimate")
+    RECORDING_FORMATS = ("jsonl", "envr")
+
     class QueueDone:
         """A marker type to indicate termination of messages."""
 
@@ -79,9 +111,45 @@ class Client:
         output_dir: Optional[str] = None,
         sim_name: Optional[str] = None,
         headless: bool = False,
+        delta_encoding: bool = False,
+        keyframe_interval: int = 50,
+        binary: bool = False,
+        max_queue_size: Optional[int] = None,
+        queue_policy: str = "drop_oldest",
+        send_every_n_steps: int = 1,
+        recording_format: str = "jsonl",
     ):
         self._log = logging.getLogger(self.__class__.__name__)
+        if keyframe_interval < 1:
+            raise ValueError(
+                f"`keyframe_interval` must be at least 1, got {keyframe_interval}."
+            )
+        if max_queue_size is not None and max_queue_size < 1:
+            raise ValueError(
+                f"`max_queue_size` must be at least 1, got {max_queue_size}."
+            )
+        if queue_policy not in self.QUEUE_POLICIES:
+            raise ValueError(
+                f"`queue_policy` must be one of {self.QUEUE_POLICIES}, got {queue_policy}."
+            )
+        if recording_format not in self.RECORDING_FORMATS:
+            raise ValueError(
+                f"`recording_format` must be one of {self.RECORDING_FORMATS}, got {recording_format}."
+            )
+        if send_every_n_steps < 1:
+            raise ValueError(
+                f"`send_every_n_steps` must be at least 1, got {send_every_n_steps}."
+            )
+        self._max_queue_size = max_queue_size
+        self._queue_policy = queue_policy
+        self._send_every_n_steps = send_every_n_steps
+        self._dropped_states = 0
+        self._decimation = 1
+        self._offered_states = 0
         self._headless = headless
+        self._delta_encoding = delta_encoding
+        self._keyframe_interval = keyframe_interval
+        self._binary = binary
 
         current_time = datetime.now().strftime("%Y%m%d%H%M%S%f")[:-4]
         client_id = current_time
@@ -98,13 +166,16 @@ class Client:
         if output_dir:
             output_dir = Path(f"{output_dir}/{int(time.time())}")
             output_dir.mkdir(parents=True, exist_ok=True)
-            path = (output_dir / client_id).with_suffix(".jsonl")
+            suffix = recording.SUFFIX if recording_format == "envr" else ".jsonl"
+            path = (output_dir / client_id).with_suffix(suffix)
             self._logging_queue = multiprocessing.Queue()
             self._logging_process = multiprocessing.Process(
                 target=self._write_log_state,
                 args=(
                     self._logging_queue,
                     path,
+                    self._make_encoder(),
+                    self._binary,
                 ),
             )
             self._logging_process.daemon = True
@@ -113,7 +184,7 @@ class Client:
         self._process = None
         self._state_queue = None
         if not self._headless:
-            self._state_queue = multiprocessing.Queue()
+            self._state_queue = Queue(ctx=multiprocessing.get_context())
             self._process = multiprocessing.Process(
                 target=self._connect,
                 args=(
@@ -130,20 +201,97 @@ class Client:
         """Indicates if this client is disconnected from the remote."""
         return self._headless
 
+    @property
+    def dropped_states(self) -> int:
+        """The number of states that were dropped to keep the send queue bounded."""
+        return self._dropped_states
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of states waiting to be sent to the server."""
+        return self._state_queue.qsize() if self._state_queue else 0
+
+    def should_send(self, step_count: int) -> bool:
+        """Check if the state of the given simulation step should be emitted. This
+        lets the simulation skip building states that would not be sent.
+        """
+        return step_count % self._send_every_n_steps == 0
+
+    def _make_encoder(self) -> Optional[StateDeltaEncoder]:
+        if not self._delta_encoding:
+            return None
+        return StateDeltaEncoder(keyframe_interval=self._keyframe_interval)
+
     @staticmethod
-    def _write_log_state(queue, path):
+    def _serialize(
+        state: Union[types.State, types.StateSnapshot, str],
+        encoder: Optional[StateDeltaEncoder] = None,
+        binary: bool = False,
+    ) -> Union[str, bytes]:
+        # if already serialized
+        if isinstance(state, (str, bytes)):
+            return state
+
+        state = types.build_state(state)
+        if encoder:
+            message = encoder.encode(state)
+        else:
+            message = unpack(state)
+            # `frame_time` first so that the server can read it without decoding
+            # the whole message.
+            message = {"frame_time": message["frame_time"], **message}
+
+        if binary:
+            return dumps_binary(message if encoder else to_builtin(message))
+        return json.dumps(message, cls=JSONEncoder)
+
+    @staticmethod
+    def _write_log_state(queue, path, encoder=None, binary=False):
+        if path.suffix == recording.SUFFIX:
+            with recording.RecordingWriter(path) as writer:
+                while True:
+                    state = queue.get()
+                    if type(state) is Client.QueueDone:
+                        break
+
+                    writer.write(
+                        Client._serialize(state, encoder=encoder, binary=binary)
+                    )
+            return
+
         with path.open("w", encoding="utf-8") as f:
             while True:
                 state = queue.get()
                 if type(state) is Client.QueueDone:
                     break
 
-                if not isinstance(state, str):
-                    state = unpack(state)
-                    state = json.dumps(state, cls=JSONEncoder)
-
+                # The recording is line delimited text so it is always JSON
+                state = Client._serialize(state, encoder=encoder)
                 f.write(f"{state}\n")
 
+    @staticmethod
+    def _read_messages(path: str) -> Iterator[Union[str, bytes]]:
+        if recording.is_recording(path):
+            with recording.RecordingReader(path) as reader:
+                for frame in reader:
+                    yield frame.data
+            return
+
+        with open(path, "r") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line:
+                    yield line
+
+    @staticmethod
+    def read_states(path: str) -> Iterator[Dict[str, Any]]:
+        """Read back the complete states of a recording in either format. Recordings
+        made with `delta_encoding` are expanded from their keyframes and deltas.
+        """
+        decoder = StateDeltaDecoder()
+        for message in Client._read_messages(path):
+            yield decoder.decode(message)
+
     @staticmethod
     def read_and_send(
         path: str,
@@ -151,19 +299,20 @@ class Client:
         fixed_timestep_sec: float = 0.1,
         wait_between_retries: float = 0.5,
     ):
-        """Send a pre-recorded envision simulation to the envision server."""
+        """Send a pre-recorded envision simulation to the envision server. Indexed
+        recordings can instead be served directly by the server for seeking, see
+        `envision.server.load_recordings`.
+        """
         client = Client(
             endpoint=endpoint,
             wait_between_retries=wait_between_retries,
         )
-        with open(path, "r") as f:
-            for line in f:
-                line = line.rstrip("\n")
-                time.sleep(fixed_timestep_sec)
-                client._send_raw(line)
+        for message in Client._read_messages(path):
+            time.sleep(fixed_timestep_sec)
+            client._send_raw(message)
 
-            client.teardown()
-            logging.info("Finished Envision data replay")
+        client.teardown()
+        logging.info("Finished Envision data replay")
 
     def _connect(
         self,
@@ -174,13 +323,16 @@ class Client:
         connection_established = False
         warned_about_connection = False
 
-        def optionally_serialize_and_write(state: Union[types.State, str], ws):
-            # if not already serialized
-            if not isinstance(state, str):
-                state = unpack(state)
-                state = json.dumps(state, cls=JSONEncoder)
+        encoder = None
 
-            ws.send(state)
+        def optionally_serialize_and_write(
+            state: Union[types.State, types.StateSnapshot, str], ws
+        ):
+            state = self._serialize(state, encoder=encoder, binary=self._binary)
+            if isinstance(state, bytes):
+                ws.send(state, opcode=websocket.ABNF.OPCODE_BINARY)
+            else:
+                ws.send(state)
 
         def on_close(ws, code=None, reason=None):
             self._log.debug("Connection to Envision closed")
@@ -206,8 +358,10 @@ class Client:
                     self._log.info(logmsg)
 
         def on_open(ws):
-            nonlocal connection_established
+            nonlocal connection_established, encoder
             connection_established = True
+            # A (re)connected server has no previous state to apply deltas to
+            encoder = self._make_encoder()
 
             while True:
                 state = state_queue.get()
@@ -249,14 +403,46 @@ class Client:
 
         run_socket(endpoint, wait_between_retries)
 
-    def send(self, state: types.State):
-        """Send the given envision state to the remote as the most recent state."""
+    def send(self, state: Union[types.State, types.StateSnapshot]):
+        """Send the given envision state to the remote as the most recent state. A
+        `StateSnapshot` is expanded into a full state by the background processes.
+        """
         if not self._headless and self._process.is_alive():
-            self._state_queue.put(state)
+            self._put_state(state)
         if self._logging_process:
             self._logging_queue.put(state)
 
-    def _send_raw(self, state: str):
+    def _put_state(self, state):
+        if self._max_queue_size is None:
+            self._state_queue.put(state)
+            return
+
+        self._offered_states += 1
+        if self._offered_states % self._decimation != 0:
+            self._dropped_states += 1
+            return
+
+        depth = self._state_queue.qsize()
+        if depth >= self._max_queue_size:
+            if self._queue_policy == "decimate":
+                self._decimation *= 2
+                self._dropped_states += 1
+                return
+            try:
+                # Never block the simulation on a stalled consumer.
+                self._state_queue.get_nowait()
+            except queue.Empty:
+                # The oldest state has not reached the underlying pipe yet, drop
+                # this one instead to keep the queue bounded.
+                self._dropped_states += 1
+                return
+            self._dropped_states += 1
+        elif depth == 0 and self._decimation > 1:
+            self._decimation //= 2
+
+        self._state_queue.put(state)
+
+    def _send_raw(self, state: Union[str, bytes]):
         """Skip serialization if we already have serialized data. This is useful if
         we are reading from file and forwarding through the websocket.
         """
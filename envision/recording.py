@@ -0,0 +1,368 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""A chunked, compressed and indexed file format for Envision recordings.
+
+The file is laid out as::
+
+    MAGIC | chunk 0 | chunk 1 | ... | index | footer
+
+Each chunk is a zlib compressed run of frames. Every frame is stored as a
+`(length, is_binary)` header followed by the serialized message (JSON text or
+msgpack, see `envision.state_delta`). The msgpack encoded index lists for every
+chunk its byte range and the timestamp and keyframe flag of each of its frames. The
+fixed size footer points at the index, so a reader only decompresses the chunks
+that hold the time window it needs.
+
+Every chunk is also preceded by its own length and msgpack encoded index entry. A
+recording which was not closed (e.g. the writing process crashed) has no footer and
+is read by walking these chunk headers up to the last complete chunk.
+"""
+import bisect
+import logging
+import mmap
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import msgpack
+
+from envision import state_delta
+
+MAGIC = b"ENVREC\x00\x01"
+SUFFIX = ".envr"
+FORMAT_VERSION = 1
+
+_FRAME_HEADER = struct.Struct("<I?")
+# compressed chunk length, index entry length
+_CHUNK_HEADER = struct.Struct("<II")
+# index offset, index length, magic
+_FOOTER = struct.Struct(f"<QQ{len(MAGIC)}s")
+
+
+class RecordedFrame(NamedTuple):
+    """A single frame read back from a recording."""
+
+    timestamp: float
+    data: Union[str, bytes]
+    keyframe: bool
+
+
+class RecordingWriter:
+    """Writes serialized envision messages to a recording file.
+
+    Args:
+        path: The file to write to.
+        frames_per_chunk: The number of frames after which a new chunk is started.
+            Chunks preferably start at a keyframe, a chunk is only cut before a
+            delta once it holds twice this many frames.
+        compression_level: The zlib compression level of the chunks.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        frames_per_chunk: int = 200,
+        compression_level: int = 6,
+    ):
+        if frames_per_chunk < 1:
+            raise ValueError(
+                f"`frames_per_chunk` must be at least 1, got {frames_per_chunk}."
+            )
+        self._frames_per_chunk = frames_per_chunk
+        self._compression_level = compression_level
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._chunks = []
+        self._pending = []
+        self._pending_times = []
+        self._pending_keyframes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(
+        self,
+        data: Union[str, bytes],
+        frame_time: Optional[float] = None,
+        keyframe: Optional[bool] = None,
+    ):
+        """Append a serialized message. The `frame_time` and `keyframe` flag are read
+        from the message if not given.
+        """
+        if frame_time is None or keyframe is None:
+            header = state_delta.peek(data)
+            frame_time = header["frame_time"] if frame_time is None else frame_time
+            keyframe = state_delta.is_keyframe(header) if keyframe is None else keyframe
+
+        pending = len(self._pending)
+        if (pending >= self._frames_per_chunk and keyframe) or (
+            pending >= 2 * self._frames_per_chunk
+        ):
+            self._flush_chunk()
+
+        is_binary = isinstance(data, (bytes, bytearray, memoryview))
+        payload = bytes(data) if is_binary else data.encode("utf-8")
+        self._pending.append(_FRAME_HEADER.pack(len(payload), is_binary) + payload)
+        self._pending_times.append(frame_time)
+        self._pending_keyframes.append(keyframe)
+
+    def close(self):
+        """Write the remaining frames and the index, then close the file."""
+        if self._file.closed:
+            return
+        self._flush_chunk()
+        index = msgpack.packb(
+            {"version": FORMAT_VERSION, "chunks": self._chunks}, use_bin_type=True
+        )
+        index_offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(_FOOTER.pack(index_offset, len(index), MAGIC))
+        self._file.close()
+
+    def _flush_chunk(self):
+        if not self._pending:
+            return
+        chunk = zlib.compress(b"".join(self._pending), self._compression_level)
+        entry = {
+            "frame_times": self._pending_times,
+            "keyframes": self._pending_keyframes,
+        }
+        packed_entry = msgpack.packb(entry, use_bin_type=True)
+        self._file.write(_CHUNK_HEADER.pack(len(chunk), len(packed_entry)))
+        self._file.write(packed_entry)
+        self._chunks.append(
+            {"offset": self._file.tell(), "length": len(chunk), **entry}
+        )
+        self._file.write(chunk)
+        # Complete chunks survive a crash of the writing process
+        self._file.flush()
+        self._pending = []
+        self._pending_times = []
+        self._pending_keyframes = []
+
+
+class RecordingReader:
+    """Random access to the frames of a recording. The file is memory mapped and
+    chunks are only decompressed when one of their frames is requested.
+
+    Args:
+        path: The recording file.
+        cached_chunks: The number of decompressed chunks to keep in memory.
+    """
+
+    def __init__(self, path: Union[str, Path], cached_chunks: int = 4):
+        self._path = Path(path)
+        self._cached_chunks = cached_chunks
+        self._chunk_cache = OrderedDict()
+        self._chunk_cache_lock = threading.Lock()
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise ValueError(f"`{path}` is not an envision recording.") from e
+
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"`{path}` is not an envision recording.")
+        if (
+            len(self._mmap) >= len(MAGIC) + _FOOTER.size
+            and self._mmap[-len(MAGIC) :] == MAGIC
+        ):
+            index_offset, index_length, _ = _FOOTER.unpack(self._mmap[-_FOOTER.size :])
+            index = msgpack.unpackb(
+                self._mmap[index_offset : index_offset + index_length], raw=False
+            )
+        else:
+            logging.warning(
+                "`%s` was not closed properly, reading its complete chunks.", path
+            )
+            index = {"version": FORMAT_VERSION, "chunks": self._scan_chunks()}
+
+        self._chunks: List[Tuple[int, int]] = []
+        self._timestamps: List[float] = []
+        self._keyframes: List[bool] = []
+        # (chunk index, frame index in the chunk) of every frame
+        self._locations: List[Tuple[int, int]] = []
+        for chunk_idx, chunk in enumerate(index["chunks"]):
+            self._chunks.append((chunk["offset"], chunk["length"]))
+            self._timestamps.extend(chunk["frame_times"])
+            self._keyframes.extend(chunk["keyframes"])
+            self._locations.extend(
+                (chunk_idx, frame_idx) for frame_idx in range(len(chunk["frame_times"]))
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _scan_chunks(self) -> List[dict]:
+        chunks, position = [], len(MAGIC)
+        while position + _CHUNK_HEADER.size <= len(self._mmap):
+            length, entry_length = _CHUNK_HEADER.unpack_from(self._mmap, position)
+            entry_offset = position + _CHUNK_HEADER.size
+            offset = entry_offset + entry_length
+            if offset + length > len(self._mmap):
+                # The chunk was cut off
+                break
+            try:
+                entry = msgpack.unpackb(self._mmap[entry_offset:offset], raw=False)
+                chunks.append(
+                    {
+                        "offset": offset,
+                        "length": length,
+                        "frame_times": entry["frame_times"],
+                        "keyframes": entry["keyframes"],
+                    }
+                )
+            except (ValueError, TypeError, KeyError, msgpack.UnpackException):
+                # A partially written index, not a chunk
+                break
+            position = offset + length
+        return chunks
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    @property
+    def path(self) -> Path:
+        """The recording file."""
+        return self._path
+
+    @property
+    def start_time(self) -> Optional[float]:
+        """The timestamp of the first frame."""
+        return self._timestamps[0] if self._timestamps else None
+
+    @property
+    def end_time(self) -> Optional[float]:
+        """The timestamp of the last frame."""
+        return self._timestamps[-1] if self._timestamps else None
+
+    def timestamp(self, idx: int) -> float:
+        """The timestamp of the frame at the given index."""
+        return self._timestamps[idx]
+
+    def is_keyframe(self, idx: int) -> bool:
+        """If the frame at the given index holds a complete state."""
+        return self._keyframes[idx]
+
+    def frame(self, idx: int) -> RecordedFrame:
+        """Read the frame at the given index."""
+        chunk_idx, frame_idx = self._locations[idx]
+        return RecordedFrame(
+            timestamp=self._timestamps[idx],
+            data=self._chunk(chunk_idx)[frame_idx],
+            keyframe=self._keyframes[idx],
+        )
+
+    def seek(self, timestamp: float) -> int:
+        """Find the index of the nearest keyframe at or before the first frame at or
+        after the given timestamp.
+        """
+        if not self._timestamps:
+            raise IndexError("The recording has no frames.")
+        idx = min(bisect.bisect_left(self._timestamps, timestamp), len(self) - 1)
+        while idx > 0 and not self._keyframes[idx]:
+            idx -= 1
+        return idx
+
+    def window(
+        self, start_time: float, end_time: Optional[float] = None
+    ) -> Iterator[RecordedFrame]:
+        """Iterate the frames between the two timestamps. Iteration starts at the
+        keyframe that the first frame in the window depends on.
+        """
+        if not self._timestamps:
+            return
+        for idx in range(self.seek(start_time), len(self)):
+            if end_time is not None and self._timestamps[idx] > end_time:
+                break
+            yield self.frame(idx)
+
+    def __iter__(self) -> Iterator[RecordedFrame]:
+        return (self.frame(idx) for idx in range(len(self)))
+
+    def close(self):
+        """Release the file."""
+        with self._chunk_cache_lock:
+            self._chunk_cache.clear()
+        if getattr(self, "_mmap", None) is not None and not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+    def _chunk(self, chunk_idx: int) -> List[Union[str, bytes]]:
+        # The reader is shared by the run loops of several viewers
+        with self._chunk_cache_lock:
+            if chunk_idx in self._chunk_cache:
+                self._chunk_cache.move_to_end(chunk_idx)
+                return self._chunk_cache[chunk_idx]
+
+        offset, length = self._chunks[chunk_idx]
+        raw = zlib.decompress(self._mmap[offset : offset + length])
+        frames, position = [], 0
+        while position < len(raw):
+            frame_length, is_binary = _FRAME_HEADER.unpack_from(raw, position)
+            position += _FRAME_HEADER.size
+            payload = raw[position : position + frame_length]
+            position += frame_length
+            frames.append(payload if is_binary else payload.decode("utf-8"))
+
+        with self._chunk_cache_lock:
+            self._chunk_cache[chunk_idx] = frames
+            while len(self._chunk_cache) > self._cached_chunks:
+                self._chunk_cache.popitem(last=False)
+        return frames
+
+
+def is_recording(path: Union[str, Path]) -> bool:
+    """Check if the file is in the indexed recording format."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def convert_jsonl(
+    jsonl_path: Union[str, Path],
+    output_path: Optional[Union[str, Path]] = None,
+    frames_per_chunk: int = 200,
+) -> Path:
+    """Convert a `.jsonl` recording from `envision.client.Client` to the indexed
+    recording format. Returns the path of the converted recording.
+    """
+    jsonl_path = Path(jsonl_path)
+    output_path = Path(output_path) if output_path else jsonl_path.with_suffix(SUFFIX)
+    with open(jsonl_path, "r") as f, RecordingWriter(
+        output_path, frames_per_chunk=frames_per_chunk
+    ) as writer:
+        for line in f:
+            line = line.rstrip("\n")
+            if line:
+                writer.write(line)
+    return output_path
@@ -20,18 +20,21 @@
 import argparse
 import asyncio
 import bisect
+import heapq
 import importlib.resources as pkg_resources
+import itertools
 import json
 import logging
-import random
+import re
 import signal
 import sys
 import threading
 import time
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import Dict, Sequence, Union
+from typing import Dict, Optional, Sequence, Tuple, Union
 
-import ijson
+import msgpack
 import tornado.gen
 import tornado.ioloop
 import tornado.iostream
@@ -40,6 +43,9 @@ import tornado.websocket
 from tornado.websocket import WebSocketClosedError
 
 import smarts.core.models
+from envision import state_delta
+from envision.recording import SUFFIX as RECORDING_SUFFIX
+from envision.recording import RecordingReader
 from envision.types import State
 from envision.web import dist as web_dist
 from smarts.core.utils.file import path2hash
@@ -53,6 +59,12 @@ WEB_CLIENT_RUN_LOOPS = {}
 # Mapping of simulation ID to the Frames data store
 FRAMES = {}
 
+# Mapping of simulation ID to the FrameBatchEncoder shared by its web clients
+FRAME_BATCH_ENCODERS = {}
+
+# How far ahead of the estimated playback time recordings are streamed to a web client
+RECORDING_BUFFER_AHEAD_SEC = 30
+
 
 class AllowCORSMixin:
     """A mixin that adds CORS headers to the page."""
@@ -77,11 +89,20 @@ class AllowCORSMixin:
 class Frame:
     """A frame that describes a single envision simulation step."""
 
-    def __init__(self, data: str, timestamp: float, next_=None):
-        """data is a State object that was converted to string using json.dumps"""
+    def __init__(
+        self,
+        data: Union[str, bytes],
+        timestamp: float,
+        next_=None,
+        keyframe: bool = True,
+    ):
+        """data is a State object, or a delta of one (see `envision.state_delta`), that
+        was serialized using json.dumps or msgpack.
+        """
         self._timestamp = timestamp
         self._data = data
         self._size = sys.getsizeof(data)
+        self._keyframe = keyframe
         self.next_ = next_
 
     @property
@@ -104,20 +125,142 @@ class Frame:
         """The byte size of the frame's raw data."""
         return self._size
 
+    @property
+    def keyframe(self) -> bool:
+        """If this frame holds a complete state rather than a delta to the previous frame."""
+        return self._keyframe
+
+
+class _FrameRun:
+    """A keyframe and the delta frames that depend on it. Runs are the unit of
+    eviction in `Frames`.
+    """
+
+    __slots__ = (
+        "start",
+        "end",
+        "end_idx",
+        "size",
+        "num_frames",
+        "prev",
+        "next",
+        "alive",
+        "evictable",
+        "version",
+    )
+
+    def __init__(self, start: Frame, idx: int, prev):
+        self.start = start
+        self.end = start
+        # The number of frames appended before the end of this run
+        self.end_idx = idx
+        self.size = start.size
+        self.num_frames = 1
+        self.prev = prev
+        self.next = None
+        self.alive = True
+        self.evictable = False
+        self.version = 0
+
+
+class FramesMemoryBudget:
+    """A memory cap shared by all `Frames` of a server. When the total is exceeded
+    frames are evicted from the largest simulation first.
+    """
+
+    def __init__(self, max_capacity_mb: float):
+        self._max_capacity = max_capacity_mb
+        self._frames = set()
+        self._size = 0
+        # (-size, sequence, frames) of the tracked frames. An entry is stale once
+        # the size of its frames has changed, a newer entry was pushed then.
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def add(self, frames):
+        """Start tracking the given frames."""
+        if frames in self._frames:
+            return
+        self._frames.add(frames)
+        self.resize(frames, frames.size)
+
+    def remove(self, frames):
+        """Stop tracking the given frames."""
+        if frames in self._frames:
+            self._frames.discard(frames)
+            self._size -= frames.size
+
+    def resize(self, frames, delta: int):
+        """Account for a change of `delta` bytes in the size of the given frames."""
+        if frames not in self._frames:
+            return
+        self._size += delta
+        heapq.heappush(self._heap, (-frames.size, next(self._sequence), frames))
+        if len(self._heap) > 2 * len(self._frames) + 16:
+            self._heap = [
+                (-frames.size, next(self._sequence), frames) for frames in self._frames
+            ]
+            heapq.heapify(self._heap)
+
+    @property
+    def size(self) -> int:
+        """The total byte size of all tracked frames."""
+        return self._size
+
+    def enforce(self):
+        """Evict frames from the largest simulation until the total size is under
+        the cap.
+        """
+        bytes_to_mb = 1e-6
+        while self._size * bytes_to_mb > self._max_capacity and self._heap:
+            neg_size, _, frames = heapq.heappop(self._heap)
+            if frames not in self._frames or -neg_size != frames.size:
+                continue
+            # Evicting resizes the frames, which pushes their new size. Frames
+            # without evictable runs drop out until they grow again.
+            frames._evict_one()
+
 
 class Frames:
     """A managed collection of simulation frames.
-    This collection uses a random discard of simulation frames to stay under capacity.
-    Random discard favours preserving newer frames over time.
+    To stay under capacity whole runs of frames (a keyframe and the deltas that
+    depend on it) are discarded. The run that leaves the smallest gap in time is
+    discarded first, so the retained frames stay evenly spaced for scrubbing. The
+    start frame and the most recent frames are always kept.
+
+    Args:
+        max_capacity_mb: The capacity of this simulation's frames.
+        budget: A memory cap shared with the frames of other simulations.
     """
 
-    def __init__(self, max_capacity_mb=500):
+    # Number of most recent frames that are never discarded
+    END_FRAMES_TO_KEEP = 10
+
+    def __init__(self, max_capacity_mb=500, budget: FramesMemoryBudget = None):
         self._max_capacity = max_capacity_mb
+        self._budget = budget
 
         # XXX: Index of timestamp in `self._timestamps` matches the index of the
-        # frame with the same timestamp in `self._frames`.
+        # frame with the same timestamp in `self._frames` and of its run in
+        # `self._frame_runs`. Discarded frames are only removed from these lists
+        # once they make up half of them.
         self._timestamps = []
         self._frames = []
+        self._frame_runs = []
+        self._discarded = 0
+
+        self._size = 0
+        self._num_appended = 0
+        self._first_run = None
+        self._last_run = None
+        # Complete runs that still hold some of the most recent frames
+        self._recent_runs = deque()
+        # (gap, sequence, version, run) of evictable runs
+        self._eviction_heap = []
+        self._sequence = itertools.count()
+
+        if budget is not None:
+            budget.add(self)
 
     @property
     def start_frame(self):
@@ -136,42 +279,286 @@ class Frames:
             return 0
         return self._frames[-1].timestamp - self._frames[0].timestamp
 
+    @property
+    def size(self) -> int:
+        """The total byte size of the available frames."""
+        return self._size
+
+    def __len__(self):
+        return len(self._frames) - self._discarded
+
+    def __iter__(self):
+        frame = self.start_frame
+        while frame is not None:
+            yield frame
+            frame = frame.next_
+
     def append(self, frame: Frame):
         """Add a frame to the end of the existing frames."""
-        self._enforce_max_capacity()
-        if len(self._frames) >= 1:
-            self._frames[-1].next_ = frame
+        idx = self._num_appended
+        self._num_appended += 1
+        if self._last_run is None:
+            self._last_run = self._first_run = _FrameRun(frame, idx, prev=None)
+        elif frame.keyframe:
+            self._last_run.end.next_ = frame
+            run = _FrameRun(frame, idx, prev=self._last_run)
+            self._last_run.next = run
+            if self._last_run is not self._first_run:
+                self._recent_runs.append(self._last_run)
+            self._last_run = run
+        else:
+            run = self._last_run
+            run.end.next_ = frame
+            run.end = frame
+            run.end_idx = idx
+            run.size += frame.size
+            run.num_frames += 1
+
         self._frames.append(frame)
         self._timestamps.append(frame.timestamp)
+        self._frame_runs.append(self._last_run)
+        self._size += frame.size
+        if self._budget is not None:
+            self._budget.resize(self, frame.size)
+
+        while (
+            self._recent_runs
+            and idx - self._recent_runs[0].end_idx >= self.END_FRAMES_TO_KEEP
+        ):
+            run = self._recent_runs.popleft()
+            run.evictable = True
+            self._push_eviction_candidate(run)
+
+        self._enforce_max_capacity()
+        if self._budget is not None:
+            self._budget.enforce()
 
     def __call__(self, timestamp):
-        """Finds the nearest frame according to the given timestamp."""
+        """Finds the nearest keyframe at or before the frame nearest to the given
+        timestamp.
+        """
         frame_idx = bisect.bisect_left(self._timestamps, timestamp)
         if frame_idx >= len(self._frames):
-            frame_idx = -1
-        return self._frames[frame_idx]
+            frame_idx = len(self._frames) - 1
+        run = self._frame_runs[frame_idx]
+        # A discarded run still points to the run after it at the time, which
+        # holds the nearest available frame after the given timestamp.
+        while not run.alive:
+            run = run.next
+        return run.start
+
+    def _push_eviction_candidate(self, run: _FrameRun):
+        run.version += 1
+        gap = run.next.start.timestamp - run.prev.start.timestamp
+        heapq.heappush(
+            self._eviction_heap, (gap, next(self._sequence), run.version, run)
+        )
 
-    def _enforce_max_capacity(self):
-        """Sample random frames and clear their data to ensure we're under the max
-        capacity size.
+    def _evict_one(self) -> int:
+        """Discard the run that leaves the smallest gap. Returns the number of bytes
+        freed.
         """
+        while self._eviction_heap:
+            _, _, version, run = heapq.heappop(self._eviction_heap)
+            if run.alive and run.version == version:
+                break
+        else:
+            return 0
+
+        prev, next_ = run.prev, run.next
+        prev.end.next_ = next_.start
+        prev.next = next_
+        next_.prev = prev
+        run.alive = False
+        self._size -= run.size
+        self._discarded += run.num_frames
+        if self._budget is not None:
+            self._budget.resize(self, -run.size)
+
+        for neighbour in (prev, next_):
+            if neighbour.evictable:
+                self._push_eviction_candidate(neighbour)
+
+        if self._discarded * 2 > len(self._frames):
+            self._compact()
+        return run.size
+
+    def _compact(self):
+        keep = [idx for idx, run in enumerate(self._frame_runs) if run.alive]
+        self._frames = [self._frames[idx] for idx in keep]
+        self._timestamps = [self._timestamps[idx] for idx in keep]
+        self._frame_runs = [self._frame_runs[idx] for idx in keep]
+        self._discarded = 0
+
+    def _enforce_max_capacity(self):
+        """Discard runs of frames to ensure we're under the max capacity size."""
         bytes_to_mb = 1e-6
-        start_frames_to_keep = 1
-        end_frames_to_keep = 10
-        sizes = [frame.size for frame in self._frames]
-        while (
-            len(self._frames) > start_frames_to_keep + end_frames_to_keep
-            and sum(sizes) * bytes_to_mb > self._max_capacity
-        ):
-            # XXX: randint(1, ...), we skip the start frame because that is a "safe"
-            #      frame we can always rely on being available.
-            idx_to_delete = random.randint(
-                1, len(self._frames) - 1 - end_frames_to_keep
+        while self._size * bytes_to_mb > self._max_capacity and self._evict_one():
+            pass
+
+
+class FrameBatchEncoder:
+    """Encodes the batches of frames pushed to the web clients of a simulation. One
+    encoder is shared by all web clients of the simulation, recently encoded batches
+    are cached so that web clients at the same playhead are sent the same bytes
+    instead of encoding the batch again. Only the frames are cached, the
+    `total_elapsed_time` of the message, which grows with a live simulation, is
+    added when the batch is sent.
+
+    JSON frames are embedded as they are instead of being encoded again as strings.
+
+    Args:
+        max_cached_batches: The number of encoded batches to keep.
+        max_cached_mb: The total size of the encoded batches to keep. These are
+            copies of frames, kept on top of the `Frames` capacity.
+    """
+
+    def __init__(self, max_cached_batches: int = 16, max_cached_mb: float = 32):
+        self._max_cached_batches = max_cached_batches
+        self._max_cached_bytes = max_cached_mb * 1e6
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(
+        self, frames, start_time: float, total_elapsed_time: float
+    ) -> Tuple[Union[str, bytes], bool]:
+        """Encode a batch of frames. Returns the message and if it is binary."""
+        key = (frames[0], frames[-1], len(frames), start_time)
+        with self._lock:
+            encoded = self._cache.get(key)
+            if encoded is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+
+        if encoded is None:
+            encoded = self._encode_frames(frames, start_time)
+            with self._lock:
+                self.misses += 1
+                if key not in self._cache:
+                    self._cache[key] = encoded
+                    self._cached_bytes += len(encoded[0])
+                while self._cache and (
+                    len(self._cache) > self._max_cached_batches
+                    or self._cached_bytes > self._max_cached_bytes
+                ):
+                    _, (evicted, _) = self._cache.popitem(last=False)
+                    self._cached_bytes -= len(evicted)
+
+        encoded_frames, binary = encoded
+        if binary:
+            # A map of two entries, the frames are already a msgpack array
+            message = b"".join(
+                (
+                    b"\x82",
+                    msgpack.packb("total_elapsed_time"),
+                    msgpack.packb(total_elapsed_time),
+                    msgpack.packb("frames"),
+                    encoded_frames,
+                )
             )
-            self._frames[idx_to_delete - 1].next_ = self._frames[idx_to_delete].next_
-            del sizes[idx_to_delete]
-            del self._frames[idx_to_delete]
-            del self._timestamps[idx_to_delete]
+            return message, True
+        message = (
+            f'{{"total_elapsed_time":{json.dumps(total_elapsed_time)},'
+            f'"frames":{encoded_frames}}}'
+        )
+        return message, False
+
+    @staticmethod
+    def _encode_frames(frames, start_time) -> Tuple[Union[str, bytes], bool]:
+        data = [frame.data for frame in frames]
+        if any(isinstance(d, bytes) for d in data):
+            encoded_frames = [
+                {
+                    "state": d,
+                    "current_elapsed_time": frame.timestamp - start_time,
+                }
+                for frame, d in zip(frames, data)
+            ]
+            return msgpack.packb(encoded_frames, use_bin_type=True), True
+
+        # The frames are already JSON, splice them in as they are
+        frames_formatted = ",".join(
+            f'{{"state":{d},"current_elapsed_time":'
+            f"{json.dumps(frame.timestamp - start_time)}}}"
+            for frame, d in zip(frames, data)
+        )
+        return f"[{frames_formatted}]", False
+
+
+class RecordingFrame:
+    """A frame of a recording that is read from the file when its data is needed."""
+
+    def __init__(self, reader: RecordingReader, idx: int):
+        self._reader = reader
+        self._idx = idx
+
+    @property
+    def timestamp(self):
+        """The timestamp for this frame."""
+        return self._reader.timestamp(self._idx)
+
+    @property
+    def data(self):
+        """The raw envision data."""
+        return self._reader.frame(self._idx).data
+
+    @property
+    def keyframe(self) -> bool:
+        """If this frame holds a complete state rather than a delta to the previous frame."""
+        return self._reader.is_keyframe(self._idx)
+
+    @property
+    def next_(self):
+        """The following frame."""
+        if self._idx + 1 >= len(self._reader):
+            return None
+        return RecordingFrame(self._reader, self._idx + 1)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, RecordingFrame)
+            and self._reader is other._reader
+            and self._idx == other._idx
+        )
+
+    def __hash__(self):
+        return hash((id(self._reader), self._idx))
+
+
+class RecordingFrames:
+    """The frames of an indexed recording (see `envision.recording`). This offers the
+    same interface as `Frames` but frames are only read from the memory mapped file
+    when playback reaches them.
+    """
+
+    def __init__(self, reader: RecordingReader):
+        self._reader = reader
+
+    @property
+    def start_frame(self):
+        """The first frame in all available frames."""
+        return RecordingFrame(self._reader, 0) if len(self._reader) else None
+
+    @property
+    def start_time(self):
+        """The first timestamp in all available frames."""
+        return self._reader.start_time
+
+    @property
+    def elapsed_time(self):
+        """The total elapsed time between the first and last frame."""
+        if len(self._reader) == 0:
+            return 0
+        return self._reader.end_time - self._reader.start_time
+
+    def __call__(self, timestamp):
+        """Finds the nearest keyframe at or before the frame nearest to the given
+        timestamp.
+        """
+        return RecordingFrame(self._reader, self._reader.seek(timestamp))
 
 
 class WebClientRunLoop:
@@ -180,13 +567,26 @@ class WebClientRunLoop:
     messages to it as needed.
     """
 
-    def __init__(self, frames, web_client_handler, fixed_timestep_sec, seek=None):
+    def __init__(
+        self,
+        frames,
+        web_client_handler,
+        fixed_timestep_sec,
+        seek=None,
+        max_buffer_ahead_sec=None,
+        batch_encoder: Optional[FrameBatchEncoder] = None,
+    ):
         self._log = logging.getLogger(__class__.__name__)
         self._frames = frames
+        self._batch_encoder = batch_encoder or FrameBatchEncoder()
         self._client = web_client_handler
         self._fixed_timestep_sec = fixed_timestep_sec
         self._seek = seek
         self._thread = None
+        # If set, frames further than this ahead of the estimated playback time
+        # are held back. This stops a whole recording being pushed to the client.
+        self._max_buffer_ahead_sec = max_buffer_ahead_sec
+        self._playback_origin = None
 
     def seek(self, offset_seconds):
         """Indicate to the webclient that it should progress to the nearest frame to the given time."""
@@ -208,6 +608,7 @@ class WebClientRunLoop:
                 time.sleep(0.5 * self._fixed_timestep_sec)
                 frame_ptr = self._frames.start_frame
                 frames_to_send = [frame_ptr]
+            self._playback_origin = (frame_ptr.timestamp, time.time())
 
             while True:
                 # Handle seek
@@ -220,6 +621,7 @@ class WebClientRunLoop:
                         frame_ptr = self._frames.start_frame
                     frames_to_send = [frame_ptr]
                     self._seek = None
+                    self._playback_origin = (frame_ptr.timestamp, time.time())
 
                 assert len(frames_to_send) > 0
                 closed = self._push_frames_to_web_client(frames_to_send)
@@ -241,22 +643,33 @@ class WebClientRunLoop:
 
     def _push_frames_to_web_client(self, frames):
         try:
-            frames_formatted = [
-                {
-                    "state": frame.data,
-                    "current_elapsed_time": frame.timestamp - self._frames.start_time,
-                    "total_elapsed_time": self._frames.elapsed_time,
-                }
-                for frame in frames
-            ]
-            self._client.write_message(json.dumps(frames_formatted))
+            message, binary = self._batch_encoder.encode(
+                frames,
+                start_time=self._frames.start_time,
+                total_elapsed_time=self._frames.elapsed_time,
+            )
+            self._client.write_message(message, binary=binary)
             return False
         except WebSocketClosedError:
             return True
 
+    def _latest_timestamp_to_send(self):
+        if self._max_buffer_ahead_sec is None or self._playback_origin is None:
+            return None
+        origin_timestamp, origin_time = self._playback_origin
+        return (
+            origin_timestamp + (time.time() - origin_time) + self._max_buffer_ahead_sec
+        )
+
     def _calculate_frame_delay(self, frame_ptr):
         # we may want to be more clever here in the future...
-        return 0.5 * self._fixed_timestep_sec if not frame_ptr.next_ else 0
+        next_ = frame_ptr.next_
+        if not next_:
+            return 0.5 * self._fixed_timestep_sec
+        latest = self._latest_timestamp_to_send()
+        if latest is not None and next_.timestamp > latest:
+            return 0.5 * self._fixed_timestep_sec
+        return 0
 
     def _wait_for_next_frame(self, frame_ptr):
         FRAME_BATCH_SIZE = 100  # limit the batch size for bandwidth and to allow breaks for seeks to be handled
@@ -264,10 +677,15 @@ class WebClientRunLoop:
             delay = self._calculate_frame_delay(frame_ptr)
             time.sleep(delay)
             frames_to_send = []
-            while frame_ptr.next_ and len(frames_to_send) <= FRAME_BATCH_SIZE:
-                frame_ptr = frame_ptr.next_
+            latest = self._latest_timestamp_to_send()
+            next_ = frame_ptr.next_
+            while next_ and len(frames_to_send) <= FRAME_BATCH_SIZE:
+                if latest is not None and next_.timestamp > latest:
+                    break
+                frame_ptr = next_
                 frames_to_send.append(frame_ptr)
-            if len(frames_to_send) > 0:
+                next_ = frame_ptr.next_
+            if len(frames_to_send) > 0 or self._seek is not None:
                 return frame_ptr, frames_to_send
 
 
@@ -277,17 +695,21 @@ class BroadcastWebSocket(tornado.websocket.WebSocketHandler):
     that have open websockets via the `StateWebSocket` handler.
     """
 
-    def initialize(self, max_capacity_mb):
+    def initialize(self, max_capacity_mb, budget=None):
         """Setup this websocket."""
         self._logger = logging.getLogger(self.__class__.__name__)
         self._max_capacity_mb = max_capacity_mb
+        self._budget = budget
 
     async def open(self, simulation_id):
         """Asynchronously open the websocket to broadcast to all web clients."""
         self._logger.debug(f"Broadcast websocket opened for simulation={simulation_id}")
         self._simulation_id = simulation_id
-        self._frames = Frames(max_capacity_mb=self._max_capacity_mb)
+        self._frames = Frames(
+            max_capacity_mb=self._max_capacity_mb, budget=self._budget
+        )
         FRAMES[simulation_id] = self._frames
+        FRAME_BATCH_ENCODERS[simulation_id] = FrameBatchEncoder()
         WEB_CLIENT_RUN_LOOPS[simulation_id] = set()
 
     def on_close(self):
@@ -297,11 +719,20 @@ class BroadcastWebSocket(tornado.websocket.WebSocketHandler):
         )
         del WEB_CLIENT_RUN_LOOPS[self._simulation_id]
         del FRAMES[self._simulation_id]
+        del FRAME_BATCH_ENCODERS[self._simulation_id]
+        if self._budget is not None:
+            self._budget.remove(self._frames)
 
     async def on_message(self, message):
         """Asynchronously receive messages from the Envision client."""
-        frame_time = next(ijson.items(message, "frame_time", use_float=True))
-        self._frames.append(Frame(timestamp=frame_time, data=message))
+        header = state_delta.peek(message)
+        self._frames.append(
+            Frame(
+                timestamp=header["frame_time"],
+                data=message,
+                keyframe=state_delta.is_keyframe(header),
+            )
+        )
 
 
 class StateWebSocket(tornado.websocket.WebSocketHandler):
@@ -328,11 +759,16 @@ class StateWebSocket(tornado.websocket.WebSocketHandler):
 
         # TODO: Set this appropriately (pass from SMARTS)
         fixed_timestep_sec = 0.1
+        frames = FRAMES[simulation_id]
         self._run_loop = WebClientRunLoop(
-            frames=FRAMES[simulation_id],
+            frames=frames,
             web_client_handler=self,
             fixed_timestep_sec=fixed_timestep_sec,
             seek=self.get_argument("seek", None),
+            max_buffer_ahead_sec=RECORDING_BUFFER_AHEAD_SEC
+            if isinstance(frames, RecordingFrames)
+            else None,
+            batch_encoder=FRAME_BATCH_ENCODERS[simulation_id],
         )
 
         self._logger.debug(f"State websocket opened for simulation={simulation_id}")
@@ -457,8 +893,20 @@ class MainHandler(tornado.web.RequestHandler):
             self.render(str(index_path))
 
 
-def make_app(scenario_dirs: Sequence, max_capacity_mb: float):
-    """Create the envision web server application through composition of services."""
+def make_app(
+    scenario_dirs: Sequence,
+    max_capacity_mb: float,
+    max_total_capacity_mb: Optional[float] = None,
+):
+    """Create the envision web server application through composition of services.
+    `max_capacity_mb` caps the frames of each simulation and `max_total_capacity_mb`
+    the frames of all simulations together.
+    """
+    budget = (
+        FramesMemoryBudget(max_total_capacity_mb)
+        if max_total_capacity_mb is not None
+        else None
+    )
     with pkg_resources.path(web_dist, ".") as dist_path:
         return tornado.web.Application(
             [
@@ -468,7 +916,7 @@ def make_app(scenario_dirs: Sequence, max_capacity_mb: float):
                 (
                     r"/simulations/(?P<simulation_id>\w+)/broadcast",
                     BroadcastWebSocket,
-                    dict(max_capacity_mb=max_capacity_mb),
+                    dict(max_capacity_mb=max_capacity_mb, budget=budget),
                 ),
                 (
                     r"/assets/maps/(.*)",
@@ -481,15 +929,44 @@ def make_app(scenario_dirs: Sequence, max_capacity_mb: float):
         )
 
 
+def load_recordings(paths: Sequence) -> Sequence[str]:
+    """Make indexed recordings (see `envision.recording`) available for playback as
+    simulations. Directories are searched for recordings. Returns the simulation ids.
+    """
+    simulation_ids = []
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob(f"*{RECORDING_SUFFIX}")) if path.is_dir() else [path]
+        for file in files:
+            simulation_id = re.sub(r"\W+", "_", file.stem)
+            if simulation_id in FRAMES:
+                logging.warning(
+                    f"Skipping recording `{file}`, `{simulation_id}` is already used."
+                )
+                continue
+            FRAMES[simulation_id] = RecordingFrames(RecordingReader(file))
+            FRAME_BATCH_ENCODERS[simulation_id] = FrameBatchEncoder()
+            WEB_CLIENT_RUN_LOOPS[simulation_id] = set()
+            simulation_ids.append(simulation_id)
+    return simulation_ids
+
+
 def on_shutdown():
     """Callback on shutdown of the envision server."""
     logging.debug("Shutting down Envision")
     tornado.ioloop.IOLoop.current().stop()
 
 
-def run(scenario_dirs, max_capacity_mb=500, port=8081):
+def run(
+    scenario_dirs,
+    max_capacity_mb=500,
+    port=8081,
+    recordings=(),
+    max_total_capacity_mb=None,
+):
     """Create and run an envision web server."""
-    app = make_app(scenario_dirs, max_capacity_mb)
+    load_recordings(recordings)
+    app = make_app(scenario_dirs, max_capacity_mb, max_total_capacity_mb)
     app.listen(port)
     logging.debug(f"Envision listening on port={port}")
 
@@ -532,9 +1009,34 @@ def main():
         default=500,
         type=float,
     )
+    parser.add_argument(
+        "--max_total_capacity",
+        help=(
+            "Max capacity in MB of Envision across all simulations. Unlimited if not "
+            "given."
+        ),
+        default=None,
+        type=float,
+    )
+    parser.add_argument(
+        "--recordings",
+        help=(
+            f"Recording files ({RECORDING_SUFFIX}) or directories of recordings to "
+            "serve for playback."
+        ),
+        default=[],
+        type=str,
+        nargs="*",
+    )
     args = parser.parse_args()
 
-    run(scenario_dirs=args.scenarios, max_capacity_mb=args.max_capacity, port=args.port)
+    run(
+        scenario_dirs=args.scenarios,
+        max_capacity_mb=args.max_capacity,
+        port=args.port,
+        recordings=args.recordings,
+        max_total_capacity_mb=args.max_total_capacity,
+    )
 
 
 if __name__ == "__main__":
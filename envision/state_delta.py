@@ -0,0 +1,251 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import json
+from enum import Enum
+from typing import Any, Dict, Union
+
+import ijson
+import msgpack
+
+from smarts.core.utils.file import unpack
+
+# The key under which the frame type is stored. Messages without this key are
+# treated as keyframes so that full `envision.types.State` messages remain valid.
+FRAME_TYPE_KEY = "frame_type"
+KEYFRAME = "keyframe"
+DELTA = "delta"
+
+# Key in a delta that lists the traffic actors which left the simulation.
+REMOVED_TRAFFIC_KEY = "removed_traffic"
+
+_BUILTIN_SCALARS = {str, bool, int, float, type(None)}
+
+
+def to_builtin(obj):
+    """Recursively convert an unpacked envision state into python builtin types so
+    that it can be compared field by field and serialized without a custom encoder.
+    Tuples become lists, numpy scalars and arrays become python numbers and lists.
+    """
+    if type(obj) in _BUILTIN_SCALARS:
+        return obj
+    elif isinstance(obj, dict):
+        return {key: to_builtin(value) for key, value in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [to_builtin(value) for value in obj]
+    elif isinstance(obj, Enum):
+        return obj.value
+    elif isinstance(obj, (str, bool, int, float)) or obj is None:
+        return obj
+    elif hasattr(obj, "tolist"):
+        # numpy arrays and numpy scalars
+        return to_builtin(obj.tolist())
+    return obj
+
+
+def is_keyframe(message: Dict[str, Any]) -> bool:
+    """Check if an encoded message holds a complete state."""
+    return message.get(FRAME_TYPE_KEY, KEYFRAME) == KEYFRAME
+
+
+def diff_states(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate the delta that transforms `previous` into `current`. Only changed
+    top-level fields and changed fields of traffic actors are kept.
+    """
+    delta = {}
+    for key, value in current.items():
+        if key == "traffic":
+            continue
+        if key not in previous or previous[key] != value:
+            delta[key] = value
+
+    previous_traffic = previous.get("traffic", {})
+    current_traffic = current.get("traffic", {})
+    traffic_delta = {}
+    for actor_id, actor in current_traffic.items():
+        previous_actor = previous_traffic.get(actor_id)
+        if previous_actor is None:
+            traffic_delta[actor_id] = actor
+            continue
+        changed = {
+            field: value
+            for field, value in actor.items()
+            if previous_actor.get(field) != value
+        }
+        if changed:
+            traffic_delta[actor_id] = changed
+    if traffic_delta:
+        delta["traffic"] = traffic_delta
+
+    removed = [
+        actor_id for actor_id in previous_traffic if actor_id not in current_traffic
+    ]
+    if removed:
+        delta[REMOVED_TRAFFIC_KEY] = removed
+
+    return delta
+
+
+def apply_delta(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a delta to a complete state. The base state is not modified."""
+    state = dict(base)
+    traffic = dict(base.get("traffic", {}))
+    for key, value in delta.items():
+        if key in (FRAME_TYPE_KEY, REMOVED_TRAFFIC_KEY, "traffic"):
+            continue
+        state[key] = value
+
+    for actor_id in delta.get(REMOVED_TRAFFIC_KEY, []):
+        traffic.pop(actor_id, None)
+    for actor_id, fields in delta.get("traffic", {}).items():
+        actor = dict(traffic.get(actor_id, {}))
+        actor.update(fields)
+        traffic[actor_id] = actor
+
+    state["traffic"] = traffic
+    return state
+
+
+class StateDeltaEncoder:
+    """Converts a stream of envision states into keyframes and per-step deltas that
+    only carry the actors and fields which changed since the previous state.
+
+    Args:
+        keyframe_interval: The number of deltas between consecutive keyframes.
+    """
+
+    def __init__(self, keyframe_interval: int = 50):
+        if keyframe_interval < 1:
+            raise ValueError(
+                f"`keyframe_interval` must be at least 1, got {keyframe_interval}."
+            )
+        self._keyframe_interval = keyframe_interval
+        self._previous = None
+        self._deltas_since_keyframe = 0
+
+    def reset(self):
+        """Force the next encoded state to be a keyframe."""
+        self._previous = None
+        self._deltas_since_keyframe = 0
+
+    def encode(self, state) -> Dict[str, Any]:
+        """Encode an `envision.types.State` (or its unpacked dictionary form)."""
+        current = to_builtin(unpack(state))
+        previous = self._previous
+        self._previous = current
+
+        if (
+            previous is None
+            or self._deltas_since_keyframe >= self._keyframe_interval
+            or previous.get("scenario_id") != current.get("scenario_id")
+        ):
+            self._deltas_since_keyframe = 0
+            # `frame_type` and `frame_time` are put first so that they can be
+            # read without parsing the whole message.
+            message = {FRAME_TYPE_KEY: KEYFRAME, "frame_time": current["frame_time"]}
+            message.update(current)
+            return message
+
+        self._deltas_since_keyframe += 1
+        message = {FRAME_TYPE_KEY: DELTA, "frame_time": current["frame_time"]}
+        message.update(diff_states(previous, current))
+        return message
+
+
+class StateDeltaDecoder:
+    """Rebuilds complete states from a stream of keyframes and deltas."""
+
+    def __init__(self):
+        self._state = None
+
+    def reset(self):
+        """Drop the current state. The next message must be a keyframe."""
+        self._state = None
+
+    def decode(self, message: Union[Dict[str, Any], str, bytes]) -> Dict[str, Any]:
+        """Decode a message into a complete state."""
+        if not isinstance(message, dict):
+            message = loads(message)
+
+        if is_keyframe(message):
+            state = {
+                key: value for key, value in message.items() if key != FRAME_TYPE_KEY
+            }
+        elif self._state is None:
+            raise ValueError("Unable to decode a delta without a preceding keyframe.")
+        else:
+            state = apply_delta(self._state, message)
+
+        self._state = state
+        return state
+
+
+def dumps_binary(message: Dict[str, Any]) -> bytes:
+    """Serialize an encoded message to the compact msgpack wire format. The message
+    must only contain builtin types (see `to_builtin`).
+    """
+    return msgpack.packb(message, use_bin_type=True)
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Dict[str, Any]:
+    """Deserialize a message in either the JSON or the msgpack wire format."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
+
+
+def peek(data: Union[str, bytes, bytearray, memoryview]) -> Dict[str, Any]:
+    """Read the `frame_type` and `frame_time` header of a message. Messages from
+    `envision.client.Client` carry both as their first entries so only those are
+    decoded. Plain `State` messages have no `frame_type` and only `frame_time` is
+    returned.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        unpacker = msgpack.Unpacker(raw=False, max_buffer_size=len(data))
+        unpacker.feed(data)
+        header = {}
+        for _ in range(unpacker.read_map_header()):
+            key = unpacker.unpack()
+            if key in (FRAME_TYPE_KEY, "frame_time"):
+                header[key] = unpacker.unpack()
+                if "frame_time" in header:
+                    break
+            else:
+                unpacker.skip()
+        return header
+
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    events = ijson.parse(data, use_float=True)
+    next(events)  # start of the top-level map
+    _, _, first_key = next(events)
+    if first_key == "frame_time":
+        return {"frame_time": next(events)[2]}
+    if first_key != FRAME_TYPE_KEY:
+        # States recorded before `frame_time` was moved to the front.
+        return {"frame_time": next(ijson.items(data, "frame_time", use_float=True))}
+
+    header = {FRAME_TYPE_KEY: next(events)[2]}
+    for prefix, event, value in events:
+        if prefix == "frame_time" and event == "number":
+            header["frame_time"] = value
+            break
+    return header
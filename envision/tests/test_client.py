@@ -0,0 +1,191 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+from envision import types
+from envision.client import Client
+from envision.state_delta import loads
+from envision.tests.test_state_delta import make_state
+from envision.utils.multiprocessing_queue import Queue
+from smarts.core.road_map import WAYPOINT_DTYPE, WaypointPath
+
+
+@pytest.fixture
+def stalled_client_factory(monkeypatch):
+    """Creates clients whose connection never takes states off the queue, like an
+    Envision server that can not keep up.
+    """
+    release = multiprocessing.Event()
+
+    def connect(self, endpoint, state_queue, wait_between_retries=0.05):
+        release.wait(timeout=10)
+
+    monkeypatch.setattr(Client, "_connect", connect)
+    clients = []
+
+    def factory(**kwargs):
+        client = Client(**kwargs)
+        clients.append(client)
+        return client
+
+    yield factory
+
+    release.set()
+    for client in clients:
+        client.teardown()
+
+
+def drain(client):
+    return [client._state_queue.get(timeout=1) for _ in range(client.queue_depth)]
+
+
+def test_drop_oldest(stalled_client_factory):
+    client = stalled_client_factory(max_queue_size=3, queue_policy="drop_oldest")
+    for idx in range(10):
+        client.send(idx)
+        # Give the queue's feeder thread time to move the state into the pipe,
+        # otherwise the newest state is dropped rather than blocking the sender.
+        time.sleep(0.05)
+
+    assert client.queue_depth == 3
+    assert client.dropped_states == 7
+    assert drain(client) == [7, 8, 9]
+
+
+def _queue_size(queue, sizes):
+    sizes.put(queue.qsize())
+
+
+def test_queue_survives_spawn():
+    ctx = multiprocessing.get_context("spawn")
+    queue = Queue(ctx=ctx)
+    queue.put(1)
+    sizes = ctx.SimpleQueue()
+    process = ctx.Process(target=_queue_size, args=(queue, sizes))
+    process.start()
+    process.join(timeout=30)
+    assert process.exitcode == 0
+    assert sizes.get() == 1
+
+
+def test_decimate(stalled_client_factory):
+    client = stalled_client_factory(max_queue_size=4, queue_policy="decimate")
+    for idx in range(12):
+        client.send(idx)
+
+    # Once full, only every 2nd, then every 4th, ... state is considered
+    assert client.queue_depth == 4
+    assert client.dropped_states == 8
+    assert drain(client) == [0, 1, 2, 3]
+
+    # The rate recovers once the queue has drained
+    for idx in range(12, 20):
+        client.send(idx)
+    assert client.queue_depth > 1
+
+
+def test_unbounded_by_default(stalled_client_factory):
+    client = stalled_client_factory()
+    for idx in range(50):
+        client.send(idx)
+
+    assert client.queue_depth == 50
+    assert client.dropped_states == 0
+
+
+def test_send_every_n_steps():
+    client = Client(headless=True, send_every_n_steps=3)
+    assert [step for step in range(10) if client.should_send(step)] == [0, 3, 6, 9]
+
+    with pytest.raises(ValueError):
+        Client(headless=True, send_every_n_steps=0)
+    with pytest.raises(ValueError):
+        Client(headless=True, queue_policy="drop_newest")
+
+
+def test_build_state_from_snapshot():
+    agent = types.TrafficActorState(
+        actor_type=types.TrafficActorType.Agent,
+        vehicle_type=types.VehicleType.Car,
+        position=(1.0, 2.0, 0.0),
+        heading=0.5,
+        speed=3.0,
+        name="agent",
+    )
+    state = types.State(
+        traffic={"agent": agent},
+        scenario_id="scenario",
+        scenario_name="scenario",
+        bubbles=[],
+        scene_colors={},
+        scores={},
+        ego_agent_ids=["agent"],
+        position={},
+        speed={},
+        heading={},
+        lane_ids={},
+        frame_time=0.1,
+    )
+    snapshot = types.StateSnapshot(
+        state=state,
+        social_vehicles=types.SocialVehicleArrays(
+            vehicle_ids=["a", "b"],
+            vehicle_types=["car", "bus"],
+            positions=np.array([[0.0, 1.0, 0.0], [5.0, 6.0, 0.0]]),
+            headings=np.array([0.1, 0.2]),
+            speeds=np.array([10.0, 20.0]),
+        ),
+    )
+
+    built = types.build_state(snapshot)
+    assert built.traffic["agent"] == agent
+    assert built.traffic["b"] == types.TrafficActorState(
+        actor_type=types.TrafficActorType.SocialVehicle,
+        vehicle_type="bus",
+        position=(5.0, 6.0, 0.0),
+        heading=0.2,
+        speed=20.0,
+    )
+    assert types.build_state(built) is built
+    assert Client._serialize(snapshot) == Client._serialize(built)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_serialize_waypoint_paths(binary):
+    array = np.zeros(3, dtype=WAYPOINT_DTYPE)
+    array["pos"] = [[0, 0], [1, 0], [2, 0]]
+    array["lane_width"] = 3.2
+    path = WaypointPath(array, np.array(["lane_0"] * 3, dtype=object))
+    state = make_state(0.1, {"car": 0.0})
+    actor = state.traffic["car"]._replace(waypoint_paths=[path, path[1:]])
+    state = state._replace(traffic={"car": actor})
+
+    data = Client._serialize(state, binary=binary)
+    waypoint_paths = loads(data)["traffic"]["car"]["waypoint_paths"]
+    assert [len(path) for path in waypoint_paths] == [3, 2]
+    assert waypoint_paths[1][0]["pos"] == [1.0, 0.0]
+    assert waypoint_paths[0][0]["lane_id"] == "lane_0"
+    assert waypoint_paths[0][0]["lane_width"] == pytest.approx(3.2)
@@ -0,0 +1,236 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import json
+
+import msgpack
+import numpy as np
+import pytest
+
+from envision.server import (
+    Frame,
+    FrameBatchEncoder,
+    Frames,
+    FramesMemoryBudget,
+    WebClientRunLoop,
+)
+
+KEYFRAME_INTERVAL = 5
+
+
+def make_frames(count, max_capacity_mb=500, data_size=1000):
+    frames = Frames(max_capacity_mb=max_capacity_mb)
+    for idx in range(count):
+        frames.append(
+            Frame(
+                data="x" * data_size,
+                timestamp=idx * 0.1,
+                keyframe=idx % KEYFRAME_INTERVAL == 0,
+            )
+        )
+    return frames
+
+
+def walk(frames):
+    frame, chain = frames.start_frame, []
+    while frame is not None:
+        chain.append(frame)
+        frame = frame.next_
+    return chain
+
+
+def test_seek_onto_delta_snaps_to_keyframe():
+    frames = make_frames(20)
+
+    # 0.7 lands on the 2nd delta after the keyframe at 0.5
+    frame = frames(0.7)
+    assert frame.keyframe
+    assert frame.timestamp == pytest.approx(0.5)
+
+    frame = frames(1.0)
+    assert frame.keyframe
+    assert frame.timestamp == pytest.approx(1.0)
+
+    # Past the end snaps back from the last (delta) frame
+    assert frames(100).timestamp == pytest.approx(1.5)
+
+
+def test_eviction_keeps_deltas_after_their_keyframe():
+    # ~1KB per frame, capacity for ~30 frames
+    frames = make_frames(200, max_capacity_mb=0.03)
+
+    chain = walk(frames)
+    assert len(chain) < 200
+    assert chain[0].timestamp == 0
+    assert len(chain) == len(frames)
+    assert frames.size == sum(frame.size for frame in chain)
+
+    keyframe_time = None
+    for frame in chain:
+        idx = round(frame.timestamp * 10)
+        if frame.keyframe:
+            keyframe_time = frame.timestamp
+        else:
+            # A delta must directly follow the frames of its own run.
+            assert keyframe_time is not None
+            assert round(keyframe_time * 10) == idx - idx % KEYFRAME_INTERVAL
+
+    # The most recent frames are never evicted
+    assert [round(f.timestamp * 10) for f in chain[-10:]] == list(range(190, 200))
+
+
+def test_eviction_stops_without_complete_runs():
+    frames = Frames(max_capacity_mb=0.001)
+    for idx in range(20):
+        frames.append(Frame(data="x" * 1000, timestamp=idx * 0.1, keyframe=idx == 0))
+
+    # Only the start frame is a keyframe so nothing can be evicted
+    assert len(walk(frames)) == 20
+
+
+def test_eviction_keeps_evenly_spaced_frames():
+    frames = make_frames(2000, max_capacity_mb=0.1)
+    keyframe_times = [frame.timestamp for frame in frames if frame.keyframe]
+
+    # Leave out the always kept start and most recent frames
+    gaps = np.diff(keyframe_times[1:-3])
+    assert gaps.max() <= 2 * gaps.min() + 1e-6
+
+    # Deterministic
+    other = make_frames(2000, max_capacity_mb=0.1)
+    assert [frame.timestamp for frame in other] == [frame.timestamp for frame in frames]
+
+
+def test_seek_into_evicted_time():
+    for count in (250, 500):  # before and after discarded frames are cleaned up
+        frames = make_frames(count, max_capacity_mb=0.05)
+        kept = list(frames)
+        for timestamp in np.arange(0, 50, 0.37):
+            # The keyframe of the first available frame at or after the timestamp
+            idx = next(
+                (idx for idx, f in enumerate(kept) if f.timestamp >= timestamp),
+                len(kept) - 1,
+            )
+            while not kept[idx].keyframe:
+                idx -= 1
+            assert frames(timestamp) is kept[idx]
+
+
+def test_memory_budget_across_simulations():
+    budget = FramesMemoryBudget(max_capacity_mb=0.04)
+    first = Frames(max_capacity_mb=500, budget=budget)
+    second = Frames(max_capacity_mb=500, budget=budget)
+    for idx in range(200):
+        for frames in (first, second):
+            frames.append(
+                Frame(
+                    data="x" * 1000,
+                    timestamp=idx * 0.1,
+                    keyframe=idx % KEYFRAME_INTERVAL == 0,
+                )
+            )
+
+    assert budget.size * 1e-6 <= 0.04
+    # The budget is shared evenly
+    assert abs(first.size - second.size) <= KEYFRAME_INTERVAL * 1100
+
+    budget.remove(second)
+    assert budget.size == first.size
+    # Stale heap entries are dropped as the frames change size
+    assert len(budget._heap) <= 2 * 1 + 16
+
+
+def test_memory_budget_tracks_frames_capacity():
+    budget = FramesMemoryBudget(max_capacity_mb=500)
+    frames = Frames(max_capacity_mb=0.02, budget=budget)
+    for idx in range(200):
+        frames.append(
+            Frame(
+                data="x" * 1000,
+                timestamp=idx * 0.1,
+                keyframe=idx % KEYFRAME_INTERVAL == 0,
+            )
+        )
+    # Evictions by the frames' own capacity are accounted for
+    assert budget.size == frames.size
+
+
+class FakeWebClient:
+    def __init__(self):
+        self.messages = []
+
+    def write_message(self, message, binary=False):
+        self.messages.append(message)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_batches_are_encoded_once_for_all_viewers(binary):
+    frames = Frames()
+    for idx in range(5):
+        state = {"frame_time": idx * 0.1, "value": idx}
+        data = msgpack.packb(state) if binary else json.dumps(state)
+        frames.append(Frame(data=data, timestamp=idx * 0.1))
+
+    encoder = FrameBatchEncoder()
+    viewers = [FakeWebClient() for _ in range(3)]
+    for viewer in viewers:
+        run_loop = WebClientRunLoop(
+            frames=frames,
+            web_client_handler=viewer,
+            fixed_timestep_sec=0.1,
+            batch_encoder=encoder,
+        )
+        run_loop._push_frames_to_web_client(list(frames))
+
+    assert encoder.misses == 1
+    assert encoder.hits == 2
+    assert all(v.messages[0] == viewers[0].messages[0] for v in viewers)
+
+    message = viewers[0].messages[0]
+    payload = msgpack.unpackb(message) if binary else json.loads(message)
+    assert payload["total_elapsed_time"] == pytest.approx(0.4)
+    for idx, frame in enumerate(payload["frames"]):
+        assert frame["current_elapsed_time"] == pytest.approx(idx * 0.1)
+        state = msgpack.unpackb(frame["state"]) if binary else frame["state"]
+        assert state["value"] == idx
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_batch_cache_ignores_total_elapsed_time(binary):
+    frames = Frames()
+    for idx in range(5):
+        state = {"frame_time": idx * 0.1, "value": idx}
+        data = msgpack.packb(state) if binary else json.dumps(state)
+        frames.append(Frame(data=data, timestamp=idx * 0.1))
+
+    encoder = FrameBatchEncoder(max_cached_mb=500)
+    batch = list(frames)
+    for total_elapsed_time in (0.4, 0.5, 0.6):
+        message, _ = encoder.encode(batch, 0, total_elapsed_time)
+        payload = msgpack.unpackb(message) if binary else json.loads(message)
+        assert payload["total_elapsed_time"] == total_elapsed_time
+        assert len(payload["frames"]) == 5
+    assert (encoder.misses, encoder.hits) == (1, 2)
+
+    # The cached batches are capped in size
+    encoder = FrameBatchEncoder(max_cached_mb=1e-6)
+    encoder.encode(batch, 0, 0.4)
+    assert encoder._cached_bytes == 0 and not encoder._cache
@@ -0,0 +1,202 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from envision.client import Client
+from envision.recording import (
+    RecordingReader,
+    RecordingWriter,
+    convert_jsonl,
+    is_recording,
+)
+from envision.server import RecordingFrames, WebClientRunLoop
+from envision.state_delta import (
+    DELTA,
+    FRAME_TYPE_KEY,
+    KEYFRAME,
+    dumps_binary,
+    to_builtin,
+)
+from envision.tests.test_state_delta import make_state
+from smarts.core.utils.file import unpack
+
+KEYFRAME_INTERVAL = 4
+
+
+def make_message(idx, binary=False):
+    message = {
+        FRAME_TYPE_KEY: KEYFRAME if idx % KEYFRAME_INTERVAL == 0 else DELTA,
+        "frame_time": round(idx * 0.1, 1),
+        "traffic": {"car": {"position": [idx, 0, 0]}},
+    }
+    return dumps_binary(message) if binary else json.dumps(message)
+
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+
+@pytest.fixture
+def recording_path(temp_dir):
+    path = temp_dir / "recording.envr"
+    with RecordingWriter(path, frames_per_chunk=3) as writer:
+        for idx in range(30):
+            writer.write(make_message(idx, binary=idx % 2 == 1))
+    return path
+
+
+def test_round_trip(recording_path):
+    assert is_recording(recording_path)
+    with RecordingReader(recording_path) as reader:
+        assert len(reader) == 30
+        assert reader.start_time == 0
+        assert reader.end_time == pytest.approx(2.9)
+        assert [frame.data for frame in reader] == [
+            make_message(idx, binary=idx % 2 == 1) for idx in range(30)
+        ]
+        # Chunks are cut before keyframes
+        for chunk_idx in range(len(reader._chunks)):
+            first = reader._locations.index((chunk_idx, 0))
+            assert reader.is_keyframe(first)
+
+
+def test_seek_and_window(recording_path):
+    with RecordingReader(recording_path, cached_chunks=1) as reader:
+        # 1.0 is a delta, it depends on the keyframe at 0.8
+        assert reader.timestamp(reader.seek(1.0)) == pytest.approx(0.8)
+        assert [frame.timestamp for frame in reader.window(1.0, 1.3)] == [
+            0.8,
+            0.9,
+            1.0,
+            1.1,
+            1.2,
+            1.3,
+        ]
+        # Past the end snaps to the last keyframe
+        assert reader.timestamp(reader.seek(100)) == pytest.approx(2.8)
+        assert len(reader._chunk_cache) == 1
+
+
+def test_unclosed_recording(recording_path, temp_dir):
+    data = recording_path.read_bytes()
+    with RecordingReader(recording_path) as reader:
+        last_offset, last_length = reader._chunks[-1]
+        frames_before_last_chunk = reader._locations.index((len(reader._chunks) - 1, 0))
+
+    # Without the index and footer, and with the last chunk cut off
+    for end, frames in [
+        (last_offset + last_length, 30),
+        (last_offset + 5, frames_before_last_chunk),
+    ]:
+        path = temp_dir / f"unclosed_{end}.envr"
+        path.write_bytes(data[:end])
+        with RecordingReader(path) as reader:
+            assert [frame.data for frame in reader] == [
+                make_message(idx, binary=idx % 2 == 1) for idx in range(frames)
+            ]
+
+    # A partially written index is ignored
+    path = temp_dir / "partial_index.envr"
+    path.write_bytes(data[: last_offset + last_length + 7])
+    with RecordingReader(path) as reader:
+        assert len(reader) == 30
+
+
+def test_not_a_recording(temp_dir):
+    path = temp_dir / "states.jsonl"
+    path.write_text(make_message(0) + "\n")
+    assert not is_recording(path)
+    with pytest.raises(ValueError):
+        RecordingReader(path)
+
+
+def test_convert_jsonl(temp_dir):
+    jsonl_path = temp_dir / "states.jsonl"
+    with open(jsonl_path, "w") as f:
+        for idx in range(10):
+            f.write(make_message(idx) + "\n")
+
+    output_path = convert_jsonl(jsonl_path, frames_per_chunk=2)
+    assert output_path == temp_dir / "states.envr"
+    assert list(Client._read_messages(output_path)) == list(
+        Client._read_messages(jsonl_path)
+    )
+
+
+def test_client_recording_format(temp_dir):
+    states = [make_state(idx * 0.1, {"a": float(idx)}) for idx in range(10)]
+    for binary in [False, True]:
+        output_dir = temp_dir / str(binary)
+        client = Client(
+            output_dir=output_dir,
+            headless=True,
+            delta_encoding=True,
+            binary=binary,
+            recording_format="envr",
+        )
+        for state in states:
+            client.send(state)
+        client.teardown()
+
+        (path,) = output_dir.glob("*/*.envr")
+        assert list(Client.read_states(path)) == [
+            to_builtin(unpack(state)) for state in states
+        ]
+
+
+def test_recording_frames(recording_path):
+    with RecordingReader(recording_path) as reader:
+        frames = RecordingFrames(reader)
+        assert frames.start_time == 0
+        assert frames.elapsed_time == pytest.approx(2.9)
+
+        frame, count = frames.start_frame, 0
+        while frame is not None:
+            assert frame.keyframe == (count % KEYFRAME_INTERVAL == 0)
+            frame, count = frame.next_, count + 1
+        assert count == 30
+
+        frame = frames(1.0)
+        assert frame.keyframe
+        assert frame.timestamp == pytest.approx(0.8)
+        assert frame.data == make_message(8)
+
+
+def test_run_loop_buffers_ahead_of_playback(recording_path):
+    with RecordingReader(recording_path) as reader:
+        frames = RecordingFrames(reader)
+        run_loop = WebClientRunLoop(
+            frames=frames,
+            web_client_handler=None,
+            fixed_timestep_sec=0.1,
+            max_buffer_ahead_sec=0.5,
+        )
+        run_loop._playback_origin = (0, time.time())
+        _, frames_to_send = run_loop._wait_for_next_frame(frames.start_frame)
+        assert 5 <= len(frames_to_send) < 10
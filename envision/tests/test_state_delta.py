@@ -0,0 +1,168 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from envision import types
+from envision.client import Client
+from envision.state_delta import (
+    DELTA,
+    FRAME_TYPE_KEY,
+    KEYFRAME,
+    StateDeltaDecoder,
+    StateDeltaEncoder,
+    dumps_binary,
+    loads,
+    peek,
+    to_builtin,
+)
+from smarts.core.utils.file import unpack
+
+
+def make_state(frame_time, positions, scenario_id="scenario"):
+    traffic = {
+        vehicle_id: types.TrafficActorState(
+            actor_type=types.TrafficActorType.SocialVehicle,
+            vehicle_type=types.VehicleType.Car,
+            position=np.array([x, 0.0, 0.0]),
+            heading=0.0,
+            speed=10.0,
+        )
+        for vehicle_id, x in positions.items()
+    }
+    return types.State(
+        traffic=traffic,
+        scenario_id=scenario_id,
+        scenario_name="scenario",
+        bubbles=[],
+        scene_colors={},
+        scores={},
+        ego_agent_ids=[],
+        position={},
+        speed={},
+        heading={},
+        lane_ids={},
+        frame_time=frame_time,
+    )
+
+
+@pytest.fixture
+def states():
+    return [
+        make_state(0.1, {"a": 0.0, "b": 5.0}),
+        make_state(0.2, {"a": 1.0, "b": 5.0}),
+        make_state(0.3, {"a": 2.0, "c": 9.0}),
+        make_state(0.4, {"a": 3.0, "c": 9.0}),
+        make_state(0.5, {"a": 3.0}, scenario_id="other"),
+    ]
+
+
+def test_delta_only_carries_changes(states):
+    encoder = StateDeltaEncoder(keyframe_interval=10)
+    messages = [encoder.encode(state) for state in states]
+
+    assert [m[FRAME_TYPE_KEY] for m in messages] == [
+        KEYFRAME,
+        DELTA,
+        DELTA,
+        DELTA,
+        KEYFRAME,  # the scenario changed
+    ]
+    assert messages[1]["traffic"] == {"a": {"position": [1.0, 0.0, 0.0]}}
+    assert "removed_traffic" not in messages[1]
+    assert set(messages[2]["traffic"]) == {"a", "c"}
+    assert messages[2]["removed_traffic"] == ["b"]
+
+
+def test_keyframe_interval(states):
+    encoder = StateDeltaEncoder(keyframe_interval=2)
+    messages = [encoder.encode(state) for state in states[:4]]
+    assert [m[FRAME_TYPE_KEY] for m in messages] == [KEYFRAME, DELTA, DELTA, KEYFRAME]
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_round_trip(states, binary):
+    encoder = StateDeltaEncoder(keyframe_interval=3)
+    decoder = StateDeltaDecoder()
+    for state in states:
+        message = encoder.encode(state)
+        data = dumps_binary(message) if binary else json.dumps(message)
+        assert peek(data)["frame_time"] == state.frame_time
+        assert decoder.decode(data) == to_builtin(unpack(state))
+
+
+def test_delta_requires_keyframe(states):
+    encoder = StateDeltaEncoder()
+    encoder.encode(states[0])
+    delta = encoder.encode(states[1])
+
+    with pytest.raises(ValueError):
+        StateDeltaDecoder().decode(delta)
+
+
+def test_full_state_is_a_keyframe(states):
+    full_state = json.dumps(to_builtin(unpack(states[0])))
+    assert FRAME_TYPE_KEY not in peek(full_state)
+    assert StateDeltaDecoder().decode(full_state) == loads(full_state)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_client_serialize(states, binary):
+    for encoder in [None, StateDeltaEncoder()]:
+        data = Client._serialize(states[0], encoder=encoder, binary=binary)
+        assert isinstance(data, bytes if binary else str)
+        assert peek(data)["frame_time"] == states[0].frame_time
+        assert StateDeltaDecoder().decode(data) == to_builtin(unpack(states[0]))
+
+    # Already serialized data is passed through
+    assert Client._serialize("{}", binary=binary) == "{}"
+
+
+def test_client_rejects_keyframe_interval():
+    with pytest.raises(ValueError):
+        Client(headless=True, delta_encoding=True, keyframe_interval=0)
+
+
+def test_client_recording_round_trip(states):
+    with tempfile.TemporaryDirectory() as output_dir:
+        client = Client(
+            output_dir=output_dir,
+            headless=True,
+            delta_encoding=True,
+            keyframe_interval=2,
+        )
+        for state in states:
+            client.send(state)
+        client.teardown()
+
+        (path,) = Path(output_dir).glob("*/*.jsonl")
+        with open(path, "r") as f:
+            frame_types = [json.loads(line)[FRAME_TYPE_KEY] for line in f]
+        assert frame_types == [KEYFRAME, DELTA, DELTA, KEYFRAME, KEYFRAME]
+
+        assert list(Client.read_states(path)) == [
+            to_builtin(unpack(state)) for state in states
+        ]
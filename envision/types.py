@@ -20,6 +20,8 @@
 from enum import Enum
 from typing import Dict, NamedTuple, Optional, Sequence, Tuple, Union
 
+import numpy as np
+
 from smarts.core.events import Events
 
 
@@ -76,6 +78,53 @@ class State(NamedTuple):
     frame_time: float
 
 
+class SocialVehicleArrays(NamedTuple):
+    """The raw per-vehicle arrays of all social vehicles in a frame."""
+
+    vehicle_ids: Sequence[str]
+    vehicle_types: Sequence[Union[VehicleType, str]]
+    # shape (N, 3)
+    positions: np.ndarray
+    # shape (N,)
+    headings: np.ndarray
+    # shape (N,)
+    speeds: np.ndarray
+
+
+class StateSnapshot(NamedTuple):
+    """A lightweight snapshot of a frame. The `state.traffic` only holds the agent
+    actors, social vehicles are kept as raw arrays until `build_state` is called.
+    This lets the simulation hand off a frame without building an object per vehicle.
+    """
+
+    state: State
+    social_vehicles: SocialVehicleArrays
+
+
+def build_state(snapshot: Union[State, StateSnapshot]) -> State:
+    """Expand a `StateSnapshot` into a full `State`. A `State` is returned unchanged."""
+    if not isinstance(snapshot, StateSnapshot):
+        return snapshot
+
+    social_vehicles = snapshot.social_vehicles
+    traffic = dict(snapshot.state.traffic)
+    for vehicle_id, vehicle_type, position, heading, speed in zip(
+        social_vehicles.vehicle_ids,
+        social_vehicles.vehicle_types,
+        np.asarray(social_vehicles.positions).tolist(),
+        np.asarray(social_vehicles.headings).tolist(),
+        np.asarray(social_vehicles.speeds).tolist(),
+    ):
+        traffic[vehicle_id] = TrafficActorState(
+            actor_type=TrafficActorType.SocialVehicle,
+            vehicle_type=vehicle_type,
+            position=tuple(position),
+            heading=heading,
+            speed=speed,
+        )
+    return snapshot.state._replace(traffic=traffic)
+
+
 def format_actor_id(actor_id: str, vehicle_id: str, is_multi: bool):
     """A conversion utility to ensure that an actor id conforms to envision's actor id standard.
     Args:
@@ -40,8 +40,8 @@ class SharedCounter(object):
     http://eli.thegreenplace.net/2012/01/04/shared-counter-with-pythons-multiprocessing/
     """
 
-    def __init__(self, n=0):
-        self.count = multiprocessing.Value("i", n)
+    def __init__(self, n=0, ctx=None):
+        self.count = (ctx or multiprocessing).Value("i", n)
 
     def increment(self, n=1):
         """ Increment the counter by n (default = 1) """
@@ -66,17 +66,34 @@ class Queue(multiprocessing.queues.Queue):
     qsize() and empty().
     """
 
-    def __init__(self, *args, **kwargs):
-        super(Queue, self).__init__(*args, **kwargs)
-        self.size = SharedCounter(0)
+    def __init__(self, maxsize=0, *, ctx=None):
+        ctx = ctx or multiprocessing.get_context()
+        super(Queue, self).__init__(maxsize, ctx=ctx)
+        self.size = SharedCounter(0, ctx=ctx)
+
+    def __getstate__(self):
+        # The base class only pickles its own state, `size` has to be sent along so
+        # that spawned processes share the counter.
+        return (super(Queue, self).__getstate__(), self.size)
+
+    def __setstate__(self, state):
+        state, self.size = state
+        super(Queue, self).__setstate__(state)
 
     def put(self, *args, **kwargs):
         self.size.increment(1)
-        super(Queue, self).put(*args, **kwargs)
+        try:
+            super(Queue, self).put(*args, **kwargs)
+        except Exception:
+            self.size.increment(-1)
+            raise
 
     def get(self, *args, **kwargs):
+        # Only count the item once it has been taken so a blocked `get()` does not
+        # show up as a negative size.
+        item = super(Queue, self).get(*args, **kwargs)
         self.size.increment(-1)
-        return super(Queue, self).get(*args, **kwargs)
+        return item
 
     def qsize(self):
         """ Reliable implementation of multiprocessing.Queue.qsize() """
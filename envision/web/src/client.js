@@ -17,10 +17,23 @@
 // LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 // OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 // THE SOFTWARE.
+import decode from "./helpers/msgpack";
+import applyStateDelta from "./helpers/state_delta";
+
 const wait = (ms) => {
   return new Promise((resolve) => setTimeout(resolve, ms));
 };
 
+// The python side encodes non-finite floats as strings
+const parseNonFinite = (_, value) =>
+  value === "NaN"
+    ? NaN
+    : value === "Infinity"
+    ? Infinity
+    : value === "-Infinity"
+    ? -Infinity
+    : value;
+
 const frameBufferModes = {
   NO_BIAS: 0, // randomly evict frames when buffer full
   PRIMACY_BIAS: 1, // prefer evicting more recent frames
@@ -48,6 +61,7 @@ export default class Client {
 
     this._sockets = {};
     this._stateQueues = {};
+    this._lastStates = {};
     this._simulationSelectedTime = {};
   }
 
@@ -88,6 +102,7 @@ export default class Client {
     try {
       return await new Promise((resolve, reject) => {
         let socket = new WebSocket(url);
+        socket.binaryType = "arraybuffer";
         socket.onopen = (event) => {
           console.debug("Socket connected!");
           resolve(socket);
@@ -98,17 +113,29 @@ export default class Client {
         };
 
         socket.onmessage = (event) => {
-          let frames = JSON.parse(event.data);
+          let payload =
+            event.data instanceof ArrayBuffer
+              ? decode(new Uint8Array(event.data))
+              : JSON.parse(event.data, parseNonFinite);
+          // A batch of frames is either `{total_elapsed_time, frames}`, shared by
+          // all viewers, or a list of frames that each carry the total time.
+          let frames = Array.isArray(payload) ? payload : payload.frames;
           for (const frame of frames) {
-            let state = JSON.parse(frame.state, (_, value) =>
-              value === "NaN"
-                ? Nan
-                : value === "Infinity"
-                ? Infinity
-                : value === "-Infinity"
-                ? -Infinity
-                : value
-            );
+            if (!Array.isArray(payload)) {
+              frame.total_elapsed_time = payload.total_elapsed_time;
+            }
+            let message =
+              typeof frame.state === "string"
+                ? JSON.parse(frame.state, parseNonFinite)
+                : frame.state instanceof Uint8Array
+                ? decode(frame.state)
+                : frame.state;
+            let state = applyStateDelta(self._lastStates[simulationId], message);
+            if (state === null) {
+              // a delta without the keyframe it applies to, wait for the next one
+              continue;
+            }
+            self._lastStates[simulationId] = state;
             if (
               stateQueue.length > 0 &&
               frame.current_elapsed_time <=
@@ -0,0 +1,124 @@
+// MIT License
+//
+// Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in
+// all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+// THE SOFTWARE.
+
+// A minimal MessagePack (https://msgpack.org) decoder covering the types written
+// by `envision/state_delta.py` and `envision/server.py`. Binary values are
+// returned as `Uint8Array` views so nested messages can be decoded in turn.
+const textDecoder = new TextDecoder("utf-8");
+
+export default function decode(bytes) {
+  let view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  let offset = 0;
+
+  const str = (length) => {
+    let value = textDecoder.decode(bytes.subarray(offset, offset + length));
+    offset += length;
+    return value;
+  };
+  const bin = (length) => {
+    let value = bytes.subarray(offset, offset + length);
+    offset += length;
+    return value;
+  };
+  const array = (length) => {
+    let value = new Array(length);
+    for (let i = 0; i < length; i++) {
+      value[i] = next();
+    }
+    return value;
+  };
+  const map = (length) => {
+    let value = {};
+    for (let i = 0; i < length; i++) {
+      let key = next();
+      value[key] = next();
+    }
+    return value;
+  };
+  const read = (getter, size) => {
+    let value = view[getter](offset);
+    offset += size;
+    return value;
+  };
+
+  const next = () => {
+    let type = read("getUint8", 1);
+    if (type <= 0x7f) return type; // positive fixint
+    if (type <= 0x8f) return map(type & 0x0f);
+    if (type <= 0x9f) return array(type & 0x0f);
+    if (type <= 0xbf) return str(type & 0x1f);
+    if (type >= 0xe0) return type - 0x100; // negative fixint
+
+    switch (type) {
+      case 0xc0:
+        return null;
+      case 0xc2:
+        return false;
+      case 0xc3:
+        return true;
+      case 0xc4:
+        return bin(read("getUint8", 1));
+      case 0xc5:
+        return bin(read("getUint16", 2));
+      case 0xc6:
+        return bin(read("getUint32", 4));
+      case 0xca:
+        return read("getFloat32", 4);
+      case 0xcb:
+        return read("getFloat64", 8);
+      case 0xcc:
+        return read("getUint8", 1);
+      case 0xcd:
+        return read("getUint16", 2);
+      case 0xce:
+        return read("getUint32", 4);
+      case 0xcf:
+        return Number(read("getBigUint64", 8));
+      case 0xd0:
+        return read("getInt8", 1);
+      case 0xd1:
+        return read("getInt16", 2);
+      case 0xd2:
+        return read("getInt32", 4);
+      case 0xd3:
+        return Number(read("getBigInt64", 8));
+      case 0xd9:
+        return str(read("getUint8", 1));
+      case 0xda:
+        return str(read("getUint16", 2));
+      case 0xdb:
+        return str(read("getUint32", 4));
+      case 0xdc:
+        return array(read("getUint16", 2));
+      case 0xdd:
+        return array(read("getUint32", 4));
+      case 0xde:
+        return map(read("getUint16", 2));
+      case 0xdf:
+        return map(read("getUint32", 4));
+      default:
+        throw new Error(`Unsupported MessagePack type 0x${type.toString(16)}`);
+    }
+  };
+
+  return next();
+}
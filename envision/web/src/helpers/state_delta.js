@@ -0,0 +1,64 @@
+// MIT License
+//
+// Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in
+// all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+// THE SOFTWARE.
+
+// Mirrors `envision/state_delta.py`
+const FRAME_TYPE_KEY = "frame_type";
+const KEYFRAME = "keyframe";
+const REMOVED_TRAFFIC_KEY = "removed_traffic";
+
+// Rebuild a complete state from a keyframe or from a delta applied to the
+// previous complete state. Returns null if a delta arrives without a base state.
+export default function applyStateDelta(base, message) {
+  let frameType = message[FRAME_TYPE_KEY] || KEYFRAME;
+  if (frameType == KEYFRAME) {
+    let state = { ...message };
+    delete state[FRAME_TYPE_KEY];
+    return state;
+  }
+
+  if (!base) {
+    return null;
+  }
+
+  let state = { ...base };
+  let traffic = { ...(base.traffic || {}) };
+  for (const [key, value] of Object.entries(message)) {
+    if (
+      key == FRAME_TYPE_KEY ||
+      key == REMOVED_TRAFFIC_KEY ||
+      key == "traffic"
+    ) {
+      continue;
+    }
+    state[key] = value;
+  }
+
+  for (const actorId of message[REMOVED_TRAFFIC_KEY] || []) {
+    delete traffic[actorId];
+  }
+  for (const [actorId, fields] of Object.entries(message.traffic || {})) {
+    traffic[actorId] = { ...(traffic[actorId] || {}), ...fields };
+  }
+
+  state.traffic = traffic;
+  return state;
+}
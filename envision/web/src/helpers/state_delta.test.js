@@ -0,0 +1,97 @@
+// MIT License
+//
+// Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in
+// all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+// THE SOFTWARE.
+import assert from "node:assert";
+import test from "node:test";
+
+import decode from "./msgpack.js";
+import applyStateDelta from "./state_delta.js";
+
+const keyframe = {
+  frame_type: "keyframe",
+  frame_time: 0.1,
+  scenario_id: "scenario",
+  traffic: {
+    a: { position: [0, 0, 0], speed: 10 },
+    b: { position: [5, 0, 0], speed: 10 },
+  },
+};
+
+test("keyframe is a complete state", () => {
+  let state = applyStateDelta(null, keyframe);
+  assert.strictEqual(state.frame_type, undefined);
+  assert.deepStrictEqual(state.traffic, keyframe.traffic);
+});
+
+test("state without frame type is a keyframe", () => {
+  let state = applyStateDelta(null, { frame_time: 0.1, traffic: {} });
+  assert.deepStrictEqual(state, { frame_time: 0.1, traffic: {} });
+});
+
+test("delta updates, adds and removes actors", () => {
+  let base = applyStateDelta(null, keyframe);
+  let state = applyStateDelta(base, {
+    frame_type: "delta",
+    frame_time: 0.2,
+    traffic: { a: { position: [1, 0, 0] }, c: { position: [9, 0, 0], speed: 5 } },
+    removed_traffic: ["b"],
+  });
+
+  assert.strictEqual(state.frame_time, 0.2);
+  assert.strictEqual(state.scenario_id, "scenario");
+  assert.deepStrictEqual(state.traffic, {
+    a: { position: [1, 0, 0], speed: 10 },
+    c: { position: [9, 0, 0], speed: 5 },
+  });
+  // The base state is left untouched
+  assert.deepStrictEqual(base.traffic, keyframe.traffic);
+});
+
+test("delta without base state is dropped", () => {
+  assert.strictEqual(
+    applyStateDelta(null, { frame_type: "delta", frame_time: 0.2 }),
+    null
+  );
+});
+
+test("msgpack decode", () => {
+  // Generated with `msgpack.packb(message, use_bin_type=True)` in python
+  const hex =
+    "89aa6672616d655f74797065a564656c7461aa6672616d655f74696d65cb3fc999999999999a" +
+    "a77472616666696381a16181a8706f736974696f6e96cb3ff0000000000000fecd012cce0001" +
+    "1170d2ffff63c0cf0000010000000000af72656d6f7665645f7472616666696391a162a4666c" +
+    "6167c3a46e6f6e65c0a173d9287878787878787878787878787878787878787878787878787878" +
+    "7878787878787878787878787878a362696ec4020102a3663332cb3fe0000000000000";
+  let bytes = new Uint8Array(hex.match(/../g).map((byte) => parseInt(byte, 16)));
+
+  let message = decode(bytes);
+  assert.deepStrictEqual(message.traffic, {
+    a: { position: [1, -2, 300, 70000, -40000, 2 ** 40] },
+  });
+  assert.strictEqual(message.frame_type, "delta");
+  assert.strictEqual(message.frame_time, 0.2);
+  assert.deepStrictEqual(message.removed_traffic, ["b"]);
+  assert.strictEqual(message.flag, true);
+  assert.strictEqual(message.none, null);
+  assert.strictEqual(message.s, "x".repeat(40));
+  assert.deepStrictEqual(Array.from(message.bin), [1, 2]);
+  assert.strictEqual(message.f32, 0.5);
+});
@@ -4,6 +4,7 @@ import numpy as np
 
 from smarts.core.chassis import BoxChassis
 from smarts.core.coordinates import Heading, Pose
+from smarts.core.provider import ProviderState
 from smarts.core.scenario import Scenario
 from smarts.core.sumo_traffic_simulation import SumoTrafficSimulation
 from smarts.core.utils import pybullet
@@ -96,7 +97,9 @@ def run(
                 speed=0,
                 source="TESTS",
             )
-            current_provider_state.vehicles.append(converted_to_provider)
+            current_provider_state.merge(
+                ProviderState.from_vehicle_states([converted_to_provider])
+            )
         traffic_sim.sync(current_provider_state)
 
         current_vehicle_ids = {v.vehicle_id for v in current_provider_state.vehicles}
@@ -43,6 +43,7 @@ setup(
         # The following is for both SS and Envision
         "cloudpickle>=1.3.0,<1.4.0",
         # The following are for /envision
+        "msgpack>=1.0.0",
         "tornado>=6.1",
         "websocket-client>=1.2.1",
         # The following is used for imitation learning and envision
@@ -276,6 +276,15 @@ class AgentInterface:
     Enable acceleration and jerk observations.
     """
 
+    compact_observations: bool = False
+    """
+    Provide the neighborhood vehicle states as numpy arrays
+    (`smarts.core.sensors.VehicleObservations`) from which `VehicleObservation`
+    objects are only created when accessed. Waypoint paths on SUMO maps are always
+    array backed (`smarts.core.road_map.WaypointPath`). `FormatObs` copies the arrays
+    directly into its fixed-shape observations.
+    """
+
     def __post_init__(self):
         self.neighborhood_vehicles = AgentInterface._resolve_config(
             self.neighborhood_vehicles, NeighborhoodVehicles
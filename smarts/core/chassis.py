@@ -21,11 +21,10 @@ import importlib.resources as pkg_resources
 import logging
 import math
 import os
-from typing import Optional, Sequence, Tuple
+from typing import NamedTuple, Optional, Sequence, Tuple
 
 import numpy as np
 import yaml
-from cached_property import cached_property
 from shapely.affinity import rotate as shapely_rotate
 from shapely.geometry import Polygon
 from shapely.geometry import box as shapely_box
@@ -57,6 +56,16 @@ with open(controller_filepath, "r") as controller_file:
     DEFAULT_CONTROLLER_PARAMETERS = yaml.safe_load(controller_file)["sedan"]
 
 
+class _BulletState(NamedTuple):
+    """The per-step physics state read back from bullet for an `AckermannChassis`."""
+
+    position: np.ndarray
+    orientation: np.ndarray
+    linear_velocity: np.ndarray
+    angular_velocity: np.ndarray
+    steering: float
+
+
 def _query_bullet_contact_points(bullet_client, bullet_id, link_index):
     contact_objects = set()
 
@@ -91,6 +100,12 @@ class Chassis:
         """Re-apply the last given control given to the chassis."""
         raise NotImplementedError
 
+    def settle(self):
+        """Place the chassis body where its last control is taking it without stepping
+        the physics.
+        """
+        raise NotImplementedError
+
     def teardown(self):
         """Clean up resources."""
         raise NotImplementedError
@@ -220,6 +235,9 @@ class BoxChassis(Chassis):
         # no need to do anything here since we're not applying forces
         pass
 
+    def settle(self):
+        self._bullet_constraint.snap_to_target()
+
     def state_override(
         self,
         dt: float,
@@ -366,6 +384,11 @@ class AckermannChassis(Chassis):
         self._friction_map = friction_map
         self._tire_parameters = None
         self._road_wheel_frictions = None
+        # Values derived from the bullet state are cached for as long as
+        # `_state_generation` stays the same as `_step_cache_generation`.
+        self._state_generation = 0
+        self._step_cache_generation = 0
+        self._step_cache = {}
 
         self._bullet_id = self._client.loadURDF(
             vehicle_filepath,
@@ -438,6 +461,10 @@ class AckermannChassis(Chassis):
         )
 
         self._joints = self._load_joints(self._bullet_id)
+        self._steer_joint_indices = [
+            self._joints[name].index
+            for name in ["front_left_steer_joint", "front_right_steer_joint"]
+        ]
 
         # 2,4,5,6 are the indices of wheels (FL,FR,RL,RR) and 1,3 are the
         # indices for front left and front right steer joints, 0 is
@@ -474,31 +501,96 @@ class AckermannChassis(Chassis):
         if initial_speed is not None:
             self._initialize_speed(initial_speed)
 
-    @cached_property
-    def _cached_props(self):
-        return {
-            a
-            for a, v in self.__class__.__dict__.items()
-            if isinstance(v, cached_property)
-        }
-
     def _clear_step_cache(self):
-        cached_props = self._cached_props
-        self.__dict__ = {
-            a: v
-            for a, v in self.__dict__.items()
-            if a not in cached_props or a == "_cached_props"
-        }
-
-    @cached_property
-    def pose(self) -> Pose:
+        self._state_generation += 1
+
+    def _step_cached(self, name, compute):
+        if self._step_cache_generation != self._state_generation:
+            self._step_cache = {}
+            self._step_cache_generation = self._state_generation
+        try:
+            return self._step_cache[name]
+        except KeyError:
+            value = self._step_cache[name] = compute()
+            return value
+
+    @staticmethod
+    def read_bullet_states(chassis: Sequence["AckermannChassis"]):
+        """Read the base pose, base velocity and steer joint positions of all the given
+        chassis in a single pass and keep them until each chassis next changes. This
+        should be called once after stepping the physics so that the chassis
+        properties read during the rest of the step do not query bullet again.
+        """
+        count = len(chassis)
+        positions = np.empty((count, 3))
+        orientations = np.empty((count, 4))
+        linear_velocities = np.empty((count, 3))
+        angular_velocities = np.empty((count, 3))
+        steerings = np.empty(count)
+        for i, c in enumerate(chassis):
+            client, bullet_id = c._client, c._bullet_id
+            positions[i], orientations[i] = client.getBasePositionAndOrientation(
+                bullet_id
+            )
+            linear_velocities[i], angular_velocities[i] = client.getBaseVelocity(
+                bullet_id
+            )
+            steerings[i] = np.mean(
+                [s[0] for s in client.getJointStates(bullet_id, c._steer_joint_indices)]
+            )
+        # Convert to clockwise rotation to be consistent with our action
+        #    space where 1 is a right turn and -1 is a left turn.
+        steerings = -steerings
+        for i, c in enumerate(chassis):
+            c._step_cache = {
+                "bullet_state": _BulletState(
+                    position=positions[i],
+                    orientation=orientations[i],
+                    linear_velocity=linear_velocities[i],
+                    angular_velocity=angular_velocities[i],
+                    steering=steerings[i],
+                )
+            }
+            c._step_cache_generation = c._state_generation
+
+    def _bullet_state(self) -> _BulletState:
+        return self._step_cached("bullet_state", self._read_bullet_state)
+
+    def _read_bullet_state(self) -> _BulletState:
         pos, orn = self._client.getBasePositionAndOrientation(self._bullet_id)
-        heading = Heading(yaw_from_quaternion(orn))
+        linear_velocity, angular_velocity = self._client.getBaseVelocity(
+            self._bullet_id
+        )
+        steering_radians = np.mean(
+            [
+                s[0]
+                for s in self._client.getJointStates(
+                    self._bullet_id, self._steer_joint_indices
+                )
+            ]
+        )
+        return _BulletState(
+            position=np.array(pos),
+            orientation=np.array(orn),
+            linear_velocity=np.array(linear_velocity),
+            angular_velocity=np.array(angular_velocity),
+            # Convert to clockwise rotation to be consistent with our action
+            #    space where 1 is a right turn and -1 is a left turn.
+            steering=-steering_radians,
+        )
+
+    @property
+    def pose(self) -> Pose:
+        return self._step_cached("pose", self._pose_from_bullet_state)
+
+    def _pose_from_bullet_state(self) -> Pose:
+        state = self._bullet_state()
+        heading = Heading(yaw_from_quaternion(state.orientation))
         # NOTE: we're inefficiently creating a new Pose object on every call here,
         # but it's too risky to change this because our clients now rely on this behavior.
         return Pose.from_explicit_offset(
             [0, 0, 0],
-            np.array(pos),
+            np.array(state.position),
             heading,
             local_heading=Heading(0),
         )
@@ -510,35 +602,28 @@ class AckermannChassis(Chassis):
         )
         self._clear_step_cache()
 
-    @cached_property
+    @property
     def steering(self):
         """Current steering value in radians."""
-        steering_radians = np.mean(
-            [
-                joint.position
-                for joint in self._joint_states(
-                    ["front_left_steer_joint", "front_right_steer_joint"]
-                )
-            ]
-        )
-        # Convert to clockwise rotation to be consistent with our action
-        #    space where 1 is a right turn and -1 is a left turn. We'd expect
-        #    an action with a positive steering activation to result in
+        # We'd expect an action with a positive steering activation to result in
         #    positive steering values read back from the vehicle.
-        return -steering_radians
+        return self._bullet_state().steering
 
     @property
     def speed(self) -> float:
         """Returns speed in m/s."""
-        velocity, _ = np.array(self._client.getBaseVelocity(self._bullet_id))
+        velocity = self._bullet_state().linear_velocity
         return math.sqrt(velocity.dot(velocity))
 
-    @cached_property
+    @property
     def velocity_vectors(self):
-        linear_velocity, angular_velocity = np.array(
-            self._client.getBaseVelocity(self._bullet_id)
+        return self._step_cached(
+            "velocity_vectors",
+            lambda: (
+                np.array(self.longitudinal_lateral_speed + (0,)),
+                self._bullet_state().angular_velocity,
+            ),
         )
-        return (np.array(self.longitudinal_lateral_speed + (0,)), angular_velocity)
 
     @speed.setter
     def speed(self, speed: Optional[float] = None):
@@ -549,16 +634,23 @@ class AckermannChassis(Chassis):
         elif self.speed > speed:
             self.control(throttle=1)
 
-    @cached_property
+    @property
     def yaw_rate(self) -> float:
         """Returns 2-D rotational speed in rad/sec."""
-        _, velocity_rotational = np.array(self._client.getBaseVelocity(self._bullet_id))
-        return vec_to_radians(velocity_rotational[:2])
+        return self._step_cached(
+            "yaw_rate",
+            lambda: vec_to_radians(self._bullet_state().angular_velocity[:2]),
+        )
 
-    @cached_property
+    @property
     def longitudinal_lateral_speed(self):
         """Returns speed in m/s."""
-        velocity, _ = np.array(self._client.getBaseVelocity(self._bullet_id))
+        return self._step_cached(
+            "longitudinal_lateral_speed", self._longitudinal_lateral_speed
+        )
+
+    def _longitudinal_lateral_speed(self):
+        velocity = self._bullet_state().linear_velocity
         heading = self.pose.heading
         return (
             (velocity[1] * math.cos(heading) - velocity[0] * math.sin(heading)),
@@ -581,8 +673,11 @@ class AckermannChassis(Chassis):
         """This is the scientifically discovered maximum speed of this vehicle model"""
         return 95
 
-    @cached_property
+    @property
     def contact_points(self):
+        return self._step_cached("contact_points", self._contact_points)
+
+    def _contact_points(self):
         ## 0 is the chassis link index (which means ground won't be included)
         contact_points = _query_bullet_contact_points(self._client, self._bullet_id, 0)
         return [
@@ -590,12 +685,15 @@ class AckermannChassis(Chassis):
             for p in contact_points
         ]
 
-    @cached_property
+    @property
     def mass_and_inertia(self):
         """The mass and inertia values of this chassis."""
-        return (
-            self._client.getDynamicsInfo(self._bullet_id, 0)[0],
-            self._client.getDynamicsInfo(self._bullet_id, 0)[2][2],
+        return self._step_cached(
+            "mass_and_inertia",
+            lambda: (
+                self._client.getDynamicsInfo(self._bullet_id, 0)[0],
+                self._client.getDynamicsInfo(self._bullet_id, 0)[2][2],
+            ),
         )
 
     @property
@@ -669,6 +767,7 @@ class AckermannChassis(Chassis):
         self.speed = speed
         velocity = radians_to_vec(self.pose.heading) * speed
         self._client.resetBaseVelocity(self._bullet_id, [*velocity, 0])
+        self._clear_step_cache()
 
     def teardown(self):
         self._client.removeBody(self._bullet_id)
@@ -19,6 +19,7 @@
 # THE SOFTWARE.
 from enum import Enum
 from functools import partial
+from typing import Any, Sequence, Tuple
 
 import numpy as np
 
@@ -151,6 +152,87 @@ class Controllers:
                 "inside controller"
             )
 
+    @staticmethod
+    def perform_actions(
+        sim,
+        action_space,
+        controls: Sequence[Tuple[str, Any, Any, Any, Any, str]],
+    ):
+        """Calls control for all of the given vehicles which share an action space. The
+        `Continuous`, `ActuatorDynamic`, `Trajectory`, `MPC` and `Imitation` action
+        spaces are performed on arrays over all of the vehicles. Other action spaces
+        fall back to `perform_action` for each vehicle.
+        Args:
+            sim:
+                A simulation instance.
+            action_space:
+                The action space of all of the provided actions.
+            controls:
+                The `(agent_id, vehicle, action, controller_state, sensor_state,
+                vehicle_type)` of each vehicle to control, as for `perform_action`.
+        """
+        controls = [control for control in controls if control[2] is not None]
+        if not controls:
+            return
+        if action_space not in _BATCHED_ACTION_SPACES:
+            for (
+                agent_id,
+                vehicle,
+                action,
+                controller_state,
+                sensor_state,
+                vehicle_type,
+            ) in controls:
+                Controllers.perform_action(
+                    sim,
+                    agent_id,
+                    vehicle,
+                    action,
+                    controller_state,
+                    sensor_state,
+                    action_space,
+                    vehicle_type,
+                )
+            return
+
+        _, vehicles, actions, controller_states, _, vehicle_types = zip(*controls)
+        if "bus" in vehicle_types:
+            assert action_space == ActionSpaceType.Trajectory
+        if action_space == ActionSpaceType.Continuous:
+            actions = np.asarray(actions, dtype=float)
+            throttles = np.clip(actions[:, 0], 0.0, 1.0)
+            brakes = np.clip(actions[:, 1], 0.0, 1.0)
+            steerings = np.clip(actions[:, 2], -1, 1)
+            for vehicle, throttle, brake, steering in zip(
+                vehicles, throttles, brakes, steerings
+            ):
+                vehicle.control(throttle=throttle, brake=brake, steering=steering)
+        elif action_space == ActionSpaceType.ActuatorDynamic:
+            ActuatorDynamicController.perform_actions(
+                vehicles, actions, controller_states, dt_sec=sim.last_dt
+            )
+        elif action_space == ActionSpaceType.Trajectory:
+            TrajectoryTrackingController.perform_trajectory_tracking_PD_batch(
+                actions, vehicles, controller_states, dt_sec=sim.last_dt
+            )
+        elif action_space == ActionSpaceType.MPC:
+            TrajectoryTrackingController.perform_trajectory_tracking_MPC_batch(
+                actions, vehicles, controller_states, sim.last_dt
+            )
+        elif action_space == ActionSpaceType.Imitation:
+            ImitationController.perform_actions(sim.last_dt, vehicles, actions)
+
+
+_BATCHED_ACTION_SPACES = frozenset(
+    {
+        ActionSpaceType.Continuous,
+        ActionSpaceType.ActuatorDynamic,
+        ActionSpaceType.Trajectory,
+        ActionSpaceType.MPC,
+        ActionSpaceType.Imitation,
+    }
+)
+
 
 class ControllerOutOfLaneException(Exception):
     """Represents an error due to a vehicle straying too far from any available lane."""
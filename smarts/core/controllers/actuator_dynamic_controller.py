@@ -78,3 +78,27 @@ class ActuatorDynamicController:
         )
 
         state.last_steering_angle = steering
+
+    @classmethod
+    def perform_actions(cls, vehicles, actions, states, dt_sec):
+        """Perform `perform_action` for several vehicles at once."""
+        if not vehicles:
+            return
+        actions = np.asarray(actions, dtype=float)
+        last_steering_angles = np.array([state.last_steering_angle for state in states])
+        throttles = np.clip(actions[:, 0], 0.0, 1.0)
+        brakes = np.clip(actions[:, 1], 0.0, 1.0)
+        clipped_steering_changes = np.clip(actions[:, 2], -1, 1)
+
+        p = 0.001  # XXX: Theorized to improve stability, this has yet to be seen.
+        steerings = np.clip(
+            (1 - p) * last_steering_angles + clipped_steering_changes * dt_sec,
+            -1,
+            1,
+        )
+
+        for vehicle, state, throttle, brake, steering in zip(
+            vehicles, states, throttles, brakes, steerings
+        ):
+            vehicle.control(throttle=throttle, brake=brake, steering=steering)
+            state.last_steering_angle = steering
@@ -18,7 +18,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import math
-from typing import Tuple, Union
+from typing import Sequence, Tuple, Union
 
 import numpy as np
 
@@ -98,3 +98,54 @@ class ImitationController:
 
         else:
             raise Exception("unsupported chassis type")
+
+    @classmethod
+    def perform_actions(
+        cls,
+        dt: float,
+        vehicles,
+        actions: Sequence[Union[float, Tuple[float, float]]],
+    ):
+        """Performs `perform_action` for several vehicles at once. The throttle, brake
+        and steering of `AckermannChassis` vehicles given (acceleration,
+        angular_velocity) actions are computed on arrays.
+        """
+        batched_vehicles, batched_actions = [], []
+        for vehicle, action in zip(vehicles, actions):
+            if isinstance(vehicle.chassis, AckermannChassis) and isinstance(
+                action, (list, tuple)
+            ):
+                batched_vehicles.append(vehicle)
+                batched_actions.append(action)
+            else:
+                cls.perform_action(dt, vehicle, action)
+        if not batched_vehicles:
+            return
+
+        acceleration, angular_velocity = np.asarray(batched_actions, dtype=float).T
+        chassis_values = np.array(
+            [
+                (
+                    vehicle.chassis.mass_and_inertia[0],
+                    vehicle.chassis.wheel_radius,
+                    vehicle.chassis.max_torque,
+                    vehicle.chassis.max_btorque,
+                    vehicle.chassis.steering_ratio,
+                )
+                for vehicle in batched_vehicles
+            ]
+        )
+        mass, wheel_radius, max_torque, max_btorque, steering_ratio = chassis_values.T
+
+        # See `perform_action` for the derivation of these values.
+        accelerating = acceleration >= 0
+        max_torque = np.where(accelerating, max_torque, max_btorque)
+        pedal = np.clip(acceleration * (mass / (4 * wheel_radius * max_torque)), 0, 1)
+        throttles = np.where(accelerating, pedal, 0)
+        brakes = np.where(accelerating, 0, pedal)
+        steerings = np.clip(dt * -angular_velocity * steering_ratio, -1, 1)
+
+        for vehicle, throttle, brake, steering in zip(
+            batched_vehicles, throttles, brakes, steerings
+        ):
+            vehicle.control(throttle=throttle, brake=brake, steering=steering)
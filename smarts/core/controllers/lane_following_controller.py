@@ -18,6 +18,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import math
+from functools import lru_cache
+from typing import Tuple
 
 import numpy as np
 from scipy import signal
@@ -29,6 +31,8 @@ from smarts.core.controllers.trajectory_tracking_controller import (
 from smarts.core.utils.math import lerp, low_pass_filter, min_angles_difference_signed
 
 METER_PER_SECOND_TO_KM_PER_HR = 3.6
+# The ratio between consecutive target speeds at which the lateral gains are solved.
+LATERAL_GAINS_SPEED_RATIO = 1.01
 
 
 class LaneFollowingControllerState:
@@ -383,51 +387,27 @@ class LaneFollowingController:
 
         state.target_speed = target_speed
 
-        # Vehicle params
-        half_vehicle_len = vehicle.length / 2
-        vehicle_mass, vehicle_inertia_z = vehicle.chassis.mass_and_inertia
-        road_stiffness = sim.road_stiffness
-
-        # Linearization of lateral dynamics
         if target_speed > 0:
-            state_matrix = np.array(
-                [
-                    [0, target_speed, 0, target_speed],
-                    [0, 0, 1, 0],
-                    [
-                        0,
-                        0,
-                        -(2 * road_stiffness * (half_vehicle_len ** 2))
-                        / (target_speed * vehicle_inertia_z),
-                        0,
-                    ],
-                    [
-                        0,
-                        0,
-                        -1,
-                        -2 * road_stiffness / (vehicle_mass * target_speed),
-                    ],
-                ]
-            )
-            input_matrix = np.array(
-                [
-                    [0],
-                    [0],
-                    [half_vehicle_len * road_stiffness / vehicle_inertia_z],
-                    [road_stiffness / (vehicle_mass * target_speed)],
-                ]
-            )
-            fsf1 = signal.place_poles(
-                state_matrix, input_matrix, desired_poles, method="KNV0"
+            vehicle_mass, vehicle_inertia_z = vehicle.chassis.mass_and_inertia
+            (
+                heading_error_gain,
+                lateral_error_gain,
+            ) = LaneFollowingController.interpolate_lateral_gains(
+                vehicle.length / 2,
+                vehicle_mass,
+                vehicle_inertia_z,
+                sim.road_stiffness,
+                tuple(desired_poles),
+                target_speed,
             )
             # 0.01 and 0.015 denote the max and min gains for heading controller
             # This is done to ensure that the linearization error will not affect
             # the stability of the controller.
-            state.heading_error_gain = np.clip(fsf1.gain_matrix[0][1], 0.02, 0.04)
+            state.heading_error_gain = np.clip(heading_error_gain, 0.02, 0.04)
             # 3.4 and 4.1 denote the max and min gains for lateral error controller
             # As for heading, this is done to ensure that the linearization error
             # will not affect the stability and performance of the controller.
-            state.lateral_error_gain = np.clip(fsf1.gain_matrix[0][0], 3.4, 4.1)
+            state.lateral_error_gain = np.clip(lateral_error_gain, 3.4, 4.1)
 
         else:
             # 0.01 and 0.36 are initial values for heading and lateral gains
@@ -436,6 +416,84 @@ class LaneFollowingController:
             state.heading_error_gain = 0.01
             state.lateral_error_gain = 0.36
 
+    @staticmethod
+    def interpolate_lateral_gains(
+        half_vehicle_len: float,
+        vehicle_mass: float,
+        vehicle_inertia_z: float,
+        road_stiffness: float,
+        desired_poles: Tuple[float, ...],
+        target_speed: float,
+    ) -> Tuple[float, float]:
+        """Returns the unclipped heading and lateral error gains for a positive
+        target speed. The gains are solved at target speeds spaced
+        `LATERAL_GAINS_SPEED_RATIO` apart, which are cached, and linearly
+        interpolated in log speed in between.
+        """
+        position = math.log(target_speed) / math.log(LATERAL_GAINS_SPEED_RATIO)
+        node = math.floor(position)
+        params = (
+            half_vehicle_len,
+            vehicle_mass,
+            vehicle_inertia_z,
+            road_stiffness,
+            desired_poles,
+        )
+        lower = _lateral_gains_at_node(*params, node)
+        fraction = position - node
+        if fraction == 0:
+            return lower
+        upper = _lateral_gains_at_node(*params, node + 1)
+        return (
+            lerp(lower[0], upper[0], fraction),
+            lerp(lower[1], upper[1], fraction),
+        )
+
+    @staticmethod
+    def solve_lateral_gains(
+        half_vehicle_len: float,
+        vehicle_mass: float,
+        vehicle_inertia_z: float,
+        road_stiffness: float,
+        desired_poles: Tuple[float, ...],
+        target_speed: float,
+    ) -> Tuple[float, float]:
+        """Returns the unclipped heading and lateral error gains for a positive
+        target speed by placing the poles of the linearized lateral dynamics.
+        """
+        # Linearization of lateral dynamics
+        state_matrix = np.array(
+            [
+                [0, target_speed, 0, target_speed],
+                [0, 0, 1, 0],
+                [
+                    0,
+                    0,
+                    -(2 * road_stiffness * (half_vehicle_len ** 2))
+                    / (target_speed * vehicle_inertia_z),
+                    0,
+                ],
+                [
+                    0,
+                    0,
+                    -1,
+                    -2 * road_stiffness / (vehicle_mass * target_speed),
+                ],
+            ]
+        )
+        input_matrix = np.array(
+            [
+                [0],
+                [0],
+                [half_vehicle_len * road_stiffness / vehicle_inertia_z],
+                [road_stiffness / (vehicle_mass * target_speed)],
+            ]
+        )
+        fsf1 = signal.place_poles(
+            state_matrix, input_matrix, np.array(desired_poles), method="KNV0"
+        )
+        return fsf1.gain_matrix[0][1], fsf1.gain_matrix[0][0]
+
     @staticmethod
     def _update_target_lane_if_reached_end_of_lane(
         agent_id, vehicle, controller_state, sensor_state
@@ -471,3 +529,22 @@ class LaneFollowingController:
         )
 
         state.target_lane_id = next_wp.lane_id
+
+
+@lru_cache(maxsize=8192)
+def _lateral_gains_at_node(
+    half_vehicle_len,
+    vehicle_mass,
+    vehicle_inertia_z,
+    road_stiffness,
+    desired_poles,
+    node,
+):
+    return LaneFollowingController.solve_lateral_gains(
+        half_vehicle_len,
+        vehicle_mass,
+        vehicle_inertia_z,
+        road_stiffness,
+        desired_poles,
+        LATERAL_GAINS_SPEED_RATIO ** node,
+    )
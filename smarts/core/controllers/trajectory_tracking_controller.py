@@ -18,13 +18,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import math
+from functools import lru_cache
 from typing import Sequence, Tuple
 
 import numpy as np
-from numpy.linalg import matrix_power
 
 from smarts.core.utils.math import (
-    lerp,
     low_pass_filter,
     min_angles_difference_signed,
     radians_to_vec,
@@ -63,36 +62,100 @@ class TrajectoryTrackingController:
         prediction_horizon: int = 5,
     ):
         """Attempts model predictive control for the given vehicle given an expected trajectory."""
-        half_vehicle_len = vehicle.length / 2
-        vehicle_mass, vehicle_inertia_z = vehicle.chassis.mass_and_inertia
-        (
-            heading_error,
-            lateral_error,
-        ) = TrajectoryTrackingController.calculate_heading_lateral_error(
-            vehicle=vehicle,
-            trajectory=trajectory,
-            initial_look_ahead_distant=3,
-            speed_reduction_activation=True,
+        TrajectoryTrackingController.perform_trajectory_tracking_MPC_batch(
+            [trajectory], [vehicle], [state], dt_sec, prediction_horizon
         )
 
-        raw_throttle = TrajectoryTrackingController.calculate_raw_throttle_feedback(
-            vehicle=vehicle,
-            state=state,
-            trajectory=trajectory,
-            velocity_gain=1,
-            velocity_integral_gain=0,
-            integral_velocity_error=0,
-            velocity_damping_gain=0,
-            windup_gain=0,
-            traction_gain=8,
-            speed_reduction_activation=True,
-            throttle_filter_constant=10,
-            dt_sec=dt_sec,
-        )[0]
-        if raw_throttle > 0:
-            brake_norm, throttle_norm = 0, np.clip(raw_throttle, 0, 1)
-        else:
-            brake_norm, throttle_norm = np.clip(-raw_throttle, 0, 1), 0
+    @staticmethod
+    def perform_trajectory_tracking_MPC_batch(
+        trajectories: Sequence[
+            Tuple[Sequence[float], Sequence[float], Sequence[float], Sequence[float]]
+        ],
+        vehicles: Sequence,
+        states: Sequence,
+        dt_sec: float,
+        prediction_horizon: int = 5,
+    ):
+        """Attempts model predictive control for several vehicles at once. The
+        steering of all vehicles is solved with a single batched NumPy call.
+        """
+        count = len(vehicles)
+        if count == 0:
+            return
+        heading_errors = np.empty(count)
+        lateral_errors = np.empty(count)
+        state_matrices = np.empty((count, 4, 4))
+        input_matrices = np.empty((count, 4, 1))
+        drift_vectors = np.empty((count, 4))
+        pedals = []
+        for i, (trajectory, vehicle, state) in enumerate(
+            zip(trajectories, vehicles, states)
+        ):
+            (
+                heading_errors[i],
+                lateral_errors[i],
+            ) = TrajectoryTrackingController.calculate_heading_lateral_error(
+                vehicle=vehicle,
+                trajectory=trajectory,
+                initial_look_ahead_distant=3,
+                speed_reduction_activation=True,
+            )
+            raw_throttle = TrajectoryTrackingController.calculate_raw_throttle_feedback(
+                vehicle=vehicle,
+                state=state,
+                trajectory=trajectory,
+                velocity_gain=1,
+                velocity_integral_gain=0,
+                integral_velocity_error=0,
+                velocity_damping_gain=0,
+                windup_gain=0,
+                traction_gain=8,
+                speed_reduction_activation=True,
+                throttle_filter_constant=10,
+                dt_sec=dt_sec,
+            )[0]
+            if raw_throttle > 0:
+                pedals.append((np.clip(raw_throttle, 0, 1), 0))
+            else:
+                pedals.append((0, np.clip(-raw_throttle, 0, 1)))
+
+            (
+                state_matrices[i],
+                input_matrices[i],
+            ) = TrajectoryTrackingController.mpc_state_input_matrices(vehicle)
+            # Only the drift at the start of the horizon enters the prediction,
+            # see `MPC_batch`.
+            drift_vectors[i] = TrajectoryTrackingController.mpc_drift_matrix(
+                vehicle, trajectory, 1
+            )[:, 0]
+
+        steering_norms = -TrajectoryTrackingController.MPC_batch(
+            heading_errors,
+            lateral_errors,
+            dt_sec,
+            state_matrices,
+            input_matrices,
+            drift_vectors,
+            prediction_horizon,
+        )
+
+        for vehicle, (throttle_norm, brake_norm), steering_norm in zip(
+            vehicles, pedals, steering_norms
+        ):
+            vehicle.control(
+                throttle=throttle_norm,
+                brake=brake_norm,
+                steering=steering_norm,
+            )
+
+    @staticmethod
+    def mpc_state_input_matrices(vehicle) -> Tuple[np.ndarray, np.ndarray]:
+        """The state and input matrices of the lateral dynamics of the vehicle,
+        linearized about its current longitudinal speed.
+        """
+        half_vehicle_len = vehicle.length / 2
+        vehicle_mass, vehicle_inertia_z = vehicle.chassis.mass_and_inertia
+        front_stiffness, rear_stiffness = vehicle.chassis.front_rear_stiffness
         longitudinal_velocity = vehicle.chassis.longitudinal_lateral_speed[0]
         # If longitudinal speed is less than 0.1 (m/s) then use 0.1 (m/s) as
         # the speed for state and input matrix calculations.
@@ -103,43 +166,24 @@ class TrajectoryTrackingController:
                 [0, 1, 0, 0],
                 [
                     0,
-                    -(
-                        vehicle.chassis.front_rear_stiffness[0]
-                        + vehicle.chassis.front_rear_stiffness[1]
-                    )
+                    -(front_stiffness + rear_stiffness)
                     / (vehicle_mass * longitudinal_velocity),
-                    (
-                        vehicle.chassis.front_rear_stiffness[0]
-                        + vehicle.chassis.front_rear_stiffness[1]
-                    )
-                    / vehicle_mass,
+                    (front_stiffness + rear_stiffness) / vehicle_mass,
                     half_vehicle_len
-                    * (
-                        vehicle.chassis.front_rear_stiffness[0]
-                        + vehicle.chassis.front_rear_stiffness[1]
-                    )
+                    * (front_stiffness + rear_stiffness)
                     / (vehicle_mass * longitudinal_velocity),
                 ],
                 [0, 0, 0, 1],
                 [
                     0,
                     half_vehicle_len
-                    * (
-                        -vehicle.chassis.front_rear_stiffness[0]
-                        + vehicle.chassis.front_rear_stiffness[1]
-                    )
+                    * (-front_stiffness + rear_stiffness)
                     / (vehicle_mass * longitudinal_velocity),
                     half_vehicle_len
-                    * (
-                        vehicle.chassis.front_rear_stiffness[0]
-                        - vehicle.chassis.front_rear_stiffness[1]
-                    )
+                    * (front_stiffness - rear_stiffness)
                     / vehicle_mass,
                     (half_vehicle_len ** 2)
-                    * (
-                        vehicle.chassis.front_rear_stiffness[0]
-                        - vehicle.chassis.front_rear_stiffness[1]
-                    )
+                    * (front_stiffness - rear_stiffness)
                     / (vehicle_mass * longitudinal_velocity),
                 ],
             ]
@@ -147,30 +191,12 @@ class TrajectoryTrackingController:
         input_matrix = np.array(
             [
                 [0],
-                [vehicle.chassis.front_rear_stiffness[0] / vehicle_mass],
+                [front_stiffness / vehicle_mass],
                 [0],
-                [vehicle.chassis.front_rear_stiffness[1] / vehicle_inertia_z],
+                [rear_stiffness / vehicle_inertia_z],
             ]
         )
-        drift_matrix = TrajectoryTrackingController.mpc_drift_matrix(
-            vehicle, trajectory, prediction_horizon
-        )
-        steering_norm = -TrajectoryTrackingController.MPC(
-            trajectory,
-            heading_error,
-            lateral_error,
-            dt_sec,
-            state_matrix,
-            input_matrix,
-            drift_matrix,
-            prediction_horizon,
-        )
-
-        vehicle.control(
-            throttle=throttle_norm,
-            brake=brake_norm,
-            steering=steering_norm,
-        )
+        return state_matrix, input_matrix
 
     # Final values are the gains at 80 km/hr (22.2 m/s).
     @staticmethod
@@ -183,98 +209,140 @@ class TrajectoryTrackingController:
         """Attempts proportional derivative control for the vehicle given an expected
         trajectory.
         """
-        # Controller parameters for trajectory tracking.
-        params = vehicle.chassis.controller_parameters
-        final_heading_gain = params["final_heading_gain"]
-        final_lateral_gain = params["final_lateral_gain"]
-        final_steering_filter_constant = params["final_steering_filter_constant"]
-        throttle_filter_constant = params["throttle_filter_constant"]
-        velocity_gain = params["velocity_gain"]
-        velocity_integral_gain = params["velocity_integral_gain"]
-        traction_gain = params["traction_gain"]
-        final_lateral_error_derivative_gain = params[
-            "final_lateral_error_derivative_gain"
-        ]
-        final_heading_error_derivative_gain = params[
-            "final_heading_error_derivative_gain"
-        ]
-        initial_look_ahead_distant = params["initial_look_ahead_distant"]
-        derivative_activation = params["derivative_activation"]
-        speed_reduction_activation = params["speed_reduction_activation"]
-        velocity_damping_gain = params["velocity_damping_gain"]
-        windup_gain = params["windup_gain"]
-
-        # XXX: note that these values may be further adjusted below based on speed and curvature
-        # XXX: we might want to combine the computation of these into a single fn
-        lateral_gain = 0.61
-        heading_gain = 0.01
-        lateral_error_derivative_gain = 0.15
-        heading_error_derivative_gain = 0.5
-
-        # The gains can vary according to the desired velocity along
-        # the trajectory. To achieve this, the desired speed is normalized
-        # between 20 (km/hr) to 80 (km/hr) and the respective gains are
-        # calculated using interpolation. 3, 0.03, 1.5, 0.2 are the
-        # controller gains for lateral error, heading error and their
-        # derivatives at the desired speed 20 (km/hr).
-        normalized_speed = np.clip(
-            (METER_PER_SECOND_TO_KM_PER_HR * trajectory[3][0] - 20) / (80 - 20), 0, 1
+        TrajectoryTrackingController.perform_trajectory_tracking_PD_batch(
+            [trajectory], [vehicle], [state], dt_sec
         )
-        adjust_gains_for_normalized_speed = False  # XXX: not using model config here
-        if adjust_gains_for_normalized_speed:
-            lateral_gain = lerp(3, final_lateral_gain, normalized_speed)
-            lateral_error_derivative_gain = lerp(
-                0.2, final_lateral_error_derivative_gain, normalized_speed
+
+    @staticmethod
+    def perform_trajectory_tracking_PD_batch(
+        trajectories: Sequence,
+        vehicles: Sequence,
+        states: Sequence[TrajectoryTrackingControllerState],
+        dt_sec: float,
+    ):
+        """Attempts proportional derivative control for several vehicles at once. The
+        trajectory geometry is evaluated per vehicle while the gains, filters and
+        feedback terms are computed on arrays over all vehicles.
+        """
+        count = len(vehicles)
+        if count == 0:
+            return
+        # One row per per-vehicle input.
+        columns = np.empty((24, count))
+        (
+            final_steering_filter_constant,
+            throttle_filter_constant,
+            velocity_gain,
+            velocity_integral_gain,
+            traction_gain,
+            derivative_activation,
+            trajectory_speed,
+            speed,
+            lateral_speed,
+            z_yaw,
+            heading_error,
+            lateral_error,
+            curvature_radius,
+            desired_speed,
+            velocity_damping_gain,
+            windup_gain,
+            u_turn,
+            gentle_curve,
+            previous_lateral_error,
+            previous_velocity_error,
+            integral_velocity_error,
+            integral_windup_error,
+            steering_state,
+            throttle_state,
+        ) = columns
+        for i, (trajectory, vehicle, state) in enumerate(
+            zip(trajectories, vehicles, states)
+        ):
+            # Controller parameters for trajectory tracking.
+            params = vehicle.chassis.controller_parameters
+            speed_reduction_activation = params["speed_reduction_activation"]
+            final_steering_filter_constant[i] = params["final_steering_filter_constant"]
+            throttle_filter_constant[i] = params["throttle_filter_constant"]
+            velocity_gain[i] = params["velocity_gain"]
+            velocity_integral_gain[i] = params["velocity_integral_gain"]
+            traction_gain[i] = params["traction_gain"]
+            derivative_activation[i] = params["derivative_activation"]
+            velocity_damping_gain[i] = params["velocity_damping_gain"]
+            windup_gain[i] = params["windup_gain"]
+
+            trajectory_speed[i] = trajectory[3][0]
+            speed[i] = vehicle.speed
+            lateral_speed[i] = vehicle.chassis.longitudinal_lateral_speed[1]
+            z_yaw[i] = vehicle.chassis.velocity_vectors[1][2]
+            u_turn[i] = (
+                abs(min_angles_difference_signed(trajectory[2][-1], trajectory[2][0]))
+                > 2
             )
-            heading_gain = lerp(0.03, final_heading_gain, normalized_speed)
-            heading_error_derivative_gain = lerp(
-                1.5, final_heading_error_derivative_gain, normalized_speed
+            gentle_curve[i] = (
+                abs(
+                    TrajectoryTrackingController.curvature_calculation(
+                        trajectory, 0, num_points=3
+                    )
+                )
+                < 150
             )
-            steering_filter_constant = lerp(
-                12, final_steering_filter_constant, normalized_speed
+            (
+                heading_error[i],
+                lateral_error[i],
+            ) = TrajectoryTrackingController.calculate_heading_lateral_error(
+                vehicle,
+                trajectory,
+                params["initial_look_ahead_distant"],
+                speed_reduction_activation,
+            )
+            curvature_radius[i] = TrajectoryTrackingController.curvature_calculation(
+                trajectory
+            )
+            desired_speed[i] = TrajectoryTrackingController.desired_speed(
+                trajectory, speed_reduction_activation
             )
-        elif vehicle.speed > 70 / METER_PER_SECOND_TO_KM_PER_HR:
-            lateral_gain = 1.51
-            heading_error_derivative_gain = 0.1
-
-        # XXX: This should be handled like the other gains above...
-        steering_filter_constant = lerp(
-            12, final_steering_filter_constant, normalized_speed
-        )
 
-        if abs(min_angles_difference_signed(trajectory[2][-1], trajectory[2][0])) > 2:
-            throttle_filter_constant = 2.5
+            previous_lateral_error[i] = state.lateral_error
+            previous_velocity_error[i] = state.velocity_error
+            integral_velocity_error[i] = state.integral_velocity_error
+            integral_windup_error[i] = state.integral_windup_error
+            steering_state[i] = state.steering_state
+            throttle_state[i] = state.throttle_state
 
-        if (
-            abs(
-                TrajectoryTrackingController.curvature_calculation(
-                    trajectory, 0, num_points=3
-                )
-            )
-            < 150
-        ):
-            heading_gain = 0.05
-            lateral_error_derivative_gain = 0.015
-            heading_error_derivative_gain = 0.05
+        # XXX: note that these values may be further adjusted below based on speed and curvature
+        lateral_gain = np.full(count, 0.61)
+        heading_gain = np.full(count, 0.01)
+        lateral_error_derivative_gain = np.full(count, 0.15)
+        heading_error_derivative_gain = np.full(count, 0.5)
 
-        (
-            heading_error,
-            lateral_error,
-        ) = TrajectoryTrackingController.calculate_heading_lateral_error(
-            vehicle, trajectory, initial_look_ahead_distant, speed_reduction_activation
+        # The desired speed is normalized between 20 (km/hr) to 80 (km/hr) to
+        # interpolate the steering filter constant.
+        normalized_speed = np.clip(
+            (METER_PER_SECOND_TO_KM_PER_HR * trajectory_speed - 20) / (80 - 20), 0, 1
         )
+        fast = speed > 70 / METER_PER_SECOND_TO_KM_PER_HR
+        lateral_gain[fast] = 1.51
+        heading_error_derivative_gain[fast] = 0.1
 
-        curvature_radius = TrajectoryTrackingController.curvature_calculation(
-            trajectory
+        # XXX: This should be handled like the other gains above...
+        steering_filter_constant = (
+            12 * (1.0 - normalized_speed)
+            + final_steering_filter_constant * normalized_speed
         )
 
+        throttle_filter_constant[u_turn == 1] = 2.5
+
+        gentle_curve = gentle_curve == 1
+        heading_gain[gentle_curve] = 0.05
+        lateral_error_derivative_gain[gentle_curve] = 0.015
+        heading_error_derivative_gain[gentle_curve] = 0.05
+
         # Derivative terms of the controller (use with caution for large time steps>=0.1).
         # Increasing the values will increase the convergence time and reduces the oscillation.
-        z_yaw = vehicle.chassis.velocity_vectors[1][2]
         derivative_term = (
             +heading_error_derivative_gain * z_yaw
             + lateral_error_derivative_gain
-            * (lateral_error - state.lateral_error)
+            * (lateral_error - previous_lateral_error)
             / dt_sec
         )
         # Raw steering controller, default values 0.11 and 0.65 are used for heading and
@@ -283,52 +351,80 @@ class TrajectoryTrackingController:
         # calculated based on the current velocity. The coefficient value for the
         # feed forward term is 0.1 and it depends on the cornering stiffness and
         # vehicle inertia properties.
-        steering_feed_forward_term = 0.1 * (1 / curvature_radius) * (vehicle.speed) ** 2
+        steering_feed_forward_term = 0.1 * (1 / curvature_radius) * (speed) ** 2
         steering_raw = np.clip(
             derivative_activation * derivative_term
-            + math.degrees(heading_gain * (heading_error))
+            + np.degrees(heading_gain * (heading_error))
             + 1 * lateral_gain * lateral_error
             - steering_feed_forward_term,
             -1,
             1,
         )
         # The steering linear low pass filter.
-        state.steering_state = low_pass_filter(
-            steering_raw, state.steering_state, steering_filter_constant, dt_sec
+        steering_state = low_pass_filter(
+            steering_raw, steering_state, steering_filter_constant, dt_sec
         )
 
-        (
+        # Main velocity profile tracking controller, see `calculate_raw_throttle_feedback`.
+        velocity_error = speed - desired_speed
+        velocity_error_damping_term = (
+            velocity_error - previous_velocity_error
+        ) / dt_sec
+        raw_throttle = METER_PER_SECOND_TO_KM_PER_HR * (
+            -0.5 * velocity_gain * velocity_error
+            - velocity_integral_gain
+            * (integral_velocity_error + windup_gain * integral_windup_error)
+            - velocity_damping_gain * velocity_error_damping_term
+        )
+        integral_windup_error = np.clip(raw_throttle, -1, 1) - raw_throttle
+        throttle_state = low_pass_filter(
             raw_throttle,
-            desired_speed,
-        ) = TrajectoryTrackingController.calculate_raw_throttle_feedback(
-            vehicle,
-            state,
-            trajectory,
-            velocity_gain,
-            velocity_integral_gain,
-            state.integral_velocity_error,
-            velocity_damping_gain,
-            windup_gain,
-            traction_gain,
-            speed_reduction_activation,
+            throttle_state,
             throttle_filter_constant,
             dt_sec,
+            raw_value=-traction_gain * np.abs(lateral_speed),
         )
+        throttle_norm = np.clip(throttle_state, 0, 1)
+        brake_norm = np.clip(-throttle_state, 0, 1)
+        integral_velocity_error += (speed - desired_speed) * dt_sec
+
+        for i, (vehicle, state) in enumerate(zip(vehicles, states)):
+            state.heading_error = heading_error[i]
+            state.lateral_error = lateral_error[i]
+            state.velocity_error = velocity_error[i]
+            state.integral_velocity_error = integral_velocity_error[i]
+            state.integral_windup_error = integral_windup_error[i]
+            state.steering_state = steering_state[i]
+            state.throttle_state = throttle_state[i]
+
+            vehicle.control(
+                throttle=throttle_norm[i],
+                brake=brake_norm[i],
+                steering=steering_state[i],
+            )
 
-        if raw_throttle > 0:
-            brake_norm, throttle_norm = 0, np.clip(raw_throttle, 0, 1)
-        else:
-            brake_norm, throttle_norm = np.clip(-raw_throttle, 0, 1), 0
-
-        state.heading_error = heading_error
-        state.lateral_error = lateral_error
-        state.integral_velocity_error += (vehicle.speed - desired_speed) * dt_sec
-
-        vehicle.control(
-            throttle=throttle_norm,
-            brake=brake_norm,
-            steering=state.steering_state,
+    @staticmethod
+    def desired_speed(trajectory, speed_reduction_activation):
+        """The speed to track along the trajectory, reduced on the curvy portions of
+        the road.
+        """
+        desired_speed = trajectory[3][-1]
+        # If the vehicle is on the curvy portion of the road, then the desired speed
+        # will be reduced to 80 percent of the desired speed of the trajectory.
+        # Value 4 is the number of ahead trajectory points for starting the calculation
+        # of the radius of curvature. Value 100 is the threshold for reducing the
+        # desired speed profile. This value can be approximated using the
+        # formula v^2/R=mu*g. In addition, we used additional threshold 30 for very
+        # sharp turn in which the desired speed of the vehicle is set to 80
+        # percent of the original values with the upperbound of 29.8 m/s(30 km/hr).
+        absolute_ahead_curvature = abs(
+            TrajectoryTrackingController.curvature_calculation(trajectory, 4)
         )
+        if absolute_ahead_curvature < 30 and speed_reduction_activation:
+            desired_speed = np.clip(0.8 * desired_speed, 0, 8.3)
+        elif absolute_ahead_curvature < 100 and speed_reduction_activation:
+            desired_speed *= 0.8
+        return desired_speed
 
     @staticmethod
     def calculate_raw_throttle_feedback(
@@ -346,22 +442,9 @@ class TrajectoryTrackingController:
         dt_sec,
     ):
         """Applies filters to the throttle for stability."""
-        desired_speed = trajectory[3][-1]
-        # If the vehicle is on the curvy portion of the road, then the desired speed
-        # will be reduced to 80 percent of the desired speed of the trajectory.
-        # Value 4 is the number of ahead trajectory points for starting the calculation
-        # of the radius of curvature. Value 100 is the threshold for reducing the
-        # desired speed profile. This value can be approximated using the
-        # formula v^2/R=mu*g. In addition, we used additional threshold 30 for very
-        # sharp turn in which the desired speed of the vehicle is set to 80
-        # percent of the original values with the upperbound of 29.8 m/s(30 km/hr).
-        absolute_ahead_curvature = abs(
-            TrajectoryTrackingController.curvature_calculation(trajectory, 4)
+        desired_speed = TrajectoryTrackingController.desired_speed(
+            trajectory, speed_reduction_activation
         )
-        if absolute_ahead_curvature < 30 and speed_reduction_activation:
-            desired_speed = np.clip(0.8 * desired_speed, 0, 8.3)
-        elif absolute_ahead_curvature < 100 and speed_reduction_activation:
-            desired_speed *= 0.8
 
         # Main velocity profile tracking controller, the default gain value is 0.1.
         # Default value 3 for the traction controller term involving lateral velocity is
@@ -535,75 +618,100 @@ class TrajectoryTrackingController:
         Convex Optimization – Boyd and Vandenberghe
         https://markcannon.github.io/assets/downloads/teaching/C21_Model_Predictive_Control/mpc_notes.pdf
         """
-        matrix_A = np.eye(state_matrix.shape[0]) + dt * state_matrix
-        matrix_B = dt * input_matrix
-        matrix_B0 = dt * drift_matrix
-        matrix_M = matrix_A
-        matrix_C = np.concatenate(
-            (
-                matrix_B,
-                np.zeros(
-                    [matrix_B.shape[0], (prediction_horizon - 1) * matrix_B.shape[1]]
-                ),
-            ),
-            axis=1,
+        return TrajectoryTrackingController.MPC_batch(
+            np.array([heading_error]),
+            np.array([lateral_error]),
+            dt,
+            state_matrix[np.newaxis],
+            input_matrix[np.newaxis],
+            drift_matrix[np.newaxis, :, 0],
+            prediction_horizon,
+        )[0]
+
+    @staticmethod
+    def MPC_batch(
+        heading_errors: np.ndarray,
+        lateral_errors: np.ndarray,
+        dt: float,
+        state_matrices: np.ndarray,
+        input_matrices: np.ndarray,
+        drift_vectors: np.ndarray,
+        prediction_horizon: int = 5,
+    ) -> np.ndarray:
+        """Solve the unconstrained MPC problem of `MPC` for N vehicles at once.
+
+        Args:
+            heading_errors: Shape (N,).
+            lateral_errors: Shape (N,).
+            dt: The control time step.
+            state_matrices: Shape (N, 4, 4).
+            input_matrices: Shape (N, 4, 1).
+            drift_vectors: Shape (N, 4), the drift at the start of the horizon.
+            prediction_horizon: The number of predicted steps.
+
+        Returns:
+            The clipped steering input of each vehicle, shape (N,).
+        """
+        count, state_size, _ = state_matrices.shape
+        matrix_A = np.eye(state_size) + dt * state_matrices
+        matrix_B = dt * input_matrices[:, :, 0]
+        matrix_b0 = dt * drift_vectors
+
+        # powers[:, k] = A^k for k in [0, prediction_horizon]
+        powers = np.empty((count, prediction_horizon + 1, state_size, state_size))
+        powers[:, 0] = np.eye(state_size)
+        for k in range(prediction_horizon):
+            powers[:, k + 1] = powers[:, k] @ matrix_A
+
+        # M stacks A^1 ... A^h
+        matrix_M = powers[:, 1:].reshape(count, -1, state_size)
+        # T_tilde stacks A^0 b0 ... A^(h-1) b0
+        matrix_T_tilde = (powers[:, :-1] @ matrix_b0[:, np.newaxis, :, np.newaxis])[
+            ..., 0
+        ].reshape(count, -1)
+        # C is block lower triangular with A^(i-j) B at block (i, j)
+        powers_B = (powers[:, :-1] @ matrix_B[:, np.newaxis, :, np.newaxis])[..., 0]
+        rows, columns, exponents = _mpc_lower_triangle(prediction_horizon)
+        matrix_C = np.zeros((count, prediction_horizon, prediction_horizon, state_size))
+        matrix_C[:, rows, columns] = powers_B[:, exponents]
+        matrix_C = matrix_C.transpose(0, 1, 3, 2).reshape(count, -1, prediction_horizon)
+
+        # Q_tilde is diagonal so only its diagonal is applied. R_tilde is the identity.
+        q_tilde = _mpc_state_cost_weights(prediction_horizon)
+        matrix_C_T = matrix_C.transpose(0, 2, 1)
+        matrix_H = matrix_C_T @ (q_tilde[:, np.newaxis] * matrix_C) + np.eye(
+            prediction_horizon
         )
 
-        matrix_T_tilde = matrix_B0[:, 0]
+        initial_state = np.zeros((count, state_size))
+        initial_state[:, 0] = lateral_errors
+        initial_state[:, 2] = heading_errors
+        # F x0 + F1 = C^T Q (M x0 + T_tilde)
+        predicted = (matrix_M @ initial_state[..., np.newaxis])[..., 0] + matrix_T_tilde
+        rhs = matrix_C_T @ (q_tilde * predicted)[..., np.newaxis]
 
-        for i in range(prediction_horizon - 1):
-            matrix_M = np.concatenate((matrix_M, matrix_power(matrix_A, i + 2)), axis=0)
-            matrix_T_tilde = np.concatenate(
-                (
-                    matrix_T_tilde,
-                    np.matmul(
-                        matrix_A,
-                        matrix_T_tilde[
-                            matrix_T_tilde.shape[0]
-                            - matrix_B0.shape[0] : matrix_T_tilde.shape[0]
-                        ],
-                        matrix_B0[:, i + 1],
-                    ),
-                ),
-                axis=0,
-            )
-            temp = np.matmul(matrix_power(matrix_A, i + 1), matrix_B)
-            for j in range(i + 1, 0, -1):
-                temp = np.concatenate(
-                    (temp, np.matmul(matrix_power(matrix_A, j - 1), matrix_B)), axis=1
-                )
-            temp = np.concatenate(
-                (
-                    temp,
-                    np.zeros(
-                        [
-                            matrix_B.shape[0],
-                            (prediction_horizon - i - 2) * matrix_B.shape[1],
-                        ]
-                    ),
-                ),
-                axis=1,
-            )
-            matrix_C = np.concatenate((matrix_C, temp), axis=0)
+        # This is the solution to the unconstrained optimization problem
+        # for the MPC. H is symmetric positive definite, so it is solved for
+        # directly instead of being inverted.
+        unconstrained_optimal_solution = np.linalg.solve(2 * matrix_H, rhs)[:, 0, 0]
 
-        # Q_tilde contains the MPC state cost weights. The ordering of
-        # gains are as [lateral_error,lateral_velocity,heading_error,yaw_rate].
-        # Increasing the lateral_error weight can cause oscillations which can
-        # be damped out by increasing yaw_rate weight.
-        Q_tilde = np.kron(np.eye(prediction_horizon), 0.1 * np.diag([354, 0, 14, 250]))
-        # R_tilde contain the steering input weight.
-        R_tilde = np.kron(np.eye(prediction_horizon), np.eye(1))
-        matrix_H = (np.transpose(matrix_C)).dot(Q_tilde).dot(matrix_C) + R_tilde
-        matrix_F = (np.transpose(matrix_C)).dot(Q_tilde).dot(matrix_M)
+        return np.clip(-unconstrained_optimal_solution, -1, 1)
 
-        matrix_F1 = (np.transpose(matrix_C)).dot(Q_tilde).dot(matrix_T_tilde)
 
-        # This is the solution to the unconstrained optimization problem
-        # for the MPC.
-        unconstrained_optimal_solution = np.matmul(
-            np.linalg.inv(2 * matrix_H),
-            np.matmul(matrix_F, np.array([[lateral_error], [0], [heading_error], [0]]))
-            + np.reshape(matrix_F1, (-1, 1)),
-        )[0][0]
+@lru_cache(maxsize=None)
+def _mpc_state_cost_weights(prediction_horizon: int) -> np.ndarray:
+    # The diagonal of Q_tilde, the MPC state cost weights. The ordering of
+    # gains are as [lateral_error,lateral_velocity,heading_error,yaw_rate].
+    # Increasing the lateral_error weight can cause oscillations which can
+    # be damped out by increasing yaw_rate weight.
+    weights = np.tile(0.1 * np.array([354, 0, 14, 250]), prediction_horizon)
+    weights.flags.writeable = False
+    return weights
 
-        return np.clip(-unconstrained_optimal_solution, -1, 1)
+
+@lru_cache(maxsize=None)
+def _mpc_lower_triangle(
+    prediction_horizon: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows, columns = np.tril_indices(prediction_horizon)
+    return rows, columns, rows - columns
@@ -18,38 +18,107 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import gc
 import os
+import threading
 from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
-from typing import NamedTuple, Optional, Tuple
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+import psutil
 
 from smarts.core.road_map import RoadMap
 from smarts.core.utils.file import file_md5_hash, path2hash
 
-_existing_map = None
-
+# Road maps are evicted, least recently used first, once their estimated total size
+# exceeds this. The most recently used map is always kept.
+ROAD_MAP_CACHE_MAX_BYTES = 2 * 1024**3
+
+
+class _RoadMapInfo(NamedTuple):
+    map_spec: Any  # MapSpec
+    obj: RoadMap
+    map_hash: str
+    size: int
+
+
+class RoadMapCacheStats(NamedTuple):
+    """The counters of the road map cache of `get_road_map()`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maps: int
+    size: int
+    """The estimated total size of the cached maps in bytes."""
+
+
+# Least recently used first
+_road_maps: List[_RoadMapInfo] = []
+_hits = 0
+_misses = 0
+_evictions = 0
+# Scenarios may be prefetched in a background thread, see `Scenario.scenario_variations()`.
+_road_maps_lock = threading.RLock()
+
+
+def road_map_cache_stats() -> RoadMapCacheStats:
+    """The counters and the contents of the road map cache of `get_road_map()`."""
+    with _road_maps_lock:
+        return RoadMapCacheStats(
+            hits=_hits,
+            misses=_misses,
+            evictions=_evictions,
+            maps=len(_road_maps),
+            size=sum(info.size for info in _road_maps),
+        )
+
+
+def clear_road_map_cache():
+    """Drop all road maps cached by `get_road_map()` and reset its counters."""
+    global _hits, _misses, _evictions
+    with _road_maps_lock:
+        _road_maps.clear()
+        _hits = _misses = _evictions = 0
+    gc.collect()
+
+
+def _cache_result(map_spec, road_map: RoadMap, road_map_hash: str, size: int):
+    global _evictions
+    _road_maps.append(_RoadMapInfo(map_spec, road_map, road_map_hash, size))
+    evicted = False
+    while (
+        len(_road_maps) > 1
+        and sum(info.size for info in _road_maps) > ROAD_MAP_CACHE_MAX_BYTES
+    ):
+        del _road_maps[0]
+        _evictions += 1
+        evicted = True
+    if evicted:
+        gc.collect()
 
-def _cache_result(map_spec, road_map, road_map_hash: str):
-    global _existing_map
-    from smarts.sstudio.types import MapSpec
 
-    class _RoadMapInfo(NamedTuple):
-        map_spec: MapSpec
-        obj: RoadMap
-        map_hash: str
+def _source_size(map_source: str) -> int:
+    if os.path.isfile(map_source):
+        return os.path.getsize(map_source)
+    return sum(
+        os.path.getsize(os.path.join(root, f))
+        for root, _, files in os.walk(map_source)
+        for f in files
+    )
 
-    _existing_map = _RoadMapInfo(map_spec, road_map, road_map_hash)
 
+@lru_cache(maxsize=1024)
+def _cached_file_md5_hash(file_path: str, size: int, mtime_ns: int) -> str:
+    return file_md5_hash(file_path)
 
-def _clear_cache():
-    global _existing_map
-    if _existing_map:
-        import gc
 
-        # Try to only keep one map around at a time...
-        del _existing_map
-        _existing_map = None
-        gc.collect()
+def _map_hash(map_source: str) -> str:
+    if not os.path.isfile(map_source):
+        return path2hash(map_source)
+    stat = os.stat(map_source)
+    return _cached_file_md5_hash(map_source, stat.st_size, stat.st_mtime_ns)
 
 
 _UNKNOWN_MAP = 0
@@ -92,8 +161,11 @@ def get_road_map(map_spec) -> Tuple[Optional[RoadMap], Optional[str]]:
     should signify that the map is different enough
     that map-related caches should be reloaded.
     If possible, the RoadMap object may be cached here
-    and re-used.
+    and re-used. Road maps are kept in a least recently
+    used cache bounded by `ROAD_MAP_CACHE_MAX_BYTES`,
+    see `road_map_cache_stats()`.
     """
+    global _hits, _misses
     assert map_spec, "A road map spec must be specified"
     assert map_spec.source, "A road map source must be specified"
 
@@ -120,18 +192,20 @@ def get_road_map(map_spec) -> Tuple[Optional[RoadMap], Optional[str]]:
     else:
         return None, None
 
-    if _existing_map:
-        if isinstance(_existing_map.obj, map_class) and _existing_map.obj.is_same_map(
-            map_spec
-        ):
-            return _existing_map.obj, _existing_map.map_hash
-        _clear_cache()
-
-    road_map = map_class.from_spec(map_spec)
-    if os.path.isfile(road_map.source):
-        road_map_hash = file_md5_hash(road_map.source)
-    else:
-        road_map_hash = path2hash(road_map.source)
-    _cache_result(map_spec, road_map, road_map_hash)
+    with _road_maps_lock:
+        for index, info in enumerate(_road_maps):
+            if isinstance(info.obj, map_class) and info.obj.is_same_map(map_spec):
+                _hits += 1
+                _road_maps.append(_road_maps.pop(index))
+                return info.obj, info.map_hash
+        _misses += 1
+
+        # The size of a map is estimated by how much memory building it took
+        process = psutil.Process()
+        rss = process.memory_info().rss
+        road_map = map_class.from_spec(map_spec)
+        size = max(process.memory_info().rss - rss, _source_size(road_map.source))
+        road_map_hash = _map_hash(road_map.source)
+        _cache_result(map_spec, road_map, road_map_hash, size)
 
     return road_map, road_map_hash
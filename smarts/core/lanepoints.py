@@ -101,6 +101,8 @@ class LanePoints:
             for edge_id, l_lps in self._lanepoints_by_edge_id.items()
         }
 
+        self._lanepoint_runs = LanePoints._build_lanepoint_runs(self._linked_lanepoints)
+
     @classmethod
     def from_sumo(
         cls,
@@ -643,7 +645,7 @@ class LanePoints:
             self._lanepoints_kd_tree_by_edge_id[road_id],
         )[0][0]
 
-    @lru_cache(maxsize=32)
+    @lru_cache(maxsize=1024)
     def paths_starting_at_lanepoint(
         self, lanepoint: LinkedLanePoint, lookahead: int, filter_edge_ids: tuple
     ) -> List[List[LinkedLanePoint]]:
@@ -658,35 +660,124 @@ class LanePoints:
         Returns:
             All branches(as lists) stemming from the lanepoint.
         """
-        lanepoint_paths = [[lanepoint]]
-        for _ in range(lookahead):
-            next_lanepoint_paths = []
-            for path in lanepoint_paths:
-                branching_paths = []
-                for next_lp in path[-1].nexts:
-                    # TODO: This could be a problem for SUMO. What about internal lanes?
-                    # Filter only the edges we're interested in
-                    next_lane = next_lp.lp.lane
-                    edge_id = next_lane.road.road_id
-                    if filter_edge_ids and edge_id not in filter_edge_ids:
-                        continue
-                    if (
-                        filter_edge_ids
-                        and edge_id != filter_edge_ids[-1]
-                        and all(
-                            out_lane.road.road_id not in filter_edge_ids
-                            for out_lane in next_lane.outgoing_lanes
-                        )
-                    ):
-                        continue
-                    new_path = path + [next_lp]
-                    branching_paths.append(new_path)
-
-                if not branching_paths:
-                    branching_paths = [path]
-
-                next_lanepoint_paths += branching_paths
-
-            lanepoint_paths = next_lanepoint_paths
+        # Branches are walked depth first a run of lanepoints at a time. Each
+        # branch keeps a pointer to the branch it split from so that the runs of
+        # common prefixes are shared, and the paths are only put together at the end.
+        is_allowed = LanePoints._lane_filter(filter_edge_ids)
+        lanepoint_paths = []
+        # (first lanepoint, remaining lookahead, parent branch)
+        stack = [(lanepoint, lookahead, None)]
+        while stack:
+            first_lp, remaining, parent = stack.pop()
+            run, idx = self._lanepoint_runs.get(id(first_lp), ([first_lp], 0))
+            if parent is None and len(run) > idx + 1 and not is_allowed(run[idx + 1]):
+                # The starting lanepoint is not on a lane of interest
+                run, idx = [first_lp], 0
+            segment = run[idx : idx + remaining + 1]
+            remaining -= len(segment) - 1
+            branch = (segment, parent)
+            nexts = (
+                [next_lp for next_lp in segment[-1].nexts if is_allowed(next_lp)]
+                if remaining > 0
+                else None
+            )
+            if not nexts:
+                lanepoint_paths.append(LanePoints._join_branch(branch))
+                continue
+            for next_lp in reversed(nexts):
+                stack.append((next_lp, remaining - 1, branch))
 
         return lanepoint_paths
+
+    @staticmethod
+    def _join_branch(branch) -> List[LinkedLanePoint]:
+        segments = []
+        while branch is not None:
+            segment, branch = branch
+            segments.append(segment)
+        path = []
+        for segment in reversed(segments):
+            path += segment
+        return path
+
+    @staticmethod
+    def _build_lanepoint_runs(linked_lanepoints: List[LinkedLanePoint]):
+        """Splits lanepoints into runs in which each lanepoint has a single next
+        lanepoint on the same lane. Returns a map from the `id()` of each lanepoint
+        to its run and its index in the run.
+        """
+
+        def continues(linked_lp: LinkedLanePoint) -> bool:
+            return (
+                len(linked_lp.nexts) == 1
+                and linked_lp.nexts[0].lp.lane.lane_id == linked_lp.lp.lane.lane_id
+            )
+
+        continued = {
+            id(linked_lp.nexts[0])
+            for linked_lp in linked_lanepoints
+            if continues(linked_lp)
+        }
+        runs = {}
+        for linked_lp in linked_lanepoints:
+            if id(linked_lp) in continued:
+                continue
+            run = [linked_lp]
+            in_run = {id(linked_lp)}
+            while continues(run[-1]) and id(run[-1].nexts[0]) not in in_run:
+                run.append(run[-1].nexts[0])
+                in_run.add(id(run[-1]))
+            for idx, run_lp in enumerate(run):
+                runs[id(run_lp)] = (run, idx)
+        # Lanepoints on a closed cycle have no start and are left out, they are
+        # walked one at a time.
+        return runs
+
+    @staticmethod
+    def advance_paths(
+        paths: List[List[LinkedLanePoint]], filter_edge_ids: tuple
+    ) -> Optional[List[List[LinkedLanePoint]]]:
+        """Derive the paths starting at the second lanepoint of the given paths, which
+        must all start at the same lanepoint and continue to the same next lanepoint,
+        from the paths `paths_starting_at_lanepoint()` returned for the first one.
+        Returns None if the paths do not continue to a common lanepoint.
+        """
+        if not all(len(path) > 1 and path[1] is paths[0][1] for path in paths):
+            return None
+        is_allowed = LanePoints._lane_filter(filter_edge_ids)
+        next_lanepoint_paths = []
+        for path in paths:
+            branching_paths = [
+                path[1:] + [next_lp]
+                for next_lp in path[-1].nexts
+                if is_allowed(next_lp)
+            ]
+            next_lanepoint_paths += branching_paths or [path[1:]]
+        return next_lanepoint_paths
+
+    @staticmethod
+    def _lane_filter(filter_edge_ids: tuple):
+        """Returns a memoized check of whether a branch may continue to a lanepoint."""
+        if not filter_edge_ids:
+            return lambda next_lp: True
+
+        allowed_by_lane = {}
+
+        def is_allowed(next_lp: LinkedLanePoint) -> bool:
+            # TODO: This could be a problem for SUMO. What about internal lanes?
+            # Filter only the edges we're interested in
+            next_lane = next_lp.lp.lane
+            allowed = allowed_by_lane.get(next_lane.lane_id)
+            if allowed is None:
+                edge_id = next_lane.road.road_id
+                allowed = edge_id in filter_edge_ids and (
+                    edge_id == filter_edge_ids[-1]
+                    or any(
+                        out_lane.road.road_id in filter_edge_ids
+                        for out_lane in next_lane.outgoing_lanes
+                    )
+                )
+                allowed_by_lane[next_lane.lane_id] = allowed
+            return allowed
+
+        return is_allowed
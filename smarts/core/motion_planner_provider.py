@@ -23,7 +23,6 @@ import numpy as np
 
 from .bezier_motion_planner import BezierMotionPlanner
 from .controllers import ActionSpaceType
-from .coordinates import Heading, Pose
 from .provider import Provider, ProviderState
 from .vehicle import VEHICLE_CONFIGS, VehicleState
 
@@ -99,21 +98,17 @@ class MotionPlannerProvider(Provider):
         self._poses[indices] = poses
         vehicle_config_type = "passenger"  # TODO: allow for multiple vehicle types
 
-        return ProviderState(
-            vehicles=[
-                VehicleState(
-                    vehicle_id=v_id,
-                    vehicle_config_type=vehicle_config_type,
-                    pose=Pose.from_center(
-                        [*poses[idx][:2], 0],
-                        Heading(poses[idx][2]),
-                    ),
-                    dimensions=VEHICLE_CONFIGS[vehicle_config_type].dimensions,
-                    speed=speeds[idx],
-                    source="BEZIER",
-                )
-                for idx, v_id in enumerate(self._vehicle_id_to_index.keys())
-            ],
+        return ProviderState.from_arrays(
+            vehicle_ids=list(self._vehicle_id_to_index.keys()),
+            positions=poses[:, :2],
+            headings=poses[:, 2],
+            speeds=speeds,
+            dimensions=np.tile(
+                VEHICLE_CONFIGS[vehicle_config_type].dimensions.as_lwh,
+                (len(poses), 1),
+            ),
+            source="BEZIER",
+            vehicle_config_types=vehicle_config_type,
         )
 
     def _normalize_target_pose(self, vehicle_index, target_poses, dt):
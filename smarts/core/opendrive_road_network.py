@@ -78,6 +78,7 @@ from smarts.core.utils.math import (
     radians_to_vec,
     vec_2d,
 )
+from smarts.core.waypoints_cache import WaypointsCache
 from smarts.sstudio.types import MapSpec
 
 from .coordinates import BoundingBox, Heading, Point, Pose, RefLinePoint
@@ -233,7 +234,7 @@ class OpenDriveRoadNetwork(RoadMap):
         self._lane_rtree = None
 
         self._load()
-        self._waypoints_cache = OpenDriveRoadNetwork._WaypointsCache()
+        self._waypoints_cache = WaypointsCache()
         if map_spec.lanepoint_spacing is not None:
             assert map_spec.lanepoint_spacing > 0
             self._lanepoints = LanePoints.from_opendrive(
@@ -1565,55 +1566,6 @@ class OpenDriveRoadNetwork(RoadMap):
     def empty_route(self) -> RoadMap.Route:
         return OpenDriveRoadNetwork.Route(self)
 
-    class _WaypointsCache:
-        def __init__(self):
-            self.lookahead = 0
-            self.point = (0, 0, 0)
-            self.filter_road_ids = ()
-            self._starts = {}
-
-        # XXX:  all vehicles share this cache now (as opposed to before
-        # when it was in Plan.py and each vehicle had its own cache).
-        # TODO: probably need to add vehicle_id to the key somehow (or just make it bigger)
-        def _match(self, lookahead, point, filter_road_ids) -> bool:
-            return (
-                lookahead <= self.lookahead
-                and point[0] == self.point[0]
-                and point[1] == self.point[1]
-                and filter_road_ids == self.filter_road_ids
-            )
-
-        def update(
-            self,
-            lookahead: int,
-            point: Tuple[float, float, float],
-            filter_road_ids: tuple,
-            llp,
-            paths: List[List[Waypoint]],
-        ):
-            """Update the current cache if not already cached."""
-            if not self._match(lookahead, point, filter_road_ids):
-                self.lookahead = lookahead
-                self.point = point
-                self.filter_road_ids = filter_road_ids
-                self._starts = {}
-            self._starts[llp.lp.lane.index] = paths
-
-        def query(
-            self,
-            lookahead: int,
-            point: Tuple[float, float, float],
-            filter_road_ids: tuple,
-            llp,
-        ) -> Optional[List[List[Waypoint]]]:
-            """Attempt to find previously cached waypoints"""
-            if self._match(lookahead, point, filter_road_ids):
-                hit = self._starts.get(llp.lp.lane.index, None)
-                if hit:
-                    # consider just returning all of them (not slicing)?
-                    return [path[: (lookahead + 1)] for path in hit]
-                return None
-
     def waypoint_paths(
         self,
         pose: Pose,
@@ -1860,29 +1812,16 @@ class OpenDriveRoadNetwork(RoadMap):
         """computes equally-spaced Waypoints for all lane paths starting at lanepoint
         up to lookahead waypoints ahead, constrained to filter_road_ids if specified."""
 
-        # The following acts sort of like lru_cache(1), but it allows
-        # for lookahead to be <= to the cached value...
-        cache_paths = self._waypoints_cache.query(
-            lookahead, point, filter_road_ids, lanepoint
-        )
-        if cache_paths:
-            return cache_paths
-
-        lanepoint_paths = self._lanepoints.paths_starting_at_lanepoint(
-            lanepoint, lookahead, filter_road_ids
-        )
-        result = [
-            self._equally_spaced_path(
+        return self._waypoints_cache.waypoint_paths(
+            self._lanepoints,
+            lanepoint,
+            lookahead,
+            filter_road_ids,
+            point,
+            lambda path, point: self._equally_spaced_path(
                 path,
                 point,
                 self._map_spec.lanepoint_spacing,
                 self._default_lane_width / 2,
-            )
-            for path in lanepoint_paths
-        ]
-
-        self._waypoints_cache.update(
-            lookahead, point, filter_road_ids, lanepoint, result
+            ),
         )
-
-        return result
@@ -17,11 +17,13 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-from dataclasses import dataclass, field
 from enum import IntFlag
-from typing import List, Optional, Set, Tuple
+from typing import Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
 
 from .controllers import ActionSpaceType
+from .coordinates import Dimensions, Heading, Pose
 from .scenario import Scenario
 from .vehicle import VehicleState
 
@@ -39,32 +41,252 @@ class ProviderRecoveryFlags(IntFlag):
     """Provider should attempt to recover from the exception or disconnection."""
 
 
-@dataclass
+VEHICLE_STATE_DTYPE = np.dtype(
+    [
+        ("position", np.float64, (3,)),
+        ("heading", np.float64),
+        ("speed", np.float64),
+        ("dimensions", np.float64, (3,)),
+    ]
+)
+"""The columns of `ProviderState.array`. Dimensions are (length, width, height)."""
+
+
+def _object_array(values) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
 class ProviderState:
-    """State information from a provider."""
+    """State information from a provider.
+
+    The vehicles are stored column-wise: the ids, sources and vehicle config types
+    as object arrays and the positions, headings, speeds and dimensions in a
+    structured array (see `VEHICLE_STATE_DTYPE`). Providers which have these values
+    as arrays build the state with `from_arrays` and their `VehicleState`s are only
+    created when `vehicles` or `vehicle_at` is accessed. A state built from
+    `VehicleState`s keeps them and only builds the structured array on access.
+    """
+
+    def __init__(
+        self,
+        vehicles: Optional[Sequence[VehicleState]] = None,
+        dt: Optional[float] = None,
+    ):
+        self.dt = dt  # most Providers can leave this blank
+        self.vehicles = vehicles if vehicles is not None else []
+
+    @classmethod
+    def from_arrays(
+        cls,
+        vehicle_ids: Sequence[str],
+        positions: np.ndarray,
+        headings: np.ndarray,
+        speeds: np.ndarray,
+        dimensions: np.ndarray,
+        source: Union[str, Sequence[str]],
+        vehicle_config_types: Union[str, Sequence[str]],
+        dt: Optional[float] = None,
+    ) -> "ProviderState":
+        """Build a state from columns of vehicle values.
+
+        Args:
+            vehicle_ids: The vehicle ids.
+            positions: The (N, 3) or (N, 2) center positions.
+            headings: The (N,) headings.
+            speeds: The (N,) speeds.
+            dimensions: The (N, 3) lengths, widths and heights.
+            source: The source of truth of all of the vehicles, or of each vehicle.
+            vehicle_config_types: The key into `VEHICLE_CONFIGS` of all of the
+                vehicles, or of each vehicle.
+            dt: The time step of the provider.
+        """
+        count = len(vehicle_ids)
+        array = np.zeros(count, dtype=VEHICLE_STATE_DTYPE)
+        if count:
+            positions = np.asarray(positions, dtype=np.float64).reshape(count, -1)
+            array["position"][:, : positions.shape[1]] = positions
+            array["heading"] = headings
+            array["speed"] = speeds
+            array["dimensions"] = dimensions
+
+        state = cls.__new__(cls)
+        state.dt = dt
+        state._ids = _object_array(list(vehicle_ids))
+        state._sources = _object_array(
+            [source] * count if isinstance(source, str) else list(source)
+        )
+        state._vehicle_config_types = _object_array(
+            [vehicle_config_types] * count
+            if isinstance(vehicle_config_types, str)
+            else list(vehicle_config_types)
+        )
+        state._array = array
+        state._states = [None] * count
+        state._lazy = count > 0
+        return state
+
+    @classmethod
+    def from_vehicle_states(
+        cls, vehicles: Sequence[VehicleState], dt: Optional[float] = None
+    ) -> "ProviderState":
+        """Build a state from vehicle states, filling the columns in one pass. The
+        given states are kept as they are, along with any fields (e.g. velocities)
+        that the columns do not hold.
+        """
+        vehicles = list(vehicles)
+        state = cls.from_arrays(
+            vehicle_ids=[v.vehicle_id for v in vehicles],
+            positions=np.array([v.pose.position for v in vehicles]),
+            headings=np.array([v.pose.heading for v in vehicles]),
+            speeds=np.array([v.speed for v in vehicles]),
+            dimensions=np.array(
+                [
+                    [np.nan if d is None else d for d in v.dimensions.as_lwh]
+                    for v in vehicles
+                ]
+            ),
+            source=[v.source for v in vehicles],
+            vehicle_config_types=[v.vehicle_config_type for v in vehicles],
+            dt=dt,
+        )
+        state._states = vehicles
+        state._lazy = False
+        return state
+
+    @property
+    def vehicles(self) -> List[VehicleState]:
+        """The vehicle states. Use `merge` and `filter` to change the vehicles."""
+        if self._lazy:
+            for idx, vehicle_state in enumerate(self._states):
+                if vehicle_state is None:
+                    self._states[idx] = self._vehicle_state_from_array(idx)
+            self._lazy = False
+        return self._states
 
-    vehicles: List[VehicleState] = field(default_factory=list)
-    dt: Optional[float] = None  # most Providers can leave this blank
+    @vehicles.setter
+    def vehicles(self, vehicles: Sequence[VehicleState]):
+        self._states = list(vehicles)
+        self._ids = _object_array([v.vehicle_id for v in self._states])
+        self._sources = _object_array([v.source for v in self._states])
+        self._vehicle_config_types = _object_array(
+            [v.vehicle_config_type for v in self._states]
+        )
+        self._array = None
+        self._lazy = False
+
+    def vehicle_at(self, idx: int) -> VehicleState:
+        """The state of the vehicle in the given row."""
+        vehicle_state = self._states[idx]
+        if vehicle_state is None:
+            vehicle_state = self._states[idx] = self._vehicle_state_from_array(idx)
+        return vehicle_state
+
+    def _vehicle_state_from_array(self, idx: int) -> VehicleState:
+        row = self._array[idx]
+        return VehicleState(
+            vehicle_id=self._ids[idx],
+            vehicle_config_type=self._vehicle_config_types[idx],
+            pose=Pose.from_center(row["position"], Heading(row["heading"])),
+            dimensions=Dimensions(*row["dimensions"].tolist()),
+            speed=float(row["speed"]),
+            source=self._sources[idx],
+        )
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def vehicle_ids(self) -> np.ndarray:
+        """The vehicle ids, an object array."""
+        return self._ids
+
+    @property
+    def sources(self) -> np.ndarray:
+        """The source of truth of each vehicle, an object array."""
+        return self._sources
+
+    @property
+    def vehicle_config_types(self) -> np.ndarray:
+        """The vehicle config type of each vehicle, an object array."""
+        return self._vehicle_config_types
+
+    @property
+    def array(self) -> np.ndarray:
+        """The positions, headings, speeds and dimensions of the vehicles as a
+        structured array, see `VEHICLE_STATE_DTYPE`.
+        """
+        if self._array is None:
+            array = np.empty(len(self._states), dtype=VEHICLE_STATE_DTYPE)
+            for idx, vehicle_state in enumerate(self._states):
+                dimensions = vehicle_state.dimensions
+                array[idx] = (
+                    vehicle_state.pose.position,
+                    vehicle_state.pose.heading,
+                    vehicle_state.speed,
+                    (
+                        np.nan if dimensions.length is None else dimensions.length,
+                        np.nan if dimensions.width is None else dimensions.width,
+                        np.nan if dimensions.height is None else dimensions.height,
+                    ),
+                )
+            self._array = array
+        return self._array
+
+    def contains(self, vehicle_ids: Iterable[str]) -> np.ndarray:
+        """A mask of the vehicles with one of the given ids."""
+        # Hashing beats `np.isin`, which sorts the (object) id arrays.
+        vehicle_ids = (
+            vehicle_ids
+            if isinstance(vehicle_ids, (set, frozenset))
+            else set(vehicle_ids)
+        )
+        return np.fromiter(
+            (vehicle_id in vehicle_ids for vehicle_id in self._ids),
+            dtype=bool,
+            count=len(self._ids),
+        )
 
     def merge(self, other: "ProviderState"):
         """Merge state with another provider's state."""
-        our_vehicles = {v.vehicle_id for v in self.vehicles}
-        other_vehicles = {v.vehicle_id for v in other.vehicles}
-        assert our_vehicles.isdisjoint(other_vehicles)
+        assert not other.contains(self._ids).any()
 
-        self.vehicles += other.vehicles
+        if self._array is not None or other._array is not None:
+            self._array = np.concatenate((self.array, other.array))
+        self._ids = np.concatenate((self._ids, other._ids))
+        self._sources = np.concatenate((self._sources, other._sources))
+        self._vehicle_config_types = np.concatenate(
+            (self._vehicle_config_types, other._vehicle_config_types)
+        )
+        self._states = self._states + other._states
+        self._lazy = self._lazy or other._lazy
         self.dt = max(self.dt, other.dt, key=lambda x: x if x else 0)
 
-    def filter(self, vehicle_ids):
-        """Filter vehicle states down to the given vehicles."""
-        provider_vehicle_ids = [v.vehicle_id for v in self.vehicles]
-        for v_id in vehicle_ids:
-            try:
-                index = provider_vehicle_ids.index(v_id)
-                del provider_vehicle_ids[index]
-                del self.vehicles[index]
-            except ValueError:
-                continue
+    def filter(self, vehicle_ids: Iterable[str]):
+        """Filter out the given vehicles."""
+        keep = ~self.contains(vehicle_ids)
+        if keep.all():
+            return
+        self._ids = self._ids[keep]
+        self._sources = self._sources[keep]
+        self._vehicle_config_types = self._vehicle_config_types[keep]
+        if self._array is not None:
+            self._array = self._array[keep]
+        self._states = [
+            vehicle_state for vehicle_state, kept in zip(self._states, keep) if kept
+        ]
+        self._lazy = self._lazy and any(s is None for s in self._states)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ProviderState):
+            return NotImplemented
+        return self.dt == other.dt and self.vehicles == other.vehicles
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ProviderState(vehicles={self.vehicles!r}, dt={self.dt!r})"
 
 
 class Provider:
@@ -284,7 +284,7 @@ class Renderer:
 
     def remove_vehicle_node(self, vid: str):
         """Remove a vehicle node"""
-        vehicle_path = self._vehicle_nodes.get(vid, None)
+        vehicle_path = self._vehicle_nodes.pop(vid, None)
         if not vehicle_path:
             self._log.warning(f"Renderer ignoring invalid vehicle id: {vid}")
             return
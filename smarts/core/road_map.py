@@ -22,6 +22,7 @@
 from __future__ import annotations
 
 import math
+from collections import abc
 from dataclasses import dataclass
 from typing import List, Optional, Sequence, Set, Tuple
 
@@ -616,3 +617,55 @@ class Waypoint:
     def dist_to(self, p) -> float:
         """Calculates straight line distance to the given 2D point"""
         return np.linalg.norm(self.pos - p[: len(self.pos)])
+
+
+WAYPOINT_DTYPE = np.dtype(
+    [
+        ("pos", np.float64, (2,)),
+        ("heading", np.float64),
+        ("lane_width", np.float64),
+        ("speed_limit", np.float64),
+        ("lane_index", np.int32),
+    ]
+)
+"""The structured array layout of a `WaypointPath`."""
+
+
+class WaypointPath(abc.Sequence):
+    """A path of waypoints stored as a structured array (see `WAYPOINT_DTYPE`) with
+    the lane ids alongside. It behaves like a list of `Waypoint`s which are only
+    created when accessed. Slicing returns a `WaypointPath` sharing the arrays.
+    """
+
+    __slots__ = ("array", "lane_ids")
+
+    def __init__(self, array: np.ndarray, lane_ids: np.ndarray):
+        assert len(array) == len(lane_ids)
+        self.array = array
+        self.lane_ids = lane_ids
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return WaypointPath(self.array[idx], self.lane_ids[idx])
+        row = self.array[idx]
+        return Waypoint(
+            pos=row["pos"].copy(),
+            heading=Heading(row["heading"]),
+            lane_id=self.lane_ids[idx],
+            lane_width=row["lane_width"],
+            speed_limit=row["speed_limit"],
+            lane_index=int(row["lane_index"]),
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, abc.Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"WaypointPath({list(self)!r})"
@@ -23,10 +23,21 @@ import os
 import pickle
 import random
 import uuid
-from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from itertools import cycle, product
 from pathlib import Path
-from typing import Any, Dict, Generator, List, Optional, Sequence, Tuple
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import cloudpickle
 import numpy as np
@@ -54,6 +65,44 @@ from smarts.sstudio.types import MapSpec
 from smarts.sstudio.types import Via as SSVia
 
 
+class _ScenarioResources(NamedTuple):
+    surface_patches: List[Dict[str, Any]]
+    agent_missions: Sequence[Optional[Mission]]
+    random_agent_missions: bool
+    social_agents_info: Sequence[Dict[str, Tuple[SocialAgent, Mission]]]
+    routes: List[str]
+    traffic_histories: List[os.DirEntry]
+
+
+# The resources discovered in each scenario root, by the root and the agents to be
+# briefed, with the least recently used first.
+_SCENARIO_RESOURCES: "OrderedDict[Tuple[str, Tuple[str, ...]], _ScenarioResources]" = (
+    OrderedDict()
+)
+_MAX_CACHED_SCENARIO_RESOURCES = 1024
+
+
+class _ScenarioPrefetcher(Iterator["Scenario"]):
+    """Iterates over scenarios while the next scenario is constructed in a background
+    thread.
+    """
+
+    def __init__(self, scenarios: Iterator["Scenario"]):
+        self._scenarios = scenarios
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="scenario-prefetch"
+        )
+        self._next_scenario = self._executor.submit(next, self._scenarios, None)
+
+    def __next__(self) -> "Scenario":
+        scenario = self._next_scenario.result()
+        if scenario is None:
+            self._executor.shutdown(wait=False)
+            raise StopIteration
+        self._next_scenario = self._executor.submit(next, self._scenarios, None)
+        return scenario
+
+
 class Scenario:
     """The purpose of the Scenario is to provide an aggregate of all
     code/configuration/assets that is specialized to a scenario using SUMO.
@@ -139,7 +188,8 @@ class Scenario:
         agents_to_be_briefed: Sequence[str],
         shuffle_scenarios: bool = True,
         circular: bool = True,
-    ) -> Generator["Scenario", None, None]:
+        prefetch: bool = True,
+    ) -> Iterator["Scenario"]:
         """Generate a cycle of scenario configurations.
 
         Args:
@@ -148,8 +198,11 @@ class Scenario:
                 can use) OR a directory of scenarios to sample from.
             agents_to_be_briefed:
                 Agent IDs that will be assigned a mission ("briefed" on a mission).
+            prefetch:
+                Construct the next scenario in a background thread while the current
+                one is in use.
         Returns:
-            A generator that serves up Scenarios.
+            An iterator that serves up Scenarios.
         """
         scenario_roots = Scenario.get_scenario_list(scenarios_or_scenarios_dirs)
         if shuffle_scenarios:
@@ -157,13 +210,13 @@ class Scenario:
         if circular:
             scenario_roots = cycle(scenario_roots)
         return Scenario.variations_for_all_scenario_roots(
-            scenario_roots, agents_to_be_briefed, shuffle_scenarios
+            scenario_roots, agents_to_be_briefed, shuffle_scenarios, prefetch
         )
 
     @staticmethod
     def variations_for_all_scenario_roots(
-        scenario_roots, agents_to_be_briefed, shuffle_scenarios=True
-    ) -> Generator["Scenario", None, None]:
+        scenario_roots, agents_to_be_briefed, shuffle_scenarios=True, prefetch=False
+    ) -> Iterator["Scenario"]:
         """Convert scenario roots to concrete scenarios.
         Args:
             scenario_roots:
@@ -172,17 +225,36 @@ class Scenario:
                 Agent IDs that will be assigned a mission ("briefed" on a mission).
             shuffle_scenarios:
                 Return scenarios in a pseudo-random order.
+            prefetch:
+                Construct the next scenario in a background thread while the current
+                one is in use.
         Returns:
-            A generator that serves up Scenarios.
+            An iterator that serves up Scenarios.
         """
-        for scenario_root in scenario_roots:
-            surface_patches = Scenario.discover_friction_map(scenario_root)
+        if not prefetch:
+            return Scenario._variations_for_all_scenario_roots(
+                scenario_roots, agents_to_be_briefed, shuffle_scenarios, random
+            )
+        # The background thread draws from its own generator so that the variations
+        # do not depend on when the thread runs.
+        rng = random.Random(random.getrandbits(64))
+        return _ScenarioPrefetcher(
+            Scenario._variations_for_all_scenario_roots(
+                scenario_roots, agents_to_be_briefed, shuffle_scenarios, rng
+            )
+        )
 
-            agent_missions = Scenario.discover_agent_missions(
-                scenario_root, agents_to_be_briefed
+    @staticmethod
+    def _variations_for_all_scenario_roots(
+        scenario_roots, agents_to_be_briefed, shuffle_scenarios, rng
+    ) -> Generator["Scenario", None, None]:
+        for scenario_root in scenario_roots:
+            resources = Scenario._discover_resources(
+                scenario_root, agents_to_be_briefed, rng
             )
-            agent_missions = [dict(zip(agents_to_be_briefed, agent_missions))]
-            social_agent_infos = Scenario._discover_social_agents_info(scenario_root)
+            surface_patches = resources.surface_patches
+
+            agent_missions = [dict(zip(agents_to_be_briefed, resources.agent_missions))]
             social_agents = [
                 {
                     agent_id: (agent.to_agent_spec(), (agent, mission))
@@ -191,17 +263,15 @@ class Scenario:
                         mission,
                     ) in per_episode_social_agent_infos.items()
                 }
-                for per_episode_social_agent_infos in social_agent_infos
+                for per_episode_social_agent_infos in resources.social_agents_info
             ]
 
             # `or [None]` so that product(...) will not return an empty result
             # but insted a [(..., `None`), ...].
-            routes = Scenario.discover_routes(scenario_root) or [None]
+            routes = resources.routes or [None]
             agent_missions = agent_missions or [None]
             social_agents = social_agents or [None]
-            traffic_histories = Scenario.discover_traffic_histories(scenario_root) or [
-                None
-            ]
+            traffic_histories = resources.traffic_histories or [None]
 
             roll_routes = 0
             roll_agent_missions = 0
@@ -209,10 +279,10 @@ class Scenario:
             roll_traffic_histories = 0
 
             if shuffle_scenarios:
-                roll_routes = random.randint(0, len(routes))
-                roll_agent_missions = random.randint(0, len(agent_missions))
-                roll_social_agents = random.randint(0, len(social_agents))
-                roll_traffic_histories = 0  # random.randint(0, len(traffic_histories))
+                roll_routes = rng.randint(0, len(routes))
+                roll_agent_missions = rng.randint(0, len(agent_missions))
+                roll_social_agents = rng.randint(0, len(social_agents))
+                roll_traffic_histories = 0  # rng.randint(0, len(traffic_histories))
 
             for (
                 concrete_route,
@@ -252,6 +322,58 @@ class Scenario:
                     traffic_history=concrete_traffic_history,
                 )
 
+    @staticmethod
+    def _discover_resources(
+        scenario_root, agents_to_be_briefed, rng
+    ) -> _ScenarioResources:
+        """Discovers the resources of a scenario root once and then serves them from
+        the catalog. Missions with random offsets are resolved again on every visit.
+        """
+        key = (scenario_root, tuple(agents_to_be_briefed))
+        resources = _SCENARIO_RESOURCES.get(key)
+        if resources is not None:
+            _SCENARIO_RESOURCES.move_to_end(key)
+            if resources.random_agent_missions:
+                resources = resources._replace(
+                    agent_missions=Scenario.discover_agent_missions(
+                        scenario_root, agents_to_be_briefed, rng
+                    )
+                )
+            return resources
+
+        missions_file = os.path.join(scenario_root, "missions.pkl")
+        random_agent_missions = False
+        if os.path.exists(missions_file):
+            with open(missions_file, "rb") as f:
+                random_agent_missions = any(
+                    Scenario._has_random_offset(actor_and_mission.mission)
+                    for actor_and_mission in pickle.load(f)
+                )
+
+        resources = _ScenarioResources(
+            surface_patches=Scenario.discover_friction_map(scenario_root),
+            agent_missions=Scenario.discover_agent_missions(
+                scenario_root, agents_to_be_briefed, rng
+            ),
+            random_agent_missions=random_agent_missions,
+            social_agents_info=Scenario._discover_social_agents_info(
+                scenario_root, rng
+            ),
+            routes=Scenario.discover_routes(scenario_root),
+            traffic_histories=Scenario.discover_traffic_histories(scenario_root),
+        )
+        _SCENARIO_RESOURCES[key] = resources
+        if len(_SCENARIO_RESOURCES) > _MAX_CACHED_SCENARIO_RESOURCES:
+            _SCENARIO_RESOURCES.popitem(last=False)
+        return resources
+
+    @staticmethod
+    def _has_random_offset(mission) -> bool:
+        if isinstance(mission, sstudio_types.EndlessMission):
+            return mission.begin[2] == "random"
+        route = getattr(mission, "route", None)
+        return route is not None and "random" in (route.begin[2], route.end[2])
+
     @staticmethod
     def discover_agent_missions_count(scenario_root):
         """Retrieve the agent missions from the given scenario directory."""
@@ -263,7 +385,7 @@ class Scenario:
         return 0
 
     @staticmethod
-    def discover_agent_missions(scenario_root, agents_to_be_briefed):
+    def discover_agent_missions(scenario_root, agents_to_be_briefed, rng=random):
         """Returns a sequence of {agent_id: mission} mappings.
 
         If no missions are discovered we generate random ones. If there is only one
@@ -282,7 +404,7 @@ class Scenario:
                 missions = pickle.load(f)
 
             missions = [
-                Scenario._extract_mission(actor_and_mission.mission, road_map)
+                Scenario._extract_mission(actor_and_mission.mission, road_map, rng)
                 for actor_and_mission in missions
             ]
 
@@ -326,9 +448,8 @@ class Scenario:
         return surface_patches
 
     @staticmethod
-    @lru_cache(maxsize=16)
     def _discover_social_agents_info(
-        scenario,
+        scenario, rng=random
     ) -> Sequence[Dict[str, Tuple[SocialAgent, Mission]]]:
         """Loops through the social agent mission pickles, instantiating corresponding
         implementations for the given types. The output is a list of
@@ -372,7 +493,7 @@ class Scenario:
 
                 actor = mission_and_actor.actor
                 extracted_mission = Scenario._extract_mission(
-                    mission_and_actor.mission, road_map
+                    mission_and_actor.mission, road_map, rng
                 )
                 namespace = os.path.basename(missions_file_path)
                 namespace = os.path.splitext(namespace)[0]
@@ -622,7 +743,7 @@ class Scenario:
         ]
 
     @staticmethod
-    def _extract_mission(mission, road_map):
+    def _extract_mission(mission, road_map, rng=random):
         """Takes a sstudio.types.(Mission, EndlessMission, etc.) and converts it to
         the corresponding SMARTS mission types.
         """
@@ -636,7 +757,7 @@ class Scenario:
             elif offset == "max":
                 return lane_length
             elif offset == "random":
-                return random.uniform(epsilon, lane_length)
+                return rng.uniform(epsilon, lane_length)
             else:
                 return float(offset)
 
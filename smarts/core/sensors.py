@@ -19,7 +19,7 @@
 # THE SOFTWARE.
 import logging
 import time
-from collections import deque, namedtuple
+from collections import abc, deque, namedtuple
 from dataclasses import dataclass
 from functools import lru_cache
 from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
@@ -62,6 +62,90 @@ class VehicleObservation(NamedTuple):
     """The index of the nearest lane on the road nearest to this vehicle."""
 
 
+VEHICLE_OBSERVATION_DTYPE = np.dtype(
+    [
+        ("position", np.float64, (3,)),
+        ("bounding_box", np.float64, (3,)),
+        ("heading", np.float64),
+        ("speed", np.float64),
+        ("lane_index", np.int32),
+    ]
+)
+"""The structured array layout of `VehicleObservations`. `bounding_box` holds the
+length, width and height and `lane_index` is -1 if the vehicle is not on a lane."""
+
+
+class VehicleObservations(abc.Sequence):
+    """Perceived vehicles stored as a structured array (see
+    `VEHICLE_OBSERVATION_DTYPE`) with the ids alongside. It behaves like a list of
+    `VehicleObservation`s which are only created when accessed. Slicing returns a
+    `VehicleObservations` sharing the arrays.
+    """
+
+    __slots__ = ("array", "ids", "road_ids", "lane_ids")
+
+    def __init__(
+        self,
+        array: np.ndarray,
+        ids: np.ndarray,
+        road_ids: np.ndarray,
+        lane_ids: np.ndarray,
+    ):
+        assert len(array) == len(ids) == len(road_ids) == len(lane_ids)
+        self.array = array
+        self.ids = ids
+        self.road_ids = road_ids
+        self.lane_ids = lane_ids
+
+    @classmethod
+    def from_vehicle_states(cls, vehicle_states, lanes) -> "VehicleObservations":
+        """Builds the arrays from vehicle states and the lane nearest to each of them,
+        or None if there is no lane.
+        """
+        array = np.empty(len(vehicle_states), dtype=VEHICLE_OBSERVATION_DTYPE)
+        ids = np.empty(len(vehicle_states), dtype=object)
+        road_ids = np.empty(len(vehicle_states), dtype=object)
+        lane_ids = np.empty(len(vehicle_states), dtype=object)
+        for idx, (vehicle_state, lane) in enumerate(zip(vehicle_states, lanes)):
+            dimensions = vehicle_state.dimensions
+            array[idx] = (
+                vehicle_state.pose.position,
+                (dimensions.length, dimensions.width, dimensions.height),
+                vehicle_state.pose.heading,
+                vehicle_state.speed,
+                lane.index if lane else -1,
+            )
+            ids[idx] = vehicle_state.vehicle_id
+            if lane:
+                road_ids[idx] = lane.road.road_id
+                lane_ids[idx] = lane.lane_id
+        return cls(array, ids, road_ids, lane_ids)
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return VehicleObservations(
+                self.array[idx], self.ids[idx], self.road_ids[idx], self.lane_ids[idx]
+            )
+        row = self.array[idx]
+        lane_id = self.lane_ids[idx]
+        return VehicleObservation(
+            id=self.ids[idx],
+            position=row["position"].copy(),
+            bounding_box=Dimensions(*row["bounding_box"].tolist()),
+            heading=Heading(row["heading"]),
+            speed=float(row["speed"]),
+            road_id=self.road_ids[idx],
+            lane_id=lane_id,
+            lane_index=int(row["lane_index"]) if lane_id is not None else None,
+        )
+
+    def __repr__(self) -> str:
+        return f"VehicleObservations({list(self)!r})"
+
+
 class EgoVehicleObservation(NamedTuple):
     """Perceived ego vehicle information."""
 
@@ -237,8 +321,20 @@ class Sensors:
     @staticmethod
     def observe(sim, agent_id, sensor_state, vehicle) -> Tuple[Observation, bool]:
         """Generate observations for the given agent around the given vehicle."""
+        interface = sim.agent_manager.agent_interface_for_agent_id(agent_id)
         neighborhood_vehicles = None
-        if vehicle.subscribed_to_neighborhood_vehicles_sensor:
+        if vehicle.subscribed_to_neighborhood_vehicles_sensor and (
+            interface.compact_observations
+        ):
+            nvs = vehicle.neighborhood_vehicles_sensor()
+            neighborhood_vehicles = VehicleObservations.from_vehicle_states(
+                nvs,
+                [
+                    sim.road_map.nearest_lane(nv.pose.point, radius=vehicle.length)
+                    for nv in nvs
+                ],
+            )
+        elif vehicle.subscribed_to_neighborhood_vehicles_sensor:
             neighborhood_vehicles = []
             for nv in vehicle.neighborhood_vehicles_sensor():
                 nv_lane = sim.road_map.nearest_lane(
@@ -19,6 +19,7 @@
 # THE SOFTWARE.
 import importlib.resources as pkg_resources
 import logging
+import math
 import os
 import warnings
 from collections import defaultdict
@@ -30,7 +31,7 @@ from scipy.spatial.distance import cdist
 from envision import types as envision_types
 from envision.client import Client as EnvisionClient
 from smarts import VERSION
-from smarts.core.chassis import BoxChassis
+from smarts.core.chassis import AckermannChassis, BoxChassis
 from smarts.core.plan import Plan
 
 from . import models
@@ -65,6 +66,18 @@ logging.basicConfig(
 )
 
 MAX_PYBULLET_FREQ = 240
+# The lowest physics substep frequency used when `pybullet_substep_travel` lets
+# substepping adapt to vehicle speeds. The chassis controllers are tuned for
+# `MAX_PYBULLET_FREQ` and become unstable well below this.
+MIN_PYBULLET_FREQ = 60
+# Kinematic social vehicles are given a physics body within
+# `kinematic_social_vehicle_radius` of an agent and only lose it again this many
+# meters further out, so vehicles on the boundary do not change on every step.
+KINEMATIC_DEMOTION_MARGIN = 10
+# A warm reset keeps the bullet world, which only frees some resources (such as the
+# collision shapes of removed vehicles) when it is reset. So after this many warm
+# resets in a row the next reset is a full teardown and setup.
+MAX_CONSECUTIVE_WARM_RESETS = 50
 
 
 class SMARTSNotSetupError(Exception):
@@ -90,6 +103,17 @@ class SMARTS:
         reset_agents_only: When specified the simulation will continue use of the current scenario.
         zoo_addrs: The (ip:port) values of remote agent workers for externally hosted agents.
         external_provider: Creates a special provider `SMARTS.external_provider` that allows for inserting state.
+        kinematic_social_vehicle_radius: If given, social vehicles further than this from every agent
+            vehicle, bubble and pending trap are kept as kinematic records (see
+            `SMARTS.kinematic_social_vehicle_states`) without a physics body. They are given one once
+            they come within this radius. It should exceed the range of the agents' sensors.
+        pybullet_substep_travel: If given, the number of physics substeps per step adapts so that
+            no dynamic chassis moves further than this many meters in a substep, between
+            `MIN_PYBULLET_FREQ` and `MAX_PYBULLET_FREQ`. While an agent vehicle is in a collision
+            the physics substeps at `MAX_PYBULLET_FREQ`. If not given it always does.
+        warm_reset: When the next scenario uses the same map as the current one, reset only
+            what differs between them. The bullet world, its ground plane and the rendered
+            map are kept, and SUMO reloads the new routes in its running process.
         config: The simulation configuration file for unexposed configuration.
     """
 
@@ -103,6 +127,9 @@ class SMARTS:
         reset_agents_only: bool = False,
         zoo_addrs: Optional[Tuple[str, int]] = None,
         external_provider: bool = False,
+        kinematic_social_vehicle_radius: Optional[float] = None,
+        pybullet_substep_travel: Optional[float] = None,
+        warm_reset: bool = True,
     ):
         self._log = logging.getLogger(self.__class__.__name__)
         self._sim_id = Id.new("smarts")
@@ -116,10 +143,15 @@ class SMARTS:
         self._external_provider: ExternalProvider = None
         self._resetting = False
         self._reset_required = False
+        self._warm_reset = warm_reset
+        self._warm_reset_count = 0
 
         assert fixed_timestep_sec is None or fixed_timestep_sec > 0
         self.fixed_timestep_sec: Optional[float] = fixed_timestep_sec
         self._last_dt = fixed_timestep_sec
+        assert pybullet_substep_travel is None or pybullet_substep_travel > 0
+        self._pybullet_substep_travel = pybullet_substep_travel
+        self._pybullet_substeps = None
 
         self._elapsed_sim_time = 0
         self._total_sim_time = 0
@@ -178,6 +210,14 @@ class SMARTS:
         self._vehicle_collisions = defaultdict(list)  # list of `Collision` instances
         self._vehicle_states = []
 
+        assert (
+            kinematic_social_vehicle_radius is None
+            or kinematic_social_vehicle_radius > 0
+        )
+        self._kinematic_social_vehicle_radius = kinematic_social_vehicle_radius
+        # Social vehicles that are far from all agents and have no physics body
+        self._kinematic_social_vehicles: Dict[str, VehicleState] = {}
+
         self._bubble_manager = None
         self._trap_manager: Optional[TrapManager] = None
 
@@ -284,7 +324,7 @@ class SMARTS:
         # want these during their observation/reward computations.
         # This is a hack to give us some short term perf wins. Longer term we
         # need to expose better support for batched computations
-        self._vehicle_states = [v.state for v in self._vehicle_index.vehicles]
+        self._vehicle_states = self._all_vehicle_states()
 
         # Agents
         self._log.info("Stepping through sensors")
@@ -406,6 +446,11 @@ class SMARTS:
             self._agent_manager.init_ego_agents(self)
             if self._renderer:
                 self._sync_vehicles_to_renderer()
+        elif self._can_warm_reset(scenario):
+            self._warm_reset_count += 1
+            self._teardown_episode(remove_vehicle_bodies=True)
+            self._scenario = scenario
+            self._setup_episode(scenario)
         else:
             self.teardown()
             self.setup(scenario)
@@ -422,7 +467,7 @@ class SMARTS:
         self._step_count = 0
         self._reset_required = False
 
-        self._vehicle_states = [v.state for v in self._vehicle_index.vehicles]
+        self._vehicle_states = self._all_vehicle_states()
         observations, _, _, _ = self._agent_manager.observe(self)
         observations_for_ego = self._agent_manager.reset_agents(observations)
 
@@ -437,17 +482,36 @@ class SMARTS:
 
         return observations_for_ego
 
+    def _can_warm_reset(self, scenario: Scenario) -> bool:
+        if (
+            not self._warm_reset
+            or not self._is_setup
+            or self._reset_required
+            or self._warm_reset_count >= MAX_CONSECUTIVE_WARM_RESETS
+        ):
+            return False
+        current_plane_exists = os.path.exists(self._scenario.plane_filepath)
+        next_plane_exists = os.path.exists(scenario.plane_filepath)
+        return scenario.road_map_hash == self._scenario.road_map_hash and (
+            scenario.plane_filepath == self._scenario.plane_filepath
+            or not (current_plane_exists or next_plane_exists)
+        )
+
     def setup(self, scenario: Scenario):
         """Setup the next scenario."""
         self._check_valid()
         self._scenario = scenario
 
-        self._bubble_manager = BubbleManager(scenario.bubbles, scenario.road_map)
-        self._trap_manager = TrapManager(scenario)
-
         if self._renderer:
             self._renderer.setup(scenario)
         self._setup_bullet_client(self._bullet_client)
+        self._setup_episode(scenario)
+
+    def _setup_episode(self, scenario: Scenario):
+        # Everything but the bullet world and the renderer, which only depend on the map
+        self._bubble_manager = BubbleManager(scenario.bubbles, scenario.road_map)
+        self._trap_manager = TrapManager(scenario)
+
         provider_state = self._setup_providers(self._scenario)
         self._vehicle_index.load_controller_params(
             scenario.controller_parameters_filepath
@@ -611,6 +675,7 @@ class SMARTS:
             solverResidualThreshold=0.001,
             # warmStartingFactor=0.99
         )
+        self._pybullet_substeps = int(self._pybullet_period * MAX_PYBULLET_FREQ)
 
         client.setGravity(0, 0, -9.8)
         self._map_bb = None
@@ -651,15 +716,27 @@ class SMARTS:
 
     def teardown(self):
         """Clean up episode resources."""
-        if self._agent_manager is not None:
-            self._agent_manager.teardown()
-        if self._vehicle_index is not None:
-            self._vehicle_index.teardown()
+        self._teardown_episode()
 
         if self._bullet_client is not None:
             self._bullet_client.resetSimulation()
         if self._renderer is not None:
             self._renderer.teardown()
+
+        self._ground_bullet_id = None
+        self._warm_reset_count = 0
+        self._is_setup = False
+
+    def _teardown_episode(self, remove_vehicle_bodies: bool = False):
+        if self._agent_manager is not None:
+            self._agent_manager.teardown()
+        if self._vehicle_index is not None:
+            if remove_vehicle_bodies:
+                # The bullet world is kept so the vehicles' bodies must be removed from it
+                self._teardown_vehicles(self._vehicle_index.vehicle_ids())
+            self._vehicle_index.teardown()
+        self._kinematic_social_vehicles = {}
+
         if self._traffic_sim is not None:
             self._traffic_sim.teardown()
         self._teardown_providers()
@@ -671,9 +748,6 @@ class SMARTS:
             self._trap_manager.teardown()
             self._trap_manager = None
 
-        self._ground_bullet_id = None
-        self._is_setup = False
-
     def destroy(self):
         """Destroy the simulation. Cleans up all remaining simulation resources."""
         if self._is_destroyed:
@@ -865,8 +939,63 @@ class SMARTS:
         self._vehicle_index.teardown_vehicles_by_vehicle_ids(vehicle_ids)
         self.teardown_agents_without_vehicles(shadow_and_controlling_agents)
 
+    def _all_vehicle_states(self) -> List[VehicleState]:
+        return [v.state for v in self._vehicle_index.vehicles] + list(
+            self._kinematic_social_vehicles.values()
+        )
+
+    @property
+    def kinematic_social_vehicle_states(self) -> List[VehicleState]:
+        """The states of the social vehicles that are currently simulated without a
+        physics body, see `kinematic_social_vehicle_radius`.
+        """
+        return list(self._kinematic_social_vehicles.values())
+
+    def _kinematic_social_vehicle_mask(
+        self, provider_state: ProviderState, agent_vehicle_ids: Set[str]
+    ) -> np.ndarray:
+        """Find the social vehicles in the provider state that do not need a physics
+        body. These are further than `kinematic_social_vehicle_radius` from every
+        agent vehicle, bubble and trap of a pending agent. Physical vehicles keep
+        their body until they are `KINEMATIC_DEMOTION_MARGIN` further away.
+        """
+        radius = self._kinematic_social_vehicle_radius
+        if radius is None:
+            return np.zeros(len(provider_state), dtype=bool)
+        mask = ~provider_state.contains(agent_vehicle_ids)
+
+        anchors, radii = [], []
+        for vehicle_id in agent_vehicle_ids:
+            anchors.append(self._vehicle_index.vehicle_by_id(vehicle_id).position[:2])
+            radii.append(radius)
+        zones = []
+        if self._bubble_manager is not None:
+            zones += [
+                bubble.airlock_geometry for bubble in self._bubble_manager.bubbles
+            ]
+        if self._trap_manager is not None:
+            traps = self._trap_manager.traps
+            zones += [
+                traps[agent_id].geometry
+                for agent_id in self._agent_manager.pending_agent_ids
+                if traps.get(agent_id) is not None
+            ]
+        for zone in zones:
+            min_x, min_y, max_x, max_y = zone.bounds
+            anchors.append(((min_x + max_x) / 2, (min_y + max_y) / 2))
+            radii.append(radius + math.hypot(max_x - min_x, max_y - min_y) / 2)
+        if not anchors:
+            return mask
+
+        distances = cdist(provider_state.array["position"][:, :2], np.array(anchors))
+        radii = np.array(radii)
+        near = (distances <= radii).any(axis=1)
+        far = (distances > radii + KINEMATIC_DEMOTION_MARGIN).all(axis=1)
+        physical = provider_state.contains(self._vehicle_index.social_vehicle_ids())
+        return mask & np.where(physical, far, ~near)
+
     def _pybullet_provider_sync(self, provider_state: ProviderState):
-        current_vehicle_ids = {v.vehicle_id for v in provider_state.vehicles}
+        current_vehicle_ids = set(provider_state.vehicle_ids)
         previous_sv_ids = self._vehicle_index.social_vehicle_ids()
         exited_vehicles = previous_sv_ids - current_vehicle_ids
         self._teardown_vehicles_and_agents(exited_vehicles)
@@ -874,7 +1003,27 @@ class SMARTS:
         # Update our pybullet world given this provider state
         dt = provider_state.dt or self._last_dt
         agent_vehicle_ids = self._vehicle_index.agent_vehicle_ids()
-        for vehicle in provider_state.vehicles:
+
+        kinematic = self._kinematic_social_vehicle_mask(
+            provider_state, agent_vehicle_ids
+        )
+        self._kinematic_social_vehicles = {}
+        demoted_vehicle_ids = set()
+        for idx in np.flatnonzero(kinematic):
+            vehicle = provider_state.vehicle_at(idx)
+            vehicle_id = vehicle.vehicle_id
+            if vehicle_id in previous_sv_ids:
+                if self._vehicle_index.vehicle_is_shadowed(vehicle_id):
+                    # Keep the body of vehicles that a bubble is watching
+                    kinematic[idx] = False
+                    continue
+                demoted_vehicle_ids.add(vehicle_id)
+            self._kinematic_social_vehicles[vehicle_id] = vehicle
+        if demoted_vehicle_ids:
+            self._teardown_vehicles(demoted_vehicle_ids)
+
+        for idx in np.flatnonzero(~kinematic):
+            vehicle = provider_state.vehicle_at(idx)
             vehicle_id = vehicle.vehicle_id
             # either this is a pybullet agent vehicle, or it is a social vehicle
             if vehicle_id in agent_vehicle_ids:
@@ -921,14 +1070,46 @@ class SMARTS:
                     social_vehicle.update_state(vehicle, dt=dt)
 
     def _step_pybullet(self):
-        self._bullet_client.stepSimulation()
-        pybullet_substeps = max(1, round(self._last_dt / self._pybullet_period)) - 1
-        for _ in range(pybullet_substeps):
-            for vehicle in self._vehicle_index.vehicles:
-                vehicle.chassis.reapply_last_control()
+        dynamic_chassis = [
+            vehicle.chassis
+            for vehicle in self._vehicle_index.vehicles
+            if isinstance(vehicle.chassis, AckermannChassis)
+        ]
+        if dynamic_chassis:
+            self._set_pybullet_substeps(self._pybullet_substeps_for(dynamic_chassis))
             self._bullet_client.stepSimulation()
+            pybullet_steps = max(1, round(self._last_dt / self._pybullet_period)) - 1
+            for _ in range(pybullet_steps):
+                for chassis in dynamic_chassis:
+                    chassis.reapply_last_control()
+                self._bullet_client.stepSimulation()
+        else:
+            # Nothing is moved by forces so rather than simulating the constraints
+            # pulling the kinematic bodies to their poses we place them there.
+            for vehicle in self._vehicle_index.vehicles:
+                vehicle.chassis.settle()
         for vehicle in self._vehicle_index.vehicles:
             vehicle.step(self._elapsed_sim_time)
+        AckermannChassis.read_bullet_states(dynamic_chassis)
+
+    def _pybullet_substeps_for(self, dynamic_chassis: List[AckermannChassis]) -> int:
+        max_substeps = max(1, int(self._pybullet_period * MAX_PYBULLET_FREQ))
+        if self._pybullet_substep_travel is None or any(
+            self._vehicle_collisions.values()
+        ):
+            return max_substeps
+        min_substeps = max(1, int(self._pybullet_period * MIN_PYBULLET_FREQ))
+        max_speed = max(chassis.speed for chassis in dynamic_chassis)
+        substeps = math.ceil(
+            max_speed * self._pybullet_period / self._pybullet_substep_travel
+        )
+        return min(max_substeps, max(min_substeps, substeps))
+
+    def _set_pybullet_substeps(self, substeps: int):
+        if substeps == self._pybullet_substeps:
+            return
+        self._bullet_client.setPhysicsEngineParameter(numSubSteps=substeps)
+        self._pybullet_substeps = substeps
 
     def _get_provider_state(self, source: str, action_space_pred) -> ProviderState:
         agent_ids = {
@@ -936,23 +1117,23 @@ class SMARTS:
             for agent_id, interface in self._agent_manager.agent_interfaces.items()
             if action_space_pred(interface.action_space)
         }
-        provider_state = ProviderState()
+        vehicles = []
         for vehicle_id in self._vehicle_index.agent_vehicle_ids():
             agent_id = self._vehicle_index.actor_id_from_vehicle_id(vehicle_id)
             if agent_id not in agent_ids:
                 continue
-            vehicle = self._vehicle_index.vehicle_by_id(vehicle_id)
-            provider_state.vehicles.append(
-                VehicleState(
-                    vehicle_id=vehicle.id,
-                    vehicle_config_type="passenger",
-                    pose=vehicle.pose,
-                    dimensions=vehicle.chassis.dimensions,
-                    speed=vehicle.speed,
-                    source=source,
-                )
-            )
-        return provider_state
+            vehicles.append(self._vehicle_index.vehicle_by_id(vehicle_id))
+        return ProviderState.from_arrays(
+            vehicle_ids=[vehicle.id for vehicle in vehicles],
+            positions=np.array([vehicle.pose.position for vehicle in vehicles]),
+            headings=np.array([vehicle.pose.heading for vehicle in vehicles]),
+            speeds=np.array([vehicle.speed for vehicle in vehicles]),
+            dimensions=np.array(
+                [vehicle.chassis.dimensions.as_lwh for vehicle in vehicles]
+            ),
+            source=source,
+            vehicle_config_types="passenger",
+        )
 
     @property
     def vehicle_index(self):
@@ -1231,6 +1412,7 @@ class SMARTS:
             self._vehicle_collisions.pop(vehicle_id, None)
 
     def _perform_agent_actions(self, agent_actions):
+        controls = defaultdict(list)
         for agent_id, action in agent_actions.items():
             agent_vehicles = self._vehicle_index.vehicles_by_actor_id(agent_id)
             if len(agent_vehicles) == 0:
@@ -1250,18 +1432,20 @@ class SMARTS:
                 sensor_state = self._vehicle_index.sensor_state_for_vehicle_id(
                     vehicle.id
                 )
-                # TODO: Support performing batched actions
-                Controllers.perform_action(
-                    self,
-                    agent_id,
-                    vehicle,
-                    vehicle_action,
-                    controller_state,
-                    sensor_state,
-                    agent_interface.action_space,
-                    agent_interface.vehicle_type,
+                controls[agent_interface.action_space].append(
+                    (
+                        agent_id,
+                        vehicle,
+                        vehicle_action,
+                        controller_state,
+                        sensor_state,
+                        agent_interface.vehicle_type,
+                    )
                 )
 
+        for action_space, space_controls in controls.items():
+            Controllers.perform_actions(self, action_space, space_controls)
+
     def _sync_vehicles_to_renderer(self):
         assert self._renderer
         for vehicle in self._vehicle_index.vehicles:
@@ -1332,7 +1516,7 @@ class SMARTS:
             self._setup_pybullet_ground_plane(self._bullet_client)
 
     def _try_emit_envision_state(self, provider_state: ProviderState, obs, scores):
-        if not self._envision:
+        if not self._envision or not self._envision.should_send(self._step_count):
             return
 
         traffic = {}
@@ -1341,78 +1525,73 @@ class SMARTS:
         heading = {}
         lane_ids = {}
         agent_vehicle_ids = self._vehicle_index.agent_vehicle_ids()
-        for v in provider_state.vehicles:
-            if v.vehicle_id in agent_vehicle_ids:
-                # this is an agent controlled vehicle
-                agent_id = self._vehicle_index.actor_id_from_vehicle_id(v.vehicle_id)
-                agent_obs = obs[agent_id]
-                is_boid_agent = self._agent_manager.is_boid_agent(agent_id)
-                vehicle_obs = agent_obs[v.vehicle_id] if is_boid_agent else agent_obs
-
-                if self._agent_manager.is_ego(agent_id):
-                    actor_type = envision_types.TrafficActorType.Agent
-                    mission_route_geometry = (
-                        self._vehicle_index.sensor_state_for_vehicle_id(
-                            v.vehicle_id
-                        ).plan.route.geometry
-                    )
-                else:
-                    actor_type = envision_types.TrafficActorType.SocialAgent
-                    mission_route_geometry = None
-
-                point_cloud = vehicle_obs.lidar_point_cloud or ([], [], [])
-                point_cloud = point_cloud[0]  # (points, hits, rays), just want points
-
-                # TODO: driven path should be read from vehicle_obs
-                driven_path = self._vehicle_index.vehicle_by_id(
-                    v.vehicle_id
-                ).driven_path_sensor()
-
-                road_waypoints = []
-                if vehicle_obs.road_waypoints:
-                    road_waypoints = [
-                        path
-                        for paths in vehicle_obs.road_waypoints.lanes.values()
-                        for path in paths
-                    ]
-                traffic[v.vehicle_id] = envision_types.TrafficActorState(
-                    name=self._agent_manager.agent_name(agent_id),
-                    actor_type=actor_type,
-                    vehicle_type=envision_types.VehicleType.Car,
-                    position=tuple(v.pose.position),
-                    heading=float(v.pose.heading),
-                    speed=v.speed,
-                    actor_id=envision_types.format_actor_id(
-                        agent_id,
-                        v.vehicle_id,
-                        is_multi=is_boid_agent,
-                    ),
-                    events=vehicle_obs.events,
-                    waypoint_paths=(vehicle_obs.waypoint_paths or []) + road_waypoints,
-                    point_cloud=point_cloud,
-                    driven_path=driven_path,
-                    mission_route_geometry=mission_route_geometry,
-                )
-                speed[agent_id] = v.speed
-                position[agent_id] = tuple(v.pose.as_position2d())
-                heading[agent_id] = float(v.pose.heading)
-                if (
-                    vehicle_obs.waypoint_paths
-                    and len(vehicle_obs.waypoint_paths[0]) > 0
-                ):
-                    lane_ids[agent_id] = vehicle_obs.waypoint_paths[0][0].lane_id
-            elif v.vehicle_id in self._vehicle_index.social_vehicle_ids():
-                # this is a social vehicle
-                veh_type = (
-                    v.vehicle_config_type if v.vehicle_config_type else v.vehicle_type
-                )
-                traffic[v.vehicle_id] = envision_types.TrafficActorState(
-                    actor_type=envision_types.TrafficActorType.SocialVehicle,
-                    vehicle_type=veh_type,
-                    position=tuple(v.pose.position),
-                    heading=float(v.pose.heading),
-                    speed=v.speed,
+        is_agent_vehicle = provider_state.contains(agent_vehicle_ids)
+        for idx in np.flatnonzero(is_agent_vehicle):
+            v = provider_state.vehicle_at(idx)
+            # this is an agent controlled vehicle
+            agent_id = self._vehicle_index.actor_id_from_vehicle_id(v.vehicle_id)
+            agent_obs = obs[agent_id]
+            is_boid_agent = self._agent_manager.is_boid_agent(agent_id)
+            vehicle_obs = agent_obs[v.vehicle_id] if is_boid_agent else agent_obs
+
+            if self._agent_manager.is_ego(agent_id):
+                actor_type = envision_types.TrafficActorType.Agent
+                mission_route_geometry = (
+                    self._vehicle_index.sensor_state_for_vehicle_id(
+                        v.vehicle_id
+                    ).plan.route.geometry
                 )
+            else:
+                actor_type = envision_types.TrafficActorType.SocialAgent
+                mission_route_geometry = None
+
+            point_cloud = vehicle_obs.lidar_point_cloud or ([], [], [])
+            point_cloud = point_cloud[0]  # (points, hits, rays), just want points
+
+            # TODO: driven path should be read from vehicle_obs
+            driven_path = self._vehicle_index.vehicle_by_id(
+                v.vehicle_id
+            ).driven_path_sensor()
+
+            road_waypoints = []
+            if vehicle_obs.road_waypoints:
+                road_waypoints = [
+                    path
+                    for paths in vehicle_obs.road_waypoints.lanes.values()
+                    for path in paths
+                ]
+            traffic[v.vehicle_id] = envision_types.TrafficActorState(
+                name=self._agent_manager.agent_name(agent_id),
+                actor_type=actor_type,
+                vehicle_type=envision_types.VehicleType.Car,
+                position=tuple(v.pose.position),
+                heading=float(v.pose.heading),
+                speed=v.speed,
+                actor_id=envision_types.format_actor_id(
+                    agent_id,
+                    v.vehicle_id,
+                    is_multi=is_boid_agent,
+                ),
+                events=vehicle_obs.events,
+                waypoint_paths=(vehicle_obs.waypoint_paths or []) + road_waypoints,
+                point_cloud=point_cloud,
+                driven_path=driven_path,
+                mission_route_geometry=mission_route_geometry,
+            )
+            speed[agent_id] = v.speed
+            position[agent_id] = tuple(v.pose.as_position2d())
+            heading[agent_id] = float(v.pose.heading)
+            if vehicle_obs.waypoint_paths and len(vehicle_obs.waypoint_paths[0]) > 0:
+                lane_ids[agent_id] = vehicle_obs.waypoint_paths[0][0].lane_id
+
+        # the social vehicles are built by the envision client
+        social_rows = np.flatnonzero(
+            ~is_agent_vehicle
+            & provider_state.contains(
+                self._vehicle_index.social_vehicle_ids()
+                | self._kinematic_social_vehicles.keys()
+            )
+        )
 
         bubble_geometry = [
             list(bubble.geometry.exterior.coords)
@@ -1439,7 +1618,26 @@ class SMARTS:
             lane_ids=lane_ids,
             frame_time=self._rounder(self._elapsed_sim_time + self._total_sim_time),
         )
-        self._envision.send(state)
+        vehicle_array = provider_state.array[social_rows]
+        social_vehicle_arrays = envision_types.SocialVehicleArrays(
+            vehicle_ids=provider_state.vehicle_ids[social_rows].tolist(),
+            vehicle_types=[
+                vehicle_config_type
+                if vehicle_config_type
+                else provider_state.vehicle_at(idx).vehicle_type
+                for idx, vehicle_config_type in zip(
+                    social_rows, provider_state.vehicle_config_types[social_rows]
+                )
+            ],
+            positions=vehicle_array["position"],
+            headings=vehicle_array["heading"],
+            speeds=vehicle_array["speed"],
+        )
+        self._envision.send(
+            envision_types.StateSnapshot(
+                state=state, social_vehicles=social_vehicle_arrays
+            )
+        )
 
     def _try_emit_visdom_obs(self, obs):
         if not self._visdom:
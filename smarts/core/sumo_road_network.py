@@ -22,28 +22,47 @@ import os
 import random
 from functools import lru_cache
 from subprocess import check_output
-from typing import List, Optional, Sequence, Set, Tuple
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 import numpy as np
+import shapely
 import trimesh
 import trimesh.scene
 from cached_property import cached_property
+from shapely.geometry import LineString
 from shapely.geometry import Point as shPoint
 from shapely.geometry import Polygon
 from shapely.ops import nearest_points, snap
+from shapely.strtree import STRtree
 from trimesh.exchange import gltf
 
 from smarts.sstudio.types import MapSpec
 
 from .coordinates import BoundingBox, Heading, Point, Pose, RefLinePoint
 from .lanepoints import LanePoints, LinkedLanePoint
-from .road_map import RoadMap, Waypoint
+from .road_map import WAYPOINT_DTYPE, RoadMap, Waypoint, WaypointPath
 from .utils.geometry import buffered_shape, generate_mesh_from_polygons
 from .utils.math import inplace_unwrap, radians_to_vec, vec_2d
+from .waypoints_cache import WaypointsCache
 
 from smarts.core.utils.sumo import sumolib  # isort:skip
 from sumolib.net.edge import Edge  # isort:skip
 
+# Maps with fewer road polygons than this are triangulated in-process since
+# the worker pool startup would outweigh the parallel speedup.
+_PARALLEL_MESH_MIN_POLYGONS = 5000
+
+_LANEPOINT_DTYPE = np.dtype(
+    [
+        ("pos", np.float64, (2,)),
+        ("heading", np.float64),
+        ("lane_width", np.float64),
+        ("speed_limit", np.float64),
+        ("lane_index", np.int32),
+        ("is_inferred", np.bool_),
+    ]
+)
+
 
 def _convert_camera(camera):
     result = {
@@ -92,7 +111,7 @@ class SumoRoadNetwork(RoadMap):
         self._surfaces = {}
         self._lanes = {}
         self._roads = {}
-        self._waypoints_cache = SumoRoadNetwork._WaypointsCache()
+        self._waypoints_cache = WaypointsCache()
         self._lanepoints = None
         if map_spec.lanepoint_spacing is not None:
             assert map_spec.lanepoint_spacing > 0
@@ -1043,46 +1062,16 @@ class SumoRoadNetwork(RoadMap):
                 lane_to_poly[lane_id] = lane_shape
 
     def _snap_internal_holes(self, lane_to_poly, snap_threshold=2):
-        for lane_id in lane_to_poly:
-            lane = self._graph.getLane(lane_id)
-
-            # Only do snapping for internal edge lane holes
-            if not lane.getEdge().isSpecial():
-                continue
-            lane_shape = lane_to_poly[lane_id]
-            new_coords = []
-            last_added = None
-            for x, y in lane_shape.exterior.coords:
-                p = shPoint(x, y)
-                snapped_to = set()
-                moved = True
-                thresh = snap_threshold
-                while moved:
-                    moved = False
-                    for nl, dist in self.nearest_lanes(
-                        Point(p.x, p.y),
-                        include_junctions=False,
-                    ):
-                        if not nl or nl.lane_id == lane_id or nl in snapped_to:
-                            continue
-                        nl_shape = lane_to_poly.get(nl.lane_id)
-                        if nl_shape:
-                            _, np = nearest_points(p, nl_shape)
-                            if p.distance(np) < thresh:
-                                p = np  # !!!! :)
-                                # allow vertices to snap to more than one thing, but
-                                # try to avoid infinite loops and making things worse instead of better here...
-                                # (so reduce snap dist threshold by an arbitrary amount each pass.)
-                                moved = True
-                                snapped_to.add(nl)
-                                thresh *= 0.75
-                if p != last_added:
-                    new_coords.append(p)
-                    last_added = p
-            if new_coords:
-                lane_to_poly[lane_id] = Polygon(new_coords)
+        # Only do snapping for internal edge lane holes
+        lane_ids = [
+            lane_id
+            for lane_id in lane_to_poly
+            if self._graph.getLane(lane_id).getEdge().isSpecial()
+        ]
+        self._snap_holes(lane_to_poly, lane_ids, snap_threshold)
 
     def _snap_external_holes(self, lane_to_poly, snap_threshold=2):
+        lane_ids = []
         for lane_id in lane_to_poly:
             lane = self._graph.getLane(lane_id)
 
@@ -1100,47 +1089,128 @@ class SumoRoadNetwork(RoadMap):
                 if outgoing_lane.getEdge().isSpecial():
                     continue
 
+            lane_ids.append(lane_id)
+        self._snap_holes(lane_to_poly, lane_ids, snap_threshold)
+
+    def _snap_holes(self, lane_to_poly, lane_ids, snap_threshold):
+        # Vertices of the given lanes snap to the shapes of nearby lanes that are not
+        # in a junction. Those shapes are put in an STR-tree once instead of searching
+        # for the neighbouring lanes of every vertex. Lanes snapped earlier in the pass
+        # can be snapped to later, so the tree is queried with the furthest that a
+        # vertex has moved so far as slack and the distances are checked on the
+        # current shapes.
+        target_ids = [
+            lane_id
+            for lane_id in lane_to_poly
+            if not self._graph.getLane(lane_id).getEdge().isSpecial()
+        ]
+        if not lane_ids or not target_ids:
+            return
+        tree = STRtree([lane_to_poly[lane_id] for lane_id in target_ids])
+        # `nearest_lanes(...)` measures the distance to the lane shape extended to
+        # its junctions and orders the lanes by it.
+        centerlines = np.array(
+            [
+                LineString(self._graph.getLane(lane_id).getShape(True))
+                for lane_id in target_ids
+            ]
+        )
+        target_ids = np.array(target_ids, dtype=object)
+        radius = max(10, 2 * self._default_lane_width)
+        slack = 0
+
+        for lane_id in lane_ids:
             lane_shape = lane_to_poly[lane_id]
+            coords = np.asarray(lane_shape.exterior.coords)
+            points = shapely.points(coords)
+            vertex_indices, target_indices = tree.query(
+                points, predicate="dwithin", distance=snap_threshold + slack
+            )
+            candidate_ids = target_ids[target_indices]
+            shapes = np.array(
+                [lane_to_poly[nl_id] for nl_id in candidate_ids], dtype=object
+            )
+            gaps = shapely.distance(shapes, points[vertex_indices])
+            # A vertex already touching (or inside) every nearby lane stays put,
+            # so only vertices with a real gap to close need the snapping loop.
+            movable = (candidate_ids != lane_id) & (gaps > 0) & (gaps < snap_threshold)
+            near_vertices = set(vertex_indices[movable])
+
             new_coords = []
             last_added = None
-            for x, y in lane_shape.exterior.coords:
+            for i, (x, y) in enumerate(coords):
                 p = shPoint(x, y)
-                snapped_to = set()
-                moved = True
-                thresh = snap_threshold
-                while moved:
-                    moved = False
-                    for nl, dist in self.nearest_lanes(
-                        Point(p.x, p.y),
-                        include_junctions=False,
-                    ):
-                        if (
-                            not nl
-                            or nl.in_junction
-                            or nl.lane_id == lane_id
-                            or nl in snapped_to
-                        ):
-                            continue
-                        nl_shape = lane_to_poly.get(nl.lane_id)
-                        if nl_shape:
-                            _, np = nearest_points(p, nl_shape)
-                            if p.distance(np) < thresh:
-                                p = np  # !!!! :)
-                                # allow vertices to snap to more than one thing, but
-                                # try to avoid infinite loops and making things worse instead of better here...
-                                # (so reduce snap dist threshold by an arbitrary amount each pass.)
-                                moved = True
-                                snapped_to.add(nl)
-                                thresh *= 0.75
+                if i in near_vertices:
+                    snapped = self._snap_vertex(
+                        p,
+                        lane_id,
+                        lane_to_poly,
+                        tree,
+                        target_ids,
+                        centerlines,
+                        radius,
+                        snap_threshold,
+                        slack,
+                    )
+                    slack = max(slack, p.distance(snapped))
+                    p = snapped
                 if p != last_added:
                     new_coords.append(p)
                     last_added = p
             if new_coords:
                 lane_to_poly[lane_id] = Polygon(new_coords)
 
+    @staticmethod
+    def _snap_vertex(
+        p,
+        lane_id,
+        lane_to_poly,
+        tree,
+        target_ids,
+        centerlines,
+        radius,
+        snap_threshold,
+        slack,
+    ):
+        snapped_to = set()
+        moved = True
+        thresh = snap_threshold
+        while moved:
+            moved = False
+            # The snap threshold shrinks by 0.75 after every snap, so a vertex moves
+            # less than `4 * thresh` before its last snap.
+            candidates = np.sort(
+                tree.query(p, predicate="dwithin", distance=4 * thresh + slack)
+            )
+            distances = shapely.distance(centerlines[candidates], p)
+            nearby = (distances < radius) & (target_ids[candidates] != lane_id)
+            candidates, distances = candidates[nearby], distances[nearby]
+            candidates = candidates[np.argsort(distances, kind="stable")]
+            shapes = np.array(
+                [lane_to_poly[nl_id] for nl_id in target_ids[candidates]],
+                dtype=object,
+            )
+            gaps = shapely.distance(shapes, p)
+            for i, candidate in enumerate(candidates):
+                nl_id = target_ids[candidate]
+                if gaps[i] >= thresh or nl_id in snapped_to:
+                    continue
+                _, nearest = nearest_points(p, shapes[i])
+                if p.distance(nearest) < thresh:
+                    p = nearest  # !!!! :)
+                    # allow vertices to snap to more than one thing, but
+                    # try to avoid infinite loops and making things worse instead of better here...
+                    # (so reduce snap dist threshold by an arbitrary amount each pass.)
+                    moved = True
+                    snapped_to.add(nl_id)
+                    thresh *= 0.75
+                    gaps[i + 1 :] = shapely.distance(shapes[i + 1 :], p)
+        return p
+
     def _make_glb_from_polys(self, polygons):
         scene = trimesh.Scene()
-        mesh = generate_mesh_from_polygons(polygons)
+        processes = None if len(polygons) >= _PARALLEL_MESH_MIN_POLYGONS else 1
+        mesh = generate_mesh_from_polygons(polygons, processes=processes)
         # Attach additional information for rendering as metadata in the map glb
         metadata = {}
 
@@ -1226,55 +1296,6 @@ class SumoRoadNetwork(RoadMap):
 
         return connection_lane.getEdge().getID()
 
-    class _WaypointsCache:
-        def __init__(self):
-            self.lookahead = 0
-            self.point = (0, 0, 0)
-            self.filter_road_ids = ()
-            self._starts = {}
-
-        # XXX:  all vehicles share this cache now (as opposed to before
-        # when it was in Plan.py and each vehicle had its own cache).
-        # TODO: probably need to add vehicle_id to the key somehow (or just make it bigger)
-        def _match(self, lookahead, point, filter_road_ids) -> bool:
-            return (
-                lookahead <= self.lookahead
-                and point[0] == self.point[0]
-                and point[1] == self.point[1]
-                and filter_road_ids == self.filter_road_ids
-            )
-
-        def update(
-            self,
-            lookahead: int,
-            point: Tuple[float, float, float],
-            filter_road_ids: tuple,
-            llp,
-            paths: List[List[Waypoint]],
-        ):
-            """Update the current cache if not already cached."""
-            if not self._match(lookahead, point, filter_road_ids):
-                self.lookahead = lookahead
-                self.point = point
-                self.filter_road_ids = filter_road_ids
-                self._starts = {}
-            self._starts[llp.lp.lane.index] = paths
-
-        def query(
-            self,
-            lookahead: int,
-            point: Tuple[float, float, float],
-            filter_road_ids: tuple,
-            llp,
-        ) -> Optional[List[List[Waypoint]]]:
-            """Attempt to find previously cached waypoints"""
-            if self._match(lookahead, point, filter_road_ids):
-                hit = self._starts.get(llp.lp.lane.index, None)
-                if hit:
-                    # consider just returning all of them (not slicing)?
-                    return [path[: (lookahead + 1)] for path in hit]
-                return None
-
     def _waypoints_starting_at_lanepoint(
         self,
         lanepoint: LinkedLanePoint,
@@ -1285,153 +1306,121 @@ class SumoRoadNetwork(RoadMap):
         """computes equally-spaced Waypoints for all lane paths starting at lanepoint
         up to lookahead waypoints ahead, constrained to filter_road_ids if specified."""
 
-        # The following acts sort of like lru_cache(1), but it allows
-        # for lookahead to be <= to the cached value...
-        cache_paths = self._waypoints_cache.query(
-            lookahead, point, filter_road_ids, lanepoint
+        return self._waypoints_cache.waypoint_paths(
+            self._lanepoints,
+            lanepoint,
+            lookahead,
+            filter_road_ids,
+            point,
+            lambda path, point: self._equally_spaced_path(
+                path, point, self._map_spec.lanepoint_spacing
+            ),
         )
-        if cache_paths:
-            return cache_paths
 
-        lanepoint_paths = self._lanepoints.paths_starting_at_lanepoint(
-            lanepoint, lookahead, filter_road_ids
-        )
-        result = [
-            SumoRoadNetwork._equally_spaced_path(
-                path, point, self._map_spec.lanepoint_spacing
-            )
-            for path in lanepoint_paths
+    @cached_property
+    def _lanepoint_table(self) -> Tuple[Dict[int, int], np.ndarray, np.ndarray]:
+        """The geometry of all lanepoints as arrays: a map from the `id()` of each
+        linked lanepoint to its row, a structured array of the lanepoint
+        positions, headings, lane widths, speed limits and lane indices, and
+        the lane id of each row."""
+        linked_lanepoints = self._lanepoints._linked_lanepoints
+        rows = {id(linked_lp): row for row, linked_lp in enumerate(linked_lanepoints)}
+        table = np.empty(len(linked_lanepoints), dtype=_LANEPOINT_DTYPE)
+        table["pos"] = [
+            linked_lp.lp.pose.position[:2] for linked_lp in linked_lanepoints
         ]
-
-        self._waypoints_cache.update(
-            lookahead, point, filter_road_ids, lanepoint, result
+        table["heading"] = [
+            linked_lp.lp.pose.heading.as_bullet for linked_lp in linked_lanepoints
+        ]
+        table["lane_width"] = [
+            linked_lp.lp.lane._width for linked_lp in linked_lanepoints
+        ]
+        table["speed_limit"] = [
+            linked_lp.lp.lane.speed_limit for linked_lp in linked_lanepoints
+        ]
+        table["lane_index"] = [
+            linked_lp.lp.lane.index for linked_lp in linked_lanepoints
+        ]
+        table["is_inferred"] = [
+            linked_lp.is_inferred for linked_lp in linked_lanepoints
+        ]
+        lane_ids = np.array(
+            [linked_lp.lp.lane.lane_id for linked_lp in linked_lanepoints],
+            dtype=object,
         )
+        return rows, table, lane_ids
 
-        return result
-
-    @staticmethod
     def _equally_spaced_path(
+        self,
         path: Sequence[LinkedLanePoint],
         point: Tuple[float, float, float],
         lp_spacing: float,
-    ) -> List[Waypoint]:
+    ) -> WaypointPath:
         """given a list of LanePoints starting near point, that may not be evenly spaced,
         returns the same number of Waypoints that are evenly spaced and start at point."""
 
-        continuous_variables = [
-            "positions_x",
-            "positions_y",
-            "headings",
-            "lane_width",
-            "speed_limit",
-        ]
-        discrete_variables = ["lane_id", "lane_index"]
-
-        ref_lanepoints_coordinates = {
-            parameter: [] for parameter in (continuous_variables + discrete_variables)
-        }
-        for idx, lanepoint in enumerate(path):
-            if lanepoint.is_inferred and 0 < idx < len(path) - 1:
-                continue
-            ref_lanepoints_coordinates["positions_x"].append(
-                lanepoint.lp.pose.position[0]
-            )
-            ref_lanepoints_coordinates["positions_y"].append(
-                lanepoint.lp.pose.position[1]
-            )
-            ref_lanepoints_coordinates["headings"].append(
-                lanepoint.lp.pose.heading.as_bullet
-            )
-            ref_lanepoints_coordinates["lane_id"].append(lanepoint.lp.lane.lane_id)
-            ref_lanepoints_coordinates["lane_index"].append(lanepoint.lp.lane.index)
-            ref_lanepoints_coordinates["lane_width"].append(lanepoint.lp.lane._width)
-            ref_lanepoints_coordinates["speed_limit"].append(
-                lanepoint.lp.lane.speed_limit
-            )
-
-        ref_lanepoints_coordinates["headings"] = inplace_unwrap(
-            ref_lanepoints_coordinates["headings"]
+        rows, table, lane_ids = self._lanepoint_table
+        path_rows = np.fromiter(
+            (rows[id(lanepoint)] for lanepoint in path), dtype=np.intp, count=len(path)
         )
-        first_lp_heading = ref_lanepoints_coordinates["headings"][0]
-        lp_position = path[0].lp.pose.as_position2d()
-        vehicle_pos = np.array(point[:2])
-        heading_vec = np.array(radians_to_vec(first_lp_heading))
+        # Inferred lanepoints other than the first and last are left out.
+        keep = ~table["is_inferred"][path_rows]
+        keep[0] = keep[-1] = True
+        ref_rows = path_rows[keep]
+        ref = table[ref_rows]
+
+        ref_pos = ref["pos"]
+        ref_headings = inplace_unwrap(ref["heading"])
+        lp_position = ref_pos[0].copy()
+        heading_vec = np.array(radians_to_vec(ref_headings[0]))
         projected_distant_lp_vehicle = np.inner(
-            (vehicle_pos - lp_position), heading_vec
+            (np.array(point[:2]) - lp_position), heading_vec
         )
+        ref_pos[0] = lp_position + projected_distant_lp_vehicle * heading_vec
 
-        ref_lanepoints_coordinates["positions_x"][0] = (
-            lp_position[0] + projected_distant_lp_vehicle * heading_vec[0]
-        )
-        ref_lanepoints_coordinates["positions_y"][0] = (
-            lp_position[1] + projected_distant_lp_vehicle * heading_vec[1]
-        )
         # To ensure that the distance between waypoints are equal, we used
         # interpolation approach inspired by:
         # https://stackoverflow.com/a/51515357
         cumulative_path_dist = np.cumsum(
             np.sqrt(
-                np.ediff1d(ref_lanepoints_coordinates["positions_x"], to_begin=0) ** 2
-                + np.ediff1d(ref_lanepoints_coordinates["positions_y"], to_begin=0) ** 2
+                np.ediff1d(ref_pos[:, 0], to_begin=0) ** 2
+                + np.ediff1d(ref_pos[:, 1], to_begin=0) ** 2
             )
         )
 
         if len(cumulative_path_dist) <= lp_spacing:
-            lp = path[0].lp
-            return [
-                Waypoint(
-                    pos=lp.pose.as_position2d(),
-                    heading=lp.pose.heading,
-                    lane_width=lp.lane._width,
-                    speed_limit=lp.lane.speed_limit,
-                    lane_id=lp.lane.lane_id,
-                    lane_index=lp.lane.index,
-                )
-            ]
+            waypoints = np.empty(1, dtype=WAYPOINT_DTYPE)
+            waypoints["pos"] = lp_position
+            waypoints["heading"] = path[0].lp.pose.heading
+            for field in ("lane_width", "speed_limit", "lane_index"):
+                waypoints[field] = ref[field][0]
+            return WaypointPath(waypoints, lane_ids[ref_rows[:1]])
 
         evenly_spaced_cumulative_path_dist = np.linspace(
             0, cumulative_path_dist[-1], len(path)
         )
 
-        evenly_spaced_coordinates = {}
-        for variable in continuous_variables:
-            evenly_spaced_coordinates[variable] = np.interp(
+        waypoints = np.empty(len(path), dtype=WAYPOINT_DTYPE)
+        for idx in range(2):
+            waypoints["pos"][:, idx] = np.interp(
                 evenly_spaced_cumulative_path_dist,
                 cumulative_path_dist,
-                ref_lanepoints_coordinates[variable],
+                ref_pos[:, idx],
             )
-
-        for variable in discrete_variables:
-            ref_coordinates = ref_lanepoints_coordinates[variable]
-            evenly_spaced_coordinates[variable] = []
-            jdx = 0
-            for idx in range(len(path)):
-                while (
-                    jdx + 1 < len(cumulative_path_dist)
-                    and evenly_spaced_cumulative_path_dist[idx]
-                    > cumulative_path_dist[jdx + 1]
-                ):
-                    jdx += 1
-
-                evenly_spaced_coordinates[variable].append(ref_coordinates[jdx])
-            evenly_spaced_coordinates[variable].append(ref_coordinates[-1])
-
-        equally_spaced_path = []
-        for idx in range(len(path)):
-            equally_spaced_path.append(
-                Waypoint(
-                    pos=np.array(
-                        [
-                            evenly_spaced_coordinates["positions_x"][idx],
-                            evenly_spaced_coordinates["positions_y"][idx],
-                        ]
-                    ),
-                    heading=Heading(evenly_spaced_coordinates["headings"][idx]),
-                    lane_width=evenly_spaced_coordinates["lane_width"][idx],
-                    speed_limit=evenly_spaced_coordinates["speed_limit"][idx],
-                    lane_id=evenly_spaced_coordinates["lane_id"][idx],
-                    lane_index=evenly_spaced_coordinates["lane_index"][idx],
-                )
+        waypoints["heading"] = np.interp(
+            evenly_spaced_cumulative_path_dist, cumulative_path_dist, ref_headings
+        )
+        for field in ("lane_width", "speed_limit"):
+            waypoints[field] = np.interp(
+                evenly_spaced_cumulative_path_dist, cumulative_path_dist, ref[field]
             )
 
-        return equally_spaced_path
+        # Discrete variables take the value of the last reference lanepoint at or
+        # before each waypoint.
+        ref_idx = np.searchsorted(
+            cumulative_path_dist[1:], evenly_spaced_cumulative_path_dist, side="left"
+        )
+        np.minimum(ref_idx, len(ref_rows) - 1, out=ref_idx)
+        waypoints["lane_index"] = ref["lane_index"][ref_idx]
+
+        return WaypointPath(waypoints, lane_ids[ref_rows[ref_idx]])
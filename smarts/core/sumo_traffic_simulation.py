@@ -19,11 +19,12 @@
 # THE SOFTWARE.
 
 import logging
+import math
 import os
 import random
 import subprocess
 import time
-from typing import List, Optional, Sequence, Tuple
+from typing import Optional, Sequence, Tuple
 
 import numpy as np
 from shapely.affinity import rotate as shapely_rotate
@@ -32,12 +33,12 @@ from shapely.geometry import box as shapely_box
 
 from smarts.core import gen_id
 from smarts.core.colors import SceneColors
-from smarts.core.coordinates import Dimensions, Heading, Pose
+from smarts.core.coordinates import Dimensions, Heading
 from smarts.core.provider import Provider, ProviderRecoveryFlags, ProviderState
 from smarts.core.sumo_road_network import SumoRoadNetwork
 from smarts.core.utils import networking
 from smarts.core.utils.logging import suppress_output
-from smarts.core.vehicle import VEHICLE_CONFIGS, VehicleState
+from smarts.core.vehicle import VEHICLE_CONFIGS
 
 from smarts.core.utils.sumo import SUMO_PATH, traci  # isort:skip
 from traci.exceptions import FatalTraCIError, TraCIException  # isort:skip
@@ -413,9 +414,12 @@ class SumoTrafficSimulation(Provider):
         return self._sync(provider_state)
 
     def _sync(self, provider_state: ProviderState):
-        provider_vehicles = {v.vehicle_id: v for v in provider_state.vehicles}
-        external_vehicles = [v for v in provider_state.vehicles if v.source != "SUMO"]
-        external_vehicle_ids = {v.vehicle_id for v in external_vehicles}
+        provider_rows = {
+            vehicle_id: idx for idx, vehicle_id in enumerate(provider_state.vehicle_ids)
+        }
+        external_vehicle_ids = set(
+            provider_state.vehicle_ids[provider_state.sources != "SUMO"]
+        )
 
         # Represents current state
         traffic_vehicle_states = self._traci_conn.vehicle.getAllSubscriptionResults()
@@ -459,7 +463,7 @@ class SumoTrafficSimulation(Provider):
             self._traci_conn.vehicle.remove(vehicle_id)
 
         for vehicle_id in external_vehicles_that_have_joined:
-            vehicle_state = provider_vehicles[vehicle_id]
+            vehicle_state = provider_state.vehicle_at(provider_rows[vehicle_id])
             dimensions = Dimensions.copy_with_defaults(
                 vehicle_state.dimensions,
                 VEHICLE_CONFIGS[vehicle_state.vehicle_config_type].dimensions,
@@ -470,7 +474,7 @@ class SumoTrafficSimulation(Provider):
 
         # update the state of all current managed vehicles
         for vehicle_id in self._non_sumo_vehicle_ids:
-            provider_vehicle = provider_vehicles[vehicle_id]
+            provider_vehicle = provider_state.vehicle_at(provider_rows[vehicle_id])
 
             pos, sumo_heading = provider_vehicle.pose.as_sumo(
                 provider_vehicle.dimensions.length, Heading(0)
@@ -597,15 +601,13 @@ class SumoTrafficSimulation(Provider):
         self._traci_conn.vehicle.setHeight(vehicle_id, dimensions.height)
 
     def _compute_provider_state(self) -> ProviderState:
-        return ProviderState(
-            vehicles=self._compute_traffic_vehicles(),
-        )
+        return self._compute_traffic_vehicles()
 
-    def _compute_traffic_vehicles(self) -> List[VehicleState]:
+    def _compute_traffic_vehicles(self) -> ProviderState:
         sub_results = self._traci_conn.simulation.getSubscriptionResults()
 
         if sub_results is None or sub_results == {}:
-            return []
+            return ProviderState()
 
         # New social vehicles that have entered the map
         newly_departed_sumo_traffic = [
@@ -666,43 +668,58 @@ class SumoTrafficSimulation(Provider):
         self._sumo_vehicle_ids = (
             set(sumo_vehicle_state.keys()) - self._non_sumo_vehicle_ids
         )
-        provider_vehicles = []
-
+        # XXX: We can safely rely on iteration order over dictionaries being
+        #      stable on py3.7.
+        #      See: https://www.python.org/downloads/release/python-370/
+        #      "The insertion-order preservation nature of dict objects is now an
+        #      official part of the Python language spec."
+        sumo_vehicles = sumo_vehicle_state.values()
         # batched conversion of positions to numpy arrays
         front_bumper_positions = np.array(
-            [
-                sumo_vehicle[tc.VAR_POSITION]
-                for sumo_vehicle in sumo_vehicle_state.values()
-            ]
+            [sumo_vehicle[tc.VAR_POSITION] for sumo_vehicle in sumo_vehicles]
         ).reshape(-1, 2)
-
-        for i, (sumo_id, sumo_vehicle) in enumerate(sumo_vehicle_state.items()):
-            # XXX: We can safely rely on iteration order over dictionaries being
-            #      stable on py3.7.
-            #      See: https://www.python.org/downloads/release/python-370/
-            #      "The insertion-order preservation nature of dict objects is now an
-            #      official part of the Python language spec."
-            front_bumper_pos = front_bumper_positions[i]
-            heading = Heading.from_sumo(sumo_vehicle[tc.VAR_ANGLE])
-            speed = sumo_vehicle[tc.VAR_SPEED]
-            vehicle_config_type = sumo_vehicle[tc.VAR_VEHICLECLASS]
-            dimensions = VEHICLE_CONFIGS[vehicle_config_type].dimensions
-            provider_vehicles.append(
-                VehicleState(
-                    # XXX: In the case of the SUMO traffic provider, the vehicle ID is
-                    #      the sumo ID is the actor ID.
-                    vehicle_id=sumo_id,
-                    vehicle_config_type=vehicle_config_type,
-                    pose=Pose.from_front_bumper(
-                        front_bumper_pos, heading, dimensions.length
-                    ),
-                    dimensions=dimensions,
-                    speed=speed,
-                    source="SUMO",
+        # See `Heading.from_sumo`
+        headings = (
+            2 * math.pi
+            - np.radians(
+                np.fromiter(
+                    (sumo_vehicle[tc.VAR_ANGLE] for sumo_vehicle in sumo_vehicles),
+                    dtype=np.float64,
+                    count=len(sumo_vehicles),
                 )
             )
-
-        return provider_vehicles
+        ) % (2 * math.pi)
+        speeds = np.fromiter(
+            (sumo_vehicle[tc.VAR_SPEED] for sumo_vehicle in sumo_vehicles),
+            dtype=np.float64,
+            count=len(sumo_vehicles),
+        )
+        vehicle_config_types = [
+            sumo_vehicle[tc.VAR_VEHICLECLASS] for sumo_vehicle in sumo_vehicles
+        ]
+        dimensions = np.array(
+            [
+                VEHICLE_CONFIGS[vehicle_config_type].dimensions.as_lwh
+                for vehicle_config_type in vehicle_config_types
+            ]
+        ).reshape(-1, 3)
+        # See `Pose.from_front_bumper`
+        angles = (headings + math.pi * 0.5) % (2 * math.pi)
+        centers = front_bumper_positions - np.column_stack(
+            (np.cos(angles), np.sin(angles))
+        ) * (0.5 * dimensions[:, :1])
+
+        # XXX: In the case of the SUMO traffic provider, the vehicle ID is
+        #      the sumo ID is the actor ID.
+        return ProviderState.from_arrays(
+            vehicle_ids=list(sumo_vehicle_state.keys()),
+            positions=centers,
+            headings=headings,
+            speeds=speeds,
+            dimensions=dimensions,
+            source="SUMO",
+            vehicle_config_types=vehicle_config_types,
+        )
 
     def _teleport_exited_vehicles(self):
         sub_results = self._traci_conn.simulation.getSubscriptionResults()
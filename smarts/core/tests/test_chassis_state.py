@@ -0,0 +1,111 @@
+# MIT License
+#
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import importlib.resources as pkg_resources
+import math
+
+import numpy as np
+import pytest
+
+from smarts.core import models
+from smarts.core.chassis import AckermannChassis
+from smarts.core.coordinates import Heading, Pose
+from smarts.core.utils import pybullet
+from smarts.core.utils.pybullet import bullet_client as bc
+
+
+@pytest.fixture
+def bullet_client():
+    client = bc.BulletClient(pybullet.DIRECT)
+    client.setGravity(0, 0, -9.8)
+    with pkg_resources.path(models, "plane.urdf") as path:
+        plane_path = str(path.absolute())
+    client.loadURDF(
+        plane_path,
+        useFixedBase=True,
+        basePosition=(0, 0, 0),
+        globalScaling=1000.0 / 1e6,
+    )
+    yield client
+    client.disconnect()
+
+
+@pytest.fixture
+def chassis(bullet_client):
+    return [
+        AckermannChassis(
+            Pose.from_center([10 * i, 0, 0], Heading(math.pi * 0.25 * i)),
+            bullet_client,
+            initial_speed=2 * i,
+        )
+        for i in range(3)
+    ]
+
+
+def _drive(chassis, steps=20):
+    for _ in range(steps):
+        for i, c in enumerate(chassis):
+            c.control(throttle=0.5, steering=0.3 * (i - 1))
+        chassis[0].bullet_client.stepSimulation()
+        for c in chassis:
+            c.step(0)
+
+
+def _state(c):
+    return (
+        c.pose.position,
+        c.pose.heading,
+        c.speed,
+        c.steering,
+        c.yaw_rate,
+        c.longitudinal_lateral_speed,
+        c.velocity_vectors[0],
+        c.velocity_vectors[1],
+    )
+
+
+def test_bulk_read_matches_direct_reads(chassis):
+    _drive(chassis)
+    direct = [_state(c) for c in chassis]
+    for c in chassis:
+        c._clear_step_cache()
+    AckermannChassis.read_bullet_states(chassis)
+    bulk = [_state(c) for c in chassis]
+    for expected, actual in zip(direct, bulk):
+        for e, a in zip(expected, actual):
+            assert np.allclose(e, a)
+
+
+def test_bulk_read_is_dropped_on_change(chassis):
+    _drive(chassis)
+    AckermannChassis.read_bullet_states(chassis)
+    c = chassis[1]
+    pose = c.pose
+    assert c.pose is pose
+
+    c.set_pose(Pose.from_center([0, 50, 0], Heading(0)))
+    assert c.pose is not pose
+    assert np.allclose(c.pose.position[:2], [0, 50])
+
+    pose = c.pose
+    c.control(throttle=1)
+    c.bullet_client.stepSimulation()
+    assert c.pose is not pose
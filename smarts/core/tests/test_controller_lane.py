@@ -19,6 +19,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+import numpy as np
 import pytest
 
 import smarts.sstudio.types as t
@@ -145,3 +146,46 @@ def test_lane_following_controller(smarts, agent_spec, scenarios):
     assert (
         sum(lateral_error) / len(lateral_error) < 1
     ), "Average lateral error exceeded maximum (1)"
+
+
+@pytest.mark.parametrize(
+    "half_vehicle_len, vehicle_mass, vehicle_inertia_z, road_stiffness",
+    [(1.84, 2356.0, 2681.95, 1e5), (1.84, 2356.0, 2681.95, 3e4), (3.5, 6000, 3e4, 1e5)],
+)
+def test_interpolated_lateral_gains(
+    half_vehicle_len, vehicle_mass, vehicle_inertia_z, road_stiffness
+):
+    params = (
+        half_vehicle_len,
+        vehicle_mass,
+        vehicle_inertia_z,
+        road_stiffness,
+        (
+            LaneFollowingController.lateral_error,
+            LaneFollowingController.heading_error,
+            LaneFollowingController.yaw_rate,
+            LaneFollowingController.side_slip_angle,
+        ),
+    )
+    speeds = np.geomspace(0.05, 60, 500)
+    solved = np.array(
+        [LaneFollowingController.solve_lateral_gains(*params, s) for s in speeds]
+    )
+    interpolated = np.array(
+        [LaneFollowingController.interpolate_lateral_gains(*params, s) for s in speeds]
+    )
+
+    np.testing.assert_allclose(interpolated, solved, rtol=0.01, atol=1e-3)
+    # The controller clips the gains, the error after clipping is much smaller.
+    np.testing.assert_allclose(
+        np.clip(interpolated[:, 0], 0.02, 0.04),
+        np.clip(solved[:, 0], 0.02, 0.04),
+        rtol=0,
+        atol=1e-4,
+    )
+    np.testing.assert_allclose(
+        np.clip(interpolated[:, 1], 3.4, 4.1),
+        np.clip(solved[:, 1], 3.4, 4.1),
+        rtol=0,
+        atol=1e-6,
+    )
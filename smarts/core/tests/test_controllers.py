@@ -0,0 +1,154 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import importlib.resources as pkg_resources
+import math
+import random
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pytest
+import yaml
+
+from smarts.core import models
+from smarts.core.chassis import AckermannChassis
+from smarts.core.controllers import ActionSpaceType, Controllers, ControllerState
+from smarts.core.coordinates import Heading, Pose
+from smarts.core.utils import pybullet
+from smarts.core.utils.pybullet import bullet_client as bc
+from smarts.core.vehicle import Vehicle
+
+time_step = 0.1
+
+
+@pytest.fixture(scope="module")
+def vehicles():
+    client = bc.BulletClient(pybullet.DIRECT)
+    client.resetSimulation()
+    client.setGravity(0, 0, -9.8)
+    with pkg_resources.path(models, "plane.urdf") as path:
+        client.loadURDF(str(path.absolute()), useFixedBase=True)
+    with pkg_resources.path(models, "vehicle.urdf") as path:
+        vehicle_filepath = str(path.absolute())
+    with pkg_resources.path(models, "controller_parameters.yaml") as path:
+        with open(path, "r") as controller_file:
+            controller_parameters = yaml.safe_load(controller_file)["sedan"]
+
+    yield [
+        Vehicle(
+            id=f"vehicle-{i}",
+            chassis=AckermannChassis(
+                pose=Pose.from_center((10 * i, 0, 0), Heading(0)),
+                bullet_client=client,
+                vehicle_filepath=vehicle_filepath,
+                controller_parameters=controller_parameters,
+            ),
+        )
+        for i in range(10)
+    ]
+    client.disconnect()
+
+
+def random_action(rng, action_space, vehicle):
+    if action_space == ActionSpaceType.Continuous:
+        return np.array(
+            [rng.uniform(-0.5, 1.5), rng.uniform(-0.5, 1.5), rng.uniform(-2, 2)]
+        )
+    if action_space == ActionSpaceType.ActuatorDynamic:
+        return (rng.uniform(0, 1), rng.uniform(0, 1), rng.uniform(-2, 2))
+    if action_space == ActionSpaceType.Imitation:
+        return (rng.uniform(-5, 5), rng.uniform(-1, 1))
+    # A trajectory bending away from the vehicle
+    x, y = vehicle.position[:2]
+    radius = rng.uniform(10, 50)
+    angles = [i * 0.05 for i in range(15)]
+    return [
+        [x - radius * (1 - math.cos(angle)) for angle in angles],
+        [y + radius * math.sin(angle) for angle in angles],
+        angles,
+        [rng.uniform(5, 20)] * len(angles),
+    ]
+
+
+@pytest.mark.parametrize(
+    "action_space",
+    [
+        ActionSpaceType.Continuous,
+        ActionSpaceType.ActuatorDynamic,
+        ActionSpaceType.Trajectory,
+        ActionSpaceType.Imitation,
+    ],
+)
+def test_batched_actions_match_per_vehicle_actions(vehicles, action_space):
+    rng = random.Random(42)
+    sim = SimpleNamespace(last_dt=time_step)
+
+    def make_controls():
+        return [
+            (
+                f"agent-{i}",
+                vehicle,
+                random_action(rng, action_space, vehicle),
+                ControllerState.from_action_space(action_space, vehicle.pose, sim),
+                None,
+                "sedan",
+            )
+            for i, vehicle in enumerate(vehicles)
+        ]
+
+    def record(perform):
+        with mock.patch.object(Vehicle, "control", autospec=True) as control:
+            # Several steps to carry the controller states forward
+            for _ in range(3):
+                perform()
+            return [(call.args[0].id, call.kwargs) for call in control.call_args_list]
+
+    controls = make_controls()
+    rng.seed(42)
+    per_vehicle_controls = make_controls()
+
+    batched = record(lambda: Controllers.perform_actions(sim, action_space, controls))
+    per_vehicle = record(
+        lambda: [
+            Controllers.perform_action(sim, *control[:5], action_space, control[5])
+            for control in per_vehicle_controls
+        ]
+    )
+
+    assert len(batched) == 3 * len(vehicles)
+    assert [vehicle_id for vehicle_id, _ in batched] == [
+        vehicle_id for vehicle_id, _ in per_vehicle
+    ]
+    for (_, batched_kwargs), (_, per_vehicle_kwargs) in zip(batched, per_vehicle):
+        assert batched_kwargs.keys() == per_vehicle_kwargs.keys()
+        for key, value in per_vehicle_kwargs.items():
+            assert batched_kwargs[key] == pytest.approx(value, rel=1e-12, abs=1e-12)
+
+
+def test_none_actions_are_skipped(vehicles):
+    sim = SimpleNamespace(last_dt=time_step)
+    controls = [
+        ("agent", vehicle, None, None, None, "sedan") for vehicle in vehicles[:2]
+    ]
+    with mock.patch.object(Vehicle, "control", autospec=True) as control:
+        Controllers.perform_actions(sim, ActionSpaceType.Continuous, controls)
+    control.assert_not_called()
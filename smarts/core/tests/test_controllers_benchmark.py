@@ -0,0 +1,109 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import importlib.resources as pkg_resources
+import random
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+from smarts.core import models
+from smarts.core.chassis import AckermannChassis
+from smarts.core.controllers import ActionSpaceType, Controllers, ControllerState
+from smarts.core.coordinates import Heading, Pose
+from smarts.core.tests.test_controllers import random_action, time_step
+from smarts.core.utils import pybullet
+from smarts.core.utils.pybullet import bullet_client as bc
+from smarts.core.vehicle import Vehicle
+
+AGENT_COUNT = 100
+
+
+@pytest.fixture(scope="module")
+def vehicles():
+    client = bc.BulletClient(pybullet.DIRECT)
+    client.resetSimulation()
+    with pkg_resources.path(models, "vehicle.urdf") as path:
+        vehicle_filepath = str(path.absolute())
+    with pkg_resources.path(models, "controller_parameters.yaml") as path:
+        with open(path, "r") as controller_file:
+            controller_parameters = yaml.safe_load(controller_file)["sedan"]
+
+    yield [
+        Vehicle(
+            id=f"vehicle-{i}",
+            chassis=AckermannChassis(
+                pose=Pose.from_center((10 * (i % 10), 10 * (i // 10), 0), Heading(0)),
+                bullet_client=client,
+                vehicle_filepath=vehicle_filepath,
+                controller_parameters=controller_parameters,
+            ),
+        )
+        for i in range(AGENT_COUNT)
+    ]
+    client.disconnect()
+
+
+@pytest.mark.benchmark(group="controllers.perform_actions")
+@pytest.mark.parametrize("batched", [False, True], ids=["per_vehicle", "batched"])
+@pytest.mark.parametrize(
+    "action_space",
+    [
+        ActionSpaceType.Continuous,
+        ActionSpaceType.ActuatorDynamic,
+        ActionSpaceType.Trajectory,
+        ActionSpaceType.Imitation,
+    ],
+    ids=lambda action_space: action_space.name,
+)
+def test_benchmark_perform_actions(vehicles, action_space, batched, benchmark):
+    rng = random.Random(42)
+    sim = SimpleNamespace(last_dt=time_step)
+    controls = [
+        (
+            f"agent-{i}",
+            vehicle,
+            random_action(rng, action_space, vehicle),
+            ControllerState.from_action_space(action_space, vehicle.pose, sim),
+            None,
+            "sedan",
+        )
+        for i, vehicle in enumerate(vehicles)
+    ]
+
+    if batched:
+        benchmark(Controllers.perform_actions, sim, action_space, controls)
+        return
+
+    @benchmark
+    def perform_per_vehicle():
+        for agent_id, vehicle, action, controller_state, sensor_state, _ in controls:
+            Controllers.perform_action(
+                sim,
+                agent_id,
+                vehicle,
+                action,
+                controller_state,
+                sensor_state,
+                action_space,
+                "sedan",
+            )
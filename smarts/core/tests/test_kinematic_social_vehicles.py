@@ -0,0 +1,99 @@
+# MIT License
+#
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import math
+
+import numpy as np
+import pytest
+
+from smarts.core.agent_interface import (
+    ActionSpaceType,
+    AgentInterface,
+    NeighborhoodVehicles,
+)
+from smarts.core.coordinates import Heading
+from smarts.core.plan import EndlessGoal, Mission, Start
+from smarts.core.scenario import Scenario
+from smarts.core.smarts import KINEMATIC_DEMOTION_MARGIN, SMARTS
+from smarts.core.sumo_traffic_simulation import SumoTrafficSimulation
+
+AGENT_ID = "Agent-007"
+RADIUS = 30
+
+
+@pytest.fixture
+def scenario():
+    mission = Mission(
+        start=Start((71.65, 63.78), Heading(math.pi * 0.91)), goal=EndlessGoal()
+    )
+    return Scenario(
+        scenario_root="scenarios/loop",
+        route="basic.rou.xml",
+        missions={AGENT_ID: mission},
+    )
+
+
+@pytest.fixture
+def smarts():
+    interface = AgentInterface(
+        max_episode_steps=1000,
+        neighborhood_vehicles=NeighborhoodVehicles(radius=20),
+        action=ActionSpaceType.Lane,
+    )
+    smarts = SMARTS(
+        {AGENT_ID: interface},
+        traffic_sim=SumoTrafficSimulation(headless=True),
+        envision=None,
+        kinematic_social_vehicle_radius=RADIUS,
+    )
+    yield smarts
+    smarts.destroy()
+
+
+def test_far_social_vehicles_have_no_body(smarts, scenario):
+    smarts.reset(scenario)
+    seen_kinematic = False
+    for _ in range(50):
+        _, _, dones, _ = smarts.step({AGENT_ID: "keep_lane"})
+        if dones[AGENT_ID]:
+            break
+        index = smarts.vehicle_index
+        (agent_vehicle,) = index.vehicles_by_actor_id(AGENT_ID)
+        agent_position = agent_vehicle.position[:2]
+
+        kinematic = smarts.kinematic_social_vehicle_states
+        kinematic_ids = {state.vehicle_id for state in kinematic}
+        assert not kinematic_ids & index.social_vehicle_ids()
+        for state in kinematic:
+            distance = np.linalg.norm(state.pose.position[:2] - agent_position)
+            assert distance > RADIUS
+        for vehicle_id in index.social_vehicle_ids():
+            distance = np.linalg.norm(
+                index.vehicle_by_id(vehicle_id).position[:2] - agent_position
+            )
+            assert distance <= RADIUS + KINEMATIC_DEMOTION_MARGIN + 5
+
+        # Kinematic vehicles are still observed
+        all_ids = {state.vehicle_id for state in smarts._vehicle_states}
+        assert kinematic_ids <= all_ids
+        seen_kinematic |= bool(kinematic)
+
+    assert seen_kinematic
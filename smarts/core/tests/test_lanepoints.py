@@ -0,0 +1,109 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import random
+
+import pytest
+
+from smarts.core.lanepoints import LanePoints
+from smarts.core.sumo_road_network import SumoRoadNetwork
+from smarts.sstudio.types import MapSpec
+
+
+def _expand_by_copying(lanepoint, lookahead, filter_edge_ids):
+    """The straightforward expansion which copies every branch at every step."""
+    lanepoint_paths = [[lanepoint]]
+    for _ in range(lookahead):
+        next_lanepoint_paths = []
+        for path in lanepoint_paths:
+            branching_paths = []
+            for next_lp in path[-1].nexts:
+                next_lane = next_lp.lp.lane
+                edge_id = next_lane.road.road_id
+                if filter_edge_ids and edge_id not in filter_edge_ids:
+                    continue
+                if (
+                    filter_edge_ids
+                    and edge_id != filter_edge_ids[-1]
+                    and all(
+                        out_lane.road.road_id not in filter_edge_ids
+                        for out_lane in next_lane.outgoing_lanes
+                    )
+                ):
+                    continue
+                branching_paths.append(path + [next_lp])
+            next_lanepoint_paths += branching_paths or [path]
+        lanepoint_paths = next_lanepoint_paths
+    return lanepoint_paths
+
+
+def _assert_same_paths(paths, expected):
+    assert len(paths) == len(expected)
+    for path, expected_path in zip(paths, expected):
+        assert len(path) == len(expected_path)
+        assert all(a is b for a, b in zip(path, expected_path))
+
+
+@pytest.fixture(scope="module")
+def lanepoints():
+    road_map = SumoRoadNetwork.from_spec(
+        MapSpec(
+            source="scenarios/intersections/4lane/map.net.xml", lanepoint_spacing=1.0
+        )
+    )
+    return road_map._lanepoints
+
+
+@pytest.mark.parametrize("lookahead", [0, 1, 10, 64])
+def test_paths_match_expansion_by_copying(lanepoints, lookahead):
+    rng = random.Random(42)
+    for linked_lp in rng.sample(lanepoints._linked_lanepoints, 50):
+        _assert_same_paths(
+            lanepoints.paths_starting_at_lanepoint(linked_lp, lookahead, ()),
+            _expand_by_copying(linked_lp, lookahead, ()),
+        )
+
+
+def test_filtered_paths_match_expansion_by_copying(lanepoints):
+    rng = random.Random(42)
+    for linked_lp in rng.sample(lanepoints._linked_lanepoints, 50):
+        road_ids = [linked_lp.lp.lane.road.road_id]
+        for path in _expand_by_copying(linked_lp, 80, ()):
+            if path[-1].lp.lane.road.road_id != road_ids[-1]:
+                road_ids.append(path[-1].lp.lane.road.road_id)
+                break
+        filter_edge_ids = tuple(road_ids)
+        _assert_same_paths(
+            lanepoints.paths_starting_at_lanepoint(linked_lp, 40, filter_edge_ids),
+            _expand_by_copying(linked_lp, 40, filter_edge_ids),
+        )
+
+
+def test_advance_paths(lanepoints):
+    rng = random.Random(42)
+    for linked_lp in rng.sample(lanepoints._linked_lanepoints, 50):
+        if len(linked_lp.nexts) != 1:
+            continue
+        paths = lanepoints.paths_starting_at_lanepoint(linked_lp, 20, ())
+        advanced = LanePoints.advance_paths(paths, ())
+        if advanced is None:
+            continue
+        _assert_same_paths(advanced, _expand_by_copying(linked_lp.nexts[0], 20, ()))
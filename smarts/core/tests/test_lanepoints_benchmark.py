@@ -0,0 +1,52 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import random
+
+import pytest
+
+from smarts.core.lanepoints import LanePoints
+from smarts.core.sumo_road_network import SumoRoadNetwork
+from smarts.sstudio.types import MapSpec
+
+
+@pytest.fixture(
+    scope="module",
+    params=["scenarios/minicity/map.net.xml", "scenarios/cloverleaf/map.net.xml"],
+)
+def lanepoints(request):
+    road_map = SumoRoadNetwork.from_spec(
+        MapSpec(source=request.param, lanepoint_spacing=1.0)
+    )
+    return road_map._lanepoints
+
+
+@pytest.mark.benchmark(group="lanepoints.paths_starting_at_lanepoint")
+@pytest.mark.parametrize("lookahead", [32, 64])
+def test_benchmark_paths_starting_at_lanepoint(lanepoints, lookahead, benchmark):
+    starts = random.Random(42).sample(lanepoints._linked_lanepoints, 500)
+    # Bypass the lru_cache to measure the expansion itself.
+    paths_starting_at_lanepoint = LanePoints.paths_starting_at_lanepoint.__wrapped__
+
+    @benchmark
+    def expand():
+        for lanepoint in starts:
+            paths_starting_at_lanepoint(lanepoints, lanepoint, lookahead, ())
@@ -20,14 +20,24 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import math
+import shutil
 
 import numpy as np
 import pytest
 
+from smarts.core import default_map_builder
 from smarts.core.coordinates import Point
 from smarts.core.opendrive_road_network import OpenDriveRoadNetwork
 from smarts.core.scenario import Scenario
 from smarts.core.sumo_road_network import SumoRoadNetwork
+from smarts.core.utils.geometry import generate_mesh_from_polygons
+from smarts.sstudio.types import MapSpec
+
+MAP_SOURCES = [
+    "scenarios/intersections/4lane/map.net.xml",
+    "smarts/core/tests/maps/straight.net.xml",
+    "smarts/core/tests/maps/6lane.net.xml",
+]
 
 
 @pytest.fixture
@@ -141,6 +151,64 @@ def test_sumo_map(sumo_scenario):
             )
 
 
+def test_sumo_map_mesh(sumo_scenario):
+    road_map = sumo_scenario.road_map
+    polygons = road_map._compute_road_polygons()
+    assert polygons
+
+    mesh = generate_mesh_from_polygons(polygons)
+    assert len(mesh.faces) > 0
+    parallel_mesh = generate_mesh_from_polygons(polygons, processes=2)
+    assert np.array_equal(mesh.vertices, parallel_mesh.vertices)
+    assert np.array_equal(mesh.faces, parallel_mesh.faces)
+
+
+def test_road_map_cache():
+    default_map_builder.clear_road_map_cache()
+    road_maps = [
+        default_map_builder.get_road_map(MapSpec(source=source))[0]
+        for source in MAP_SOURCES
+    ]
+    stats = default_map_builder.road_map_cache_stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (0, 3, 0)
+    assert stats.maps == 3 and stats.size > 0
+
+    for source, road_map in zip(MAP_SOURCES * 2, road_maps * 2):
+        assert default_map_builder.get_road_map(MapSpec(source=source))[0] is road_map
+    assert default_map_builder.road_map_cache_stats().hits == 6
+
+    spec = MapSpec(source=MAP_SOURCES[0], lanepoint_spacing=2.0)
+    assert default_map_builder.get_road_map(spec)[0] is not road_maps[0]
+    assert default_map_builder.road_map_cache_stats().misses == 4
+    default_map_builder.clear_road_map_cache()
+
+
+def test_road_map_cache_evicts_least_recently_used(monkeypatch):
+    default_map_builder.clear_road_map_cache()
+    monkeypatch.setattr(default_map_builder, "ROAD_MAP_CACHE_MAX_BYTES", 1)
+    for source in MAP_SOURCES:
+        default_map_builder.get_road_map(MapSpec(source=source))
+    stats = default_map_builder.road_map_cache_stats()
+    assert (stats.misses, stats.evictions, stats.maps) == (3, 2, 1)
+
+    default_map_builder.get_road_map(MapSpec(source=MAP_SOURCES[-1]))
+    assert default_map_builder.road_map_cache_stats().hits == 1
+    default_map_builder.clear_road_map_cache()
+
+
+def test_road_map_hash_is_cached_until_the_file_changes(tmp_path):
+    map_path = str(tmp_path / "map.net.xml")
+    shutil.copyfile(MAP_SOURCES[1], map_path)
+    map_hash = default_map_builder._map_hash(map_path)
+    hits = default_map_builder._cached_file_md5_hash.cache_info().hits
+    assert default_map_builder._map_hash(map_path) == map_hash
+    assert default_map_builder._cached_file_md5_hash.cache_info().hits == hits + 1
+
+    with open(map_path, "a") as f:
+        f.write("<!-- changed -->\n")
+    assert default_map_builder._map_hash(map_path) != map_hash
+
+
 def test_opendrive_map_4lane(opendrive_scenario_4lane):
     road_map = opendrive_scenario_4lane.road_map
     assert isinstance(road_map, OpenDriveRoadNetwork)
@@ -0,0 +1,128 @@
+# MIT License
+#
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import json
+import math
+
+import pytest
+from helpers.scenario import temp_scenario
+
+from smarts.core.agent_interface import ActionSpaceType, AgentInterface
+from smarts.core.scenario import Scenario
+from smarts.core.smarts import SMARTS
+from smarts.core.sumo_traffic_simulation import SumoTrafficSimulation
+from smarts.sstudio import gen_scenario
+from smarts.sstudio import types as t
+
+AGENT_ID = "Agent-007"
+STEPS = 40
+
+
+def _write_history(path, vehicle_count=30, speed=5.0, dt=0.1, duration=20.0):
+    # Vehicles enter the two upper lanes of the straight map in turn and drive east.
+    history = {}
+    for step in range(int(duration / dt)):
+        sim_time = step * dt
+        states = {}
+        for vid in range(vehicle_count):
+            start_time = vid * 0.5
+            if sim_time < start_time:
+                continue
+            x = speed * (sim_time - start_time)
+            if x > 200:
+                continue
+            states[str(vid)] = {
+                "vehicle_id": vid,
+                "vehicle_type": "car",
+                "position": [x, 3.2 * (1 + vid % 2), 0],
+                "heading": -math.pi / 2,
+                "speed": speed,
+                "vehicle_length": 4.5,
+                "vehicle_width": 1.8,
+            }
+        history[f"{sim_time:.1f}"] = states
+    with open(path, "w") as f:
+        json.dump(history, f)
+
+
+@pytest.fixture(scope="module", params=["history", "sumo"])
+def scenario_kind(request):
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def scenario_root(scenario_kind):
+    with temp_scenario(name="straight", map="maps/straight.net.xml") as scenario_root:
+        mission = t.Mission(t.Route(begin=("west", 0, 10), end=("east", 0, "max")))
+        if scenario_kind == "history":
+            _write_history(scenario_root / "history.json")
+            scenario = t.Scenario(
+                ego_missions=[mission], traffic_histories=["history.json"]
+            )
+        else:
+            flow = t.Flow(
+                route=t.Route(begin=("west", 1, 0), end=("east", 1, "max")),
+                rate=3600,
+                actors={t.TrafficActor("car"): 1},
+            )
+            scenario = t.Scenario(
+                ego_missions=[mission], traffic={"all": t.Traffic(flows=[flow])}
+            )
+        gen_scenario(scenario, output_dir=scenario_root)
+        yield scenario_root
+
+
+@pytest.mark.benchmark(group="smarts.step")
+@pytest.mark.parametrize(
+    "pybullet_substep_travel", [None, 0.5], ids=["fixed_substeps", "adaptive"]
+)
+@pytest.mark.parametrize(
+    "action_space, action",
+    [(ActionSpaceType.Imitation, (1.0, 0.0)), (ActionSpaceType.Lane, "keep_lane")],
+    ids=["kinematic_agent", "dynamic_agent"],
+)
+def test_benchmark_step(
+    scenario_kind,
+    scenario_root,
+    action_space,
+    action,
+    pybullet_substep_travel,
+    benchmark,
+):
+    if action_space == ActionSpaceType.Imitation and pybullet_substep_travel:
+        pytest.skip("Substepping only applies to dynamic chassis.")
+    smarts = SMARTS(
+        {AGENT_ID: AgentInterface(max_episode_steps=None, action=action_space)},
+        traffic_sim=(
+            SumoTrafficSimulation(headless=True) if scenario_kind == "sumo" else None
+        ),
+        pybullet_substep_travel=pybullet_substep_travel,
+    )
+    scenario = next(
+        Scenario.variations_for_all_scenario_roots([str(scenario_root)], [AGENT_ID])
+    )
+    smarts.reset(scenario)
+
+    # Each round is a single step so the reported ops/sec are steps/sec.
+    benchmark.pedantic(
+        smarts.step, args=({AGENT_ID: action},), rounds=STEPS, iterations=1
+    )
+    smarts.destroy()
@@ -0,0 +1,115 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import numpy as np
+import pytest
+
+from smarts.core.coordinates import Dimensions, Heading, Pose
+from smarts.core.provider import VEHICLE_STATE_DTYPE, ProviderState
+from smarts.core.vehicle import VehicleState
+
+
+def _vehicle_state(vehicle_id, x):
+    return VehicleState(
+        vehicle_id=vehicle_id,
+        vehicle_config_type="passenger",
+        pose=Pose.from_center(np.array([x, 1.0, 0.0]), Heading(0.5)),
+        dimensions=Dimensions(4.0, 2.0, 1.5),
+        speed=x,
+        source="EXTERNAL",
+    )
+
+
+@pytest.fixture
+def array_state():
+    return ProviderState.from_arrays(
+        ["a", "b", "c"],
+        positions=np.array([[0.0, 1.0], [1.0, 1.0], [2.0, 1.0]]),
+        headings=np.full(3, 0.5),
+        speeds=np.arange(3.0),
+        dimensions=np.tile([4.0, 2.0, 1.5], (3, 1)),
+        source="SUMO",
+        vehicle_config_types="passenger",
+        dt=0.1,
+    )
+
+
+def test_vehicles_are_built_on_access(array_state):
+    assert len(array_state) == 3
+    assert array_state.array.dtype == VEHICLE_STATE_DTYPE
+    assert array_state._states == [None] * 3
+
+    vehicle_state = array_state.vehicle_at(1)
+    assert vehicle_state.vehicle_id == "b"
+    assert vehicle_state.source == "SUMO"
+    assert vehicle_state.speed == 1.0
+    assert float(vehicle_state.pose.heading) == 0.5
+    np.testing.assert_allclose(vehicle_state.pose.position, [1.0, 1.0, 0.0])
+    assert array_state._states[0] is None
+
+    vehicles = array_state.vehicles
+    assert vehicles[1] is vehicle_state
+    assert [v.vehicle_id for v in vehicles] == ["a", "b", "c"]
+    assert vehicles[2].dimensions == Dimensions(4.0, 2.0, 1.5)
+
+
+def test_merge_and_filter(array_state):
+    other = ProviderState([_vehicle_state("d", 3.0)], dt=0.2)
+    array_state.merge(other)
+    assert list(array_state.vehicle_ids) == ["a", "b", "c", "d"]
+    assert list(array_state.sources) == ["SUMO"] * 3 + ["EXTERNAL"]
+    assert array_state.dt == 0.2
+    np.testing.assert_allclose(array_state.array["speed"], [0.0, 1.0, 2.0, 3.0])
+    assert array_state.vehicle_at(3) is other.vehicles[0]
+
+    with pytest.raises(AssertionError):
+        array_state.merge(ProviderState([_vehicle_state("a", 0.0)]))
+
+    array_state.filter({"b", "d", "unknown"})
+    assert [v.vehicle_id for v in array_state.vehicles] == ["a", "c"]
+    np.testing.assert_allclose(array_state.array["speed"], [0.0, 2.0])
+    assert list(array_state.contains(["c"])) == [False, True]
+
+
+def test_empty_state():
+    for state in [
+        ProviderState(),
+        ProviderState.from_arrays([], [], [], [], [], "SUMO", "passenger"),
+    ]:
+        assert len(state) == 0
+        assert state.vehicles == []
+        assert len(state.array) == 0
+        state.merge(ProviderState([_vehicle_state("a", 0.0)]))
+        assert list(state.vehicle_ids) == ["a"]
+
+
+def test_from_vehicle_states_fills_columns(array_state):
+    vehicles = [_vehicle_state("d", 3.0), _vehicle_state("e", 4.0)]
+    state = ProviderState.from_vehicle_states(vehicles, dt=0.1)
+    assert state.vehicles == vehicles
+    assert state.vehicle_at(1) is vehicles[1]
+    assert list(state.sources) == ["EXTERNAL", "EXTERNAL"]
+    np.testing.assert_allclose(state.array["speed"], [3.0, 4.0])
+    np.testing.assert_allclose(state.array["dimensions"], [[4.0, 2.0, 1.5]] * 2)
+
+    assert state == ProviderState(vehicles, dt=0.1)
+    assert state != ProviderState(vehicles, dt=0.2)
+    assert state != array_state
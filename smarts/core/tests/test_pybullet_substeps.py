@@ -0,0 +1,127 @@
+# MIT License
+#
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import math
+
+import numpy as np
+import pytest
+from helpers.scenario import temp_scenario
+
+from smarts.core.agent_interface import ActionSpaceType, AgentInterface
+from smarts.core.chassis import BoxChassis
+from smarts.core.coordinates import Heading, Pose
+from smarts.core.scenario import Scenario
+from smarts.core.smarts import MAX_PYBULLET_FREQ, MIN_PYBULLET_FREQ, SMARTS
+from smarts.core.utils import pybullet
+from smarts.core.utils.pybullet import bullet_client as bc
+from smarts.core.vehicle import VEHICLE_CONFIGS
+from smarts.sstudio import gen_scenario
+from smarts.sstudio import types as t
+
+AGENT_ID = "Agent-007"
+TIMESTEP_SEC = 0.1
+
+
+@pytest.fixture
+def scenarios():
+    with temp_scenario(name="straight", map="maps/straight.net.xml") as scenario_root:
+        mission = t.Mission(
+            t.Route(begin=("west", 0, 10), end=("east", 0, "max")),
+        )
+        gen_scenario(
+            t.Scenario(ego_missions=[mission]),
+            output_dir=scenario_root,
+        )
+
+        yield Scenario.variations_for_all_scenario_roots(
+            [str(scenario_root)], [AGENT_ID]
+        )
+
+
+def _smarts(action_space):
+    return SMARTS(
+        {AGENT_ID: AgentInterface(max_episode_steps=1000, action=action_space)},
+        traffic_sim=None,
+        fixed_timestep_sec=TIMESTEP_SEC,
+        pybullet_substep_travel=0.1,
+    )
+
+
+def test_box_chassis_settle():
+    client = bc.BulletClient(pybullet.DIRECT)
+    try:
+        dimensions = VEHICLE_CONFIGS["passenger"].dimensions
+        chassis = BoxChassis(
+            Pose.from_center([0, 0, 0], Heading(0)),
+            speed=0,
+            dimensions=dimensions,
+            bullet_client=client,
+        )
+        pose = Pose.from_center([12, 3, 0], Heading(math.pi * 0.5))
+        chassis.control(pose, speed=10)
+        chassis.settle()
+
+        position, orientation = client.getBasePositionAndOrientation(chassis.bullet_id)
+        assert np.allclose(position[:2], pose.position[:2])
+        assert np.allclose(orientation, pose.orientation)
+    finally:
+        client.disconnect()
+
+
+def test_substeps_adapt_to_speed(scenarios):
+    smarts = _smarts(ActionSpaceType.Lane)
+    try:
+        smarts.reset(next(scenarios))
+        substeps = []
+        for _ in range(40):
+            _, _, dones, _ = smarts.step({AGENT_ID: "keep_lane"})
+            substeps.append(smarts._pybullet_substeps)
+            if dones[AGENT_ID]:
+                break
+    finally:
+        smarts.destroy()
+
+    assert min(substeps) == int(TIMESTEP_SEC * MIN_PYBULLET_FREQ)
+    assert max(substeps) > min(substeps)
+    assert max(substeps) <= int(TIMESTEP_SEC * MAX_PYBULLET_FREQ)
+
+
+def test_kinematic_agents_skip_physics_step(scenarios, monkeypatch):
+    smarts = _smarts(ActionSpaceType.Imitation)
+    try:
+        smarts.reset(next(scenarios))
+        physics_steps = []
+        monkeypatch.setattr(
+            smarts._bullet_client,
+            "stepSimulation",
+            lambda: physics_steps.append(smarts.elapsed_sim_time),
+        )
+        for _ in range(10):
+            smarts.step({AGENT_ID: (1.0, 0.0)})
+        vehicle = smarts.vehicle_index.vehicles[0]
+        position, _ = smarts._bullet_client.getBasePositionAndOrientation(
+            vehicle.chassis.bullet_id
+        )
+        assert np.allclose(position[:2], vehicle.pose.position[:2])
+    finally:
+        smarts.destroy()
+
+    assert not physics_steps
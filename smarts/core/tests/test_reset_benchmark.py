@@ -0,0 +1,73 @@
+# MIT License
+#
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import math
+from itertools import cycle
+
+import pytest
+
+from smarts.core.agent_interface import ActionSpaceType, AgentInterface
+from smarts.core.coordinates import Heading
+from smarts.core.plan import EndlessGoal, Mission, Start
+from smarts.core.scenario import Scenario
+from smarts.core.smarts import SMARTS
+from smarts.core.sumo_traffic_simulation import SumoTrafficSimulation
+
+AGENT_ID = "Agent-007"
+
+
+def _scenarios():
+    # Consecutive scenarios differ in their missions but share the map
+    scenarios = []
+    for position in [(71.65, 63.78), (56.82, 66.02)]:
+        mission = Mission(
+            start=Start(position, Heading(math.pi * 0.91)), goal=EndlessGoal()
+        )
+        scenarios.append(
+            Scenario(
+                scenario_root="scenarios/loop",
+                route="basic.rou.xml",
+                missions={AGENT_ID: mission},
+            )
+        )
+    return cycle(scenarios)
+
+
+@pytest.mark.benchmark(group="smarts.reset")
+@pytest.mark.parametrize("warm_reset", [True, False], ids=["warm", "cold"])
+def test_benchmark_reset(warm_reset, benchmark):
+    smarts = SMARTS(
+        {AGENT_ID: AgentInterface(max_episode_steps=None, action=ActionSpaceType.Lane)},
+        traffic_sim=SumoTrafficSimulation(headless=True),
+        warm_reset=warm_reset,
+    )
+    scenarios = _scenarios()
+    smarts.reset(next(scenarios))
+
+    def reset():
+        smarts.reset(next(scenarios))
+        for _ in range(10):
+            smarts.step({})
+
+    try:
+        benchmark.pedantic(reset, rounds=20)
+    finally:
+        smarts.destroy()
@@ -0,0 +1,48 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import pytest
+
+from smarts.core.sumo_road_network import SumoRoadNetwork
+from smarts.core.utils.geometry import generate_mesh_from_polygons
+from smarts.sstudio.types import MapSpec
+
+
+@pytest.fixture(
+    scope="module",
+    params=["scenarios/minicity/map.net.xml", "scenarios/cloverleaf/map.net.xml"],
+)
+def road_map(request):
+    return SumoRoadNetwork.from_spec(MapSpec(source=request.param))
+
+
+@pytest.mark.benchmark(group="road_mesh.compute_road_polygons")
+def test_benchmark_compute_road_polygons(road_map, benchmark):
+    benchmark.pedantic(road_map._compute_road_polygons, rounds=3)
+
+
+@pytest.mark.benchmark(group="road_mesh.generate_mesh_from_polygons")
+@pytest.mark.parametrize("processes", [1, None])
+def test_benchmark_generate_mesh(road_map, processes, benchmark):
+    polygons = road_map._compute_road_polygons()
+    benchmark.pedantic(
+        generate_mesh_from_polygons, args=(polygons, processes), rounds=3
+    )
@@ -24,6 +24,7 @@ import itertools
 import pytest
 from helpers.scenario import temp_scenario
 
+from smarts.core import seed
 from smarts.core.scenario import Scenario
 from smarts.core.utils.id import SocialAgentId
 from smarts.sstudio import gen_missions, gen_social_agent_missions
@@ -118,3 +119,46 @@ def test_scenario_variations(scenario_root):
         scenario = next(acyclic_iterator)
     with pytest.raises(StopIteration):
         _ = next(acyclic_iterator)
+
+
+def _variation_keys(scenarios):
+    return [(s.route, sorted(s.missions), sorted(s.social_agents)) for s in scenarios]
+
+
+def test_scenario_resources_are_discovered_once(scenario_root, monkeypatch):
+    discovered = []
+    discover_friction_map = Scenario.discover_friction_map
+    monkeypatch.setattr(
+        Scenario,
+        "discover_friction_map",
+        lambda root: discovered.append(root) or discover_friction_map(root),
+    )
+
+    iterator = Scenario.variations_for_all_scenario_roots(
+        [str(scenario_root)] * 3, [AGENT_ID], shuffle_scenarios=False
+    )
+    scenarios = list(iterator)
+    assert len(scenarios) == 18
+    assert discovered == [str(scenario_root)]
+
+
+def test_scenario_variations_prefetch(scenario_root):
+    roots = [str(scenario_root)] * 2
+    prefetched = Scenario.variations_for_all_scenario_roots(
+        roots, [AGENT_ID], shuffle_scenarios=False, prefetch=True
+    )
+    assert _variation_keys(prefetched) == _variation_keys(
+        Scenario.variations_for_all_scenario_roots(
+            roots, [AGENT_ID], shuffle_scenarios=False
+        )
+    )
+
+    def shuffled_variations():
+        seed(42)
+        return _variation_keys(
+            itertools.islice(
+                Scenario.scenario_variations(roots, [AGENT_ID], prefetch=True), 12
+            )
+        )
+
+    assert shuffled_variations() == shuffled_variations()
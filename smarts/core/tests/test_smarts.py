@@ -98,3 +98,42 @@ def test_smarts_doesnt_leak_tasks_after_reset(smarts, scenarios):
         raise RendererException.required_to("test smarts_doesnt_leak_tasks_after_reset")
 
     assert num_tasks_after_reset == num_tasks_before_reset
+
+
+@pytest.mark.parametrize("warm_reset", [True, False])
+def test_smarts_reset_between_scenarios_sharing_a_map(warm_reset):
+    agent_interface = AgentInterface(
+        max_episode_steps=1000, action=ActionSpaceType.Lane
+    )
+    smarts = SMARTS(
+        {"Agent-007": agent_interface},
+        traffic_sim=SumoTrafficSimulation(headless=True),
+        warm_reset=warm_reset,
+    )
+    starts = [(71.65, 63.78), (56.82, 66.02)]
+    ground_bullet_ids = set()
+    try:
+        for position in starts + starts:
+            mission = Mission(
+                start=Start(position, Heading(math.pi * 0.91)), goal=EndlessGoal()
+            )
+            scenario = Scenario(
+                scenario_root="scenarios/loop",
+                route="basic.rou.xml",
+                missions={"Agent-007": mission},
+            )
+            smarts.reset(scenario)
+            for _ in range(10):
+                smarts.step({})
+
+            # Only the ground plane and the current vehicles are in the bullet world
+            assert (
+                smarts._bullet_client.getNumBodies()
+                == len(smarts.vehicle_index.vehicle_ids()) + 1
+            )
+            ground_bullet_ids.add(smarts._ground_bullet_id)
+    finally:
+        smarts.destroy()
+
+    if warm_reset:
+        assert len(ground_bullet_ids) == 1
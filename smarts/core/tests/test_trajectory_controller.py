@@ -165,3 +165,82 @@ def step_with_vehicle_commands(
 def test_trajectory_tracking(bullet_client, vehicle, radius, omega):
     final_error = step_with_vehicle_commands(bullet_client, vehicle, radius, omega)
     assert final_error <= 10
+
+
+def _reference_MPC(
+    heading_error, lateral_error, dt, state_matrix, input_matrix, drift_matrix, horizon
+):
+    """The MPC prediction built block by block with explicit matrix powers."""
+    matrix_A = np.eye(4) + dt * state_matrix
+    matrix_B = dt * input_matrix
+    matrix_b0 = dt * drift_matrix[:, 0]
+    power = np.linalg.matrix_power
+    matrix_M = np.concatenate([power(matrix_A, i + 1) for i in range(horizon)])
+    matrix_T_tilde = np.concatenate(
+        [power(matrix_A, i) @ matrix_b0 for i in range(horizon)]
+    )
+    matrix_C = np.zeros((4 * horizon, horizon))
+    for i in range(horizon):
+        for j in range(i + 1):
+            matrix_C[4 * i : 4 * i + 4, j] = (power(matrix_A, i - j) @ matrix_B)[:, 0]
+    Q_tilde = np.kron(np.eye(horizon), 0.1 * np.diag([354, 0, 14, 250]))
+    matrix_H = matrix_C.T @ Q_tilde @ matrix_C + np.eye(horizon)
+    matrix_F = matrix_C.T @ Q_tilde @ matrix_M
+    matrix_F1 = matrix_C.T @ Q_tilde @ matrix_T_tilde
+    solution = np.linalg.inv(2 * matrix_H) @ (
+        matrix_F @ np.array([lateral_error, 0, heading_error, 0]) + matrix_F1
+    )
+    return np.clip(-solution[0], -1, 1)
+
+
+def _random_mpc_problem(rng, horizon):
+    speed = rng.uniform(0.1, 30)
+    stiffness, mass, inertia, half_len = 2e4, 1.5e3, 2.5e3, 2.0
+    state_matrix = np.array(
+        [
+            [0, 1, 0, 0],
+            [0, -2 * stiffness / (mass * speed), 2 * stiffness / mass, 0],
+            [0, 0, 0, 1],
+            [0, rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 0)],
+        ]
+    )
+    input_matrix = np.array([[0], [stiffness / mass], [0], [stiffness / inertia]])
+    drift_matrix = rng.uniform(-1, 1, size=(4, 1)) * np.ones((4, horizon))
+    return (
+        rng.uniform(-0.5, 0.5),
+        rng.uniform(-2, 2),
+        time_step,
+        state_matrix,
+        input_matrix,
+        drift_matrix,
+        horizon,
+    )
+
+
+@pytest.mark.parametrize("horizon", [1, 5, 10])
+def test_mpc_matches_reference(horizon):
+    rng = np.random.default_rng(42)
+    problems = [_random_mpc_problem(rng, horizon) for _ in range(20)]
+    for problem in problems:
+        np.testing.assert_allclose(
+            TrajectoryTrackingController.MPC(None, *problem),
+            _reference_MPC(*problem),
+            rtol=1e-7,
+            atol=1e-9,
+        )
+
+    heading_errors, lateral_errors, _, states, inputs, drifts, _ = zip(*problems)
+    np.testing.assert_allclose(
+        TrajectoryTrackingController.MPC_batch(
+            np.array(heading_errors),
+            np.array(lateral_errors),
+            time_step,
+            np.array(states),
+            np.array(inputs),
+            np.array(drifts)[:, :, 0],
+            horizon,
+        ),
+        [_reference_MPC(*problem) for problem in problems],
+        rtol=1e-7,
+        atol=1e-9,
+    )
@@ -310,3 +310,47 @@ def test_trajectory_interpolation_provider_in_smarts(smarts, agent_spec, scenari
     assert np.linalg.norm(curr_position[:2] - init_position[:2]) > 1e-16
     assert not np.isclose(curr_heading, init_heading)
     assert not np.isclose(curr_speed, init_speed)
+
+
+def test_batched_interpolation_matches_motion_states():
+    rng = np.random.default_rng(42)
+    trajectories = []
+    for length in rng.integers(2, 20, size=50):
+        times = np.cumsum(rng.uniform(0.01, 0.2, size=length))
+        times[0] = 0.0
+        trajectories.append(
+            np.array(
+                [
+                    times,
+                    rng.uniform(-100, 100, size=length),
+                    rng.uniform(-100, 100, size=length),
+                    rng.uniform(-math.pi, math.pi, size=length),
+                    rng.uniform(0, 20, size=length),
+                ]
+            )
+        )
+    # The interpolation time must fall inside every trajectory
+    dt = min(
+        trajectory[TrajectoryWithTime.TIME_INDEX][-1] for trajectory in trajectories
+    )
+    dt *= 0.9
+
+    (
+        positions,
+        headings,
+        speeds,
+    ) = TrajectoryInterpolationProvider.perform_trajectory_interpolation_batch(
+        dt, trajectories
+    )
+    for trajectory, position, heading, speed in zip(
+        trajectories, positions, headings, speeds
+    ):
+        motion_state = TrajectoryInterpolationProvider.interpolate(
+            *TrajectoryInterpolationProvider.locate_motion_state(trajectory, dt), dt
+        )
+        assert np.allclose(
+            position,
+            motion_state[TrajectoryWithTime.X_INDEX : TrajectoryWithTime.Y_INDEX + 1],
+        )
+        assert np.isclose(heading, motion_state[TrajectoryWithTime.THETA_INDEX])
+        assert np.isclose(speed, motion_state[TrajectoryWithTime.VEL_INDEX])
@@ -0,0 +1,129 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import numpy as np
+import pytest
+
+from smarts.core.coordinates import Heading, Point, Pose, RefLinePoint
+from smarts.core.road_map import WAYPOINT_DTYPE, WaypointPath
+from smarts.core.sumo_road_network import SumoRoadNetwork
+from smarts.core.waypoints_cache import WaypointsCache
+from smarts.sstudio.types import MapSpec
+
+
+@pytest.fixture(scope="module")
+def road_map():
+    return SumoRoadNetwork.from_spec(
+        MapSpec(source="scenarios/loop/map.net.xml", lanepoint_spacing=1.0)
+    )
+
+
+@pytest.fixture
+def lane(road_map):
+    road_map._waypoints_cache = WaypointsCache()
+    return max(
+        (road_map.lane_by_id(lane_id) for lane_id in road_map._lanes),
+        key=lambda lane: lane.length,
+    )
+
+
+def _pose_at(lane, offset):
+    position = lane.from_lane_coord(RefLinePoint(offset))
+    return Pose.from_center(np.array([position.x, position.y, 0]), Heading(0))
+
+
+def _positions(paths):
+    return [[wp.pos.tolist() for wp in path] for path in paths]
+
+
+def test_incremental_paths_match_fresh_paths(road_map, lane):
+    lanepoints = road_map._lanepoints
+    cache = road_map._waypoints_cache
+    for offset in np.arange(0.5, lane.length - 1, 0.5):
+        point = Point(*lane.from_lane_coord(RefLinePoint(offset)))
+        linked_lp = lanepoints.closest_linked_lanepoint_on_lane_to_point(
+            point, lane.lane_id
+        )
+        cached = cache._lanepoint_paths_for(lanepoints, linked_lp, 30, ())
+        fresh = lanepoints.paths_starting_at_lanepoint(linked_lp, 30, ())
+        assert len(cached) == len(fresh)
+        for cached_path, fresh_path in zip(cached, fresh):
+            assert all(a is b for a, b in zip(cached_path, fresh_path))
+            assert len(cached_path) == len(fresh_path)
+
+    assert cache.incremental_hits > 0
+
+
+def test_waypoint_paths_match_uncached(road_map, lane):
+    cache = road_map._waypoints_cache
+    for offset in np.arange(0.3, lane.length - 1, 3.1):
+        pose = _pose_at(lane, offset)
+        cached = road_map.waypoint_paths(pose, 30)
+        cache.clear()
+        assert _positions(cached) == _positions(road_map.waypoint_paths(pose, 30))
+
+
+def test_alternating_vehicles_hit(road_map, lane):
+    cache = road_map._waypoints_cache
+    poses = [_pose_at(lane, offset) for offset in (5.3, 40.7, 80.1)]
+    first = [road_map.waypoint_paths(pose, 30) for pose in poses]
+    misses = cache.misses + cache.incremental_hits + cache.lanepoint_hits
+
+    for _ in range(3):
+        for pose, expected in zip(poses, first):
+            assert _positions(road_map.waypoint_paths(pose, 30)) == _positions(expected)
+            # A smaller lookahead is served from the same entry
+            shorter = road_map.waypoint_paths(pose, 10)
+            assert all(len(path) <= 11 for path in shorter)
+
+    assert cache.misses + cache.incremental_hits + cache.lanepoint_hits == misses
+    # One hit per lane of the road
+    assert cache.hits >= 3 * 2 * len(poses)
+
+
+def test_cache_is_bounded(road_map, lane):
+    cache = WaypointsCache(maxsize=4)
+    road_map._waypoints_cache = cache
+    for offset in np.arange(0.3, 20, 0.5):
+        road_map.waypoint_paths(_pose_at(lane, offset), 10)
+    assert cache.stats["size"] == 4
+    assert len(cache._lanepoint_paths) <= 4
+    assert len(cache._predecessors) <= 4
+
+
+def test_waypoint_path_is_a_lazy_view(road_map, lane):
+    (path, *_) = road_map.waypoint_paths(_pose_at(lane, 10.2), 30)
+    assert isinstance(path, WaypointPath)
+    assert path.array.dtype == WAYPOINT_DTYPE
+    assert len(path) == len(path.lane_ids) == 31
+
+    waypoints = list(path)
+    assert path == waypoints and waypoints == path
+    assert path[-1] == waypoints[-1]
+    assert isinstance(path[3:7], WaypointPath)
+    assert path[3:7] == waypoints[3:7]
+    assert path[0].lane_id == lane.lane_id
+    assert isinstance(path[0].lane_index, int)
+    np.testing.assert_allclose(
+        np.linalg.norm(np.diff(path.array["pos"][1:], axis=0), axis=1),
+        np.linalg.norm(path.array["pos"][2] - path.array["pos"][1]),
+        rtol=1e-4,
+    )
@@ -20,8 +20,10 @@
 
 from typing import Iterable, Optional, Set
 
+import numpy as np
+
 from .controllers import ActionSpaceType
-from .coordinates import Dimensions, Heading, Pose
+from .coordinates import Dimensions
 from .provider import Provider, ProviderState
 from .utils.math import rounder_for_dt
 from .vehicle import VEHICLE_CONFIGS, VehicleState
@@ -98,39 +100,50 @@ class TrafficHistoryProvider(Provider):
     ) -> ProviderState:
         if not self._histories:
             return ProviderState(vehicles=[])
-        vehicles = []
         vehicle_ids = set()
         rounder = rounder_for_dt(dt)
         history_time = rounder(self._start_time_offset + elapsed_sim_time)
         prev_time = rounder(history_time - dt)
         rows = self._histories.vehicles_active_between(prev_time, history_time)
+        provider_vehicle_ids = []
+        vehicle_config_types = []
+        values = []
         for hr in rows:
             v_id = str(hr.vehicle_id)
             if v_id in vehicle_ids or v_id in self._replaced_vehicle_ids:
                 continue
             vehicle_ids.add(v_id)
             vehicle_config_type = self._histories.decode_vehicle_type(hr.vehicle_type)
-            vehicles.append(
-                VehicleState(
-                    vehicle_id=self._vehicle_id_prefix + v_id,
-                    vehicle_config_type=vehicle_config_type,
-                    pose=Pose.from_center(
-                        (hr.position_x, hr.position_y, 0), Heading(hr.heading_rad)
-                    ),
-                    # Note: Neither NGSIM nor INTERACTION provide the vehicle height
-                    dimensions=Dimensions.init_with_defaults(
-                        hr.vehicle_length,
-                        hr.vehicle_width,
-                        hr.vehicle_height,
-                        defaults=VEHICLE_CONFIGS[vehicle_config_type].dimensions,
-                    ),
-                    speed=hr.speed,
-                    source="HISTORY",
+            # Note: Neither NGSIM nor INTERACTION provide the vehicle height
+            dimensions = Dimensions.init_with_defaults(
+                hr.vehicle_length,
+                hr.vehicle_width,
+                hr.vehicle_height,
+                defaults=VEHICLE_CONFIGS[vehicle_config_type].dimensions,
+            )
+            provider_vehicle_ids.append(self._vehicle_id_prefix + v_id)
+            vehicle_config_types.append(vehicle_config_type)
+            values.append(
+                (
+                    hr.position_x,
+                    hr.position_y,
+                    hr.heading_rad,
+                    hr.speed,
+                    *dimensions.as_lwh,
                 )
             )
+        values = np.array(values, dtype=np.float64).reshape(-1, 7)
         self._this_step_dones = {
             self._vehicle_id_prefix + v_id
             for v_id in self._last_step_vehicles - vehicle_ids
         }
         self._last_step_vehicles = vehicle_ids
-        return ProviderState(vehicles=vehicles)
+        return ProviderState.from_arrays(
+            vehicle_ids=provider_vehicle_ids,
+            positions=values[:, :2],
+            headings=values[:, 2],
+            speeds=values[:, 3],
+            dimensions=values[:, 4:],
+            source="HISTORY",
+            vehicle_config_types=vehicle_config_types,
+        )
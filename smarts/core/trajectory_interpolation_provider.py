@@ -18,7 +18,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import math
-from typing import Dict, Set, Tuple
+from typing import Dict, Sequence, Set, Tuple
 
 import numpy as np
 
@@ -64,31 +64,37 @@ class TrajectoryInterpolationProvider(Provider):
         self._next_provider_state = None
 
     def step(self, provider_actions: Dict, dt, elapsed_sim_time) -> ProviderState:
-        """[summary]
+        """Interpolate the trajectories of all vehicles at once.
 
         Args:
+            provider_actions: {vehicle_id: trajectory with time}
+            dt: The time step to interpolate the trajectories to.
+            elapsed_sim_time: The amount of time elapsed since simulation start.
 
         Returns:
-            ProviderState: [description]
+            ProviderState: The interpolated vehicle states.
         """
-
-        provider_state = ProviderState()
-
-        for vehicle_id, traj in provider_actions.items():
-            pose, speed = self.perform_trajectory_interpolation(dt, traj)
-
-            provider_state.vehicles.append(
-                VehicleState(
-                    vehicle_id=vehicle_id,
-                    vehicle_config_type="passenger",
-                    pose=pose,
-                    dimensions=VEHICLE_CONFIGS["passenger"].dimensions,
-                    speed=speed,
-                    source="TrajectoryInterpolation",
-                )
-            )
-
-        return provider_state
+        if not provider_actions:
+            return ProviderState()
+
+        (
+            positions,
+            headings,
+            speeds,
+        ) = TrajectoryInterpolationProvider.perform_trajectory_interpolation_batch(
+            dt, list(provider_actions.values())
+        )
+        return ProviderState.from_arrays(
+            vehicle_ids=list(provider_actions.keys()),
+            positions=positions,
+            headings=headings,
+            speeds=speeds,
+            dimensions=np.tile(
+                VEHICLE_CONFIGS["passenger"].dimensions.as_lwh, (len(speeds), 1)
+            ),
+            source="TrajectoryInterpolation",
+            vehicle_config_types="passenger",
+        )
 
     def create_vehicle(self, provider_vehicle: VehicleState):
         pass
@@ -164,30 +170,102 @@ class TrajectoryInterpolationProvider(Provider):
             vehicle : vehicle to be controlled
             trajectory (np.ndarray): trajectory with time
         """
-        TrajectoryInterpolationProvider.is_legal_trajectory(trajectory)
-
-        ms0, ms1 = TrajectoryInterpolationProvider.locate_motion_state(
-            trajectory, timestep_sec
+        (
+            positions,
+            headings,
+            speeds,
+        ) = TrajectoryInterpolationProvider.perform_trajectory_interpolation_batch(
+            timestep_sec, [trajectory]
         )
+        return Pose.from_center(positions[0], Heading(headings[0])), speeds[0]
 
-        speed = 0.0
-        pose = []
-        if math.isinf(ms0[TrajectoryWithTime.TIME_INDEX]) or math.isinf(
-            ms1[TrajectoryWithTime.TIME_INDEX]
-        ):
-            center_position = ms0[
-                TrajectoryWithTime.X_INDEX : TrajectoryWithTime.Y_INDEX + 1
-            ]
-            center_heading = Heading(ms0[TrajectoryWithTime.THETA_INDEX])
-            pose = Pose.from_center(center_position, center_heading)
-            speed = 0.0
+    @staticmethod
+    def perform_trajectory_interpolation_batch(
+        timestep_sec,
+        trajectories: Sequence[np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Interpolate several trajectories with time at once. The trajectories are
+        stacked into one array, padded to the longest trajectory, and the pair of
+        motion states around `timestep_sec` is located and interpolated for all of
+        them with array operations.
+
+        Args:
+            timestep_sec: The time to interpolate the trajectories to.
+            trajectories (Sequence[np.ndarray]): Trajectories with time, see
+                `perform_trajectory_interpolation`.
+
+        Returns:
+            The (N, 2) positions, (N,) headings and (N,) speeds.
+        """
+        lengths = []
+        for trajectory in trajectories:
+            assert (
+                len(trajectory[TrajectoryWithTime.TIME_INDEX]) >= 2
+            ), "Length of trajectory is less than 2!"
+            lengths.append(len(trajectory[TrajectoryWithTime.TIME_INDEX]))
+        lengths = np.array(lengths)
+        count, max_length = len(lengths), lengths.max()
+
+        if (lengths == max_length).all():
+            stacked = np.array(trajectories, dtype=float)
         else:
-            ms = TrajectoryInterpolationProvider.interpolate(ms0, ms1, timestep_sec)
+            stacked = np.zeros((count, len(trajectories[0]), max_length))
+            for i, trajectory in enumerate(trajectories):
+                stacked[i, :, : lengths[i]] = trajectory
+            # Padding never precedes a time
+            stacked[:, TrajectoryWithTime.TIME_INDEX][
+                np.arange(max_length) >= lengths[:, np.newaxis]
+            ] = np.inf
+        valid = np.arange(max_length) < lengths[:, np.newaxis]
+        times = stacked[:, TrajectoryWithTime.TIME_INDEX]
+
+        assert (
+            np.isfinite(stacked) | ~valid[:, np.newaxis]
+        ).all(), "Has nan, positive inf or negative inf in trajectory!"
+        with np.errstate(invalid="ignore"):
+            # The padding subtracts infinity from infinity
+            increasing = np.diff(times, axis=1) > 0
+        assert increasing[
+            valid[:, 1:]
+        ].all(), "Time of trajectory is not strictly increasing!"
+
+        # Times are strictly increasing so this is `np.searchsorted(times[i],
+        # timestep_sec, side="right")` for every trajectory: the index of the
+        # first motion state later than `timestep_sec`.
+        end_indices = np.count_nonzero(times <= timestep_sec, axis=1)
+        assert (
+            (end_indices > 0) & (end_indices < lengths)
+        ).all(), f"Expected relative time, {timestep_sec} sec, can not be located at input with-time-trajectory"
+
+        rows = np.arange(count)
+        ms0 = stacked[rows, :, end_indices - 1]
+        ms1 = stacked[rows, :, end_indices]
+        start_times = ms0[:, TrajectoryWithTime.TIME_INDEX]
+        end_times = ms1[:, TrajectoryWithTime.TIME_INDEX]
+        ratios = np.abs((timestep_sec - start_times) / (end_times - start_times))
+
+        positions = (1 - ratios[:, np.newaxis]) * ms0[
+            :, TrajectoryWithTime.X_INDEX : TrajectoryWithTime.Y_INDEX + 1
+        ] + ratios[:, np.newaxis] * ms1[
+            :, TrajectoryWithTime.X_INDEX : TrajectoryWithTime.Y_INDEX + 1
+        ]
+        speeds = (1 - ratios) * ms0[:, TrajectoryWithTime.VEL_INDEX] + ratios * ms1[
+            :, TrajectoryWithTime.VEL_INDEX
+        ]
+        theta0 = ms0[:, TrajectoryWithTime.THETA_INDEX]
+        theta1 = ms1[:, TrajectoryWithTime.THETA_INDEX]
+        headings = np.arctan2(
+            (1 - ratios) * np.sin(theta0) + ratios * np.sin(theta1),
+            (1 - ratios) * np.cos(theta0) + ratios * np.cos(theta1),
+        )
 
-            center_position = ms[
-                TrajectoryWithTime.X_INDEX : TrajectoryWithTime.Y_INDEX + 1
+        # Stop at the first motion state of trajectories with an infinite time
+        stopped = np.isinf(start_times) | np.isinf(end_times)
+        if stopped.any():
+            positions[stopped] = ms0[
+                stopped, TrajectoryWithTime.X_INDEX : TrajectoryWithTime.Y_INDEX + 1
             ]
-            center_heading = Heading(ms[TrajectoryWithTime.THETA_INDEX])
-            pose = Pose.from_center(center_position, center_heading)
-            speed = ms[TrajectoryWithTime.VEL_INDEX]
-        return pose, speed
+            headings[stopped] = theta0[stopped]
+            speeds[stopped] = 0.0
+
+        return positions, headings, speeds
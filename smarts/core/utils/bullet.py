@@ -149,6 +149,7 @@ class BulletPositionConstraint:
 
         self._bullet_shape = bullet_shape
         self._bullet_cid = None
+        self._target_pose = None
 
     def _make_constraint(self, pose: Pose):
         self._bullet_shape.reset_pose(pose)
@@ -175,6 +176,19 @@ class BulletPositionConstraint:
         # Move constraints slightly up to avoid ground collision
         ground_position = position + [0, 0, 0.2]
         self._client.changeConstraint(self._bullet_cid, ground_position, orientation)
+        self._target_pose = pose
+
+    def snap_to_target(self):
+        """Places the attached shape at the pose it is being pulled to without stepping
+        the physics."""
+        if self._target_pose is None:
+            return
+        position, orientation = self._target_pose.as_bullet()
+        self._client.resetBasePositionAndOrientation(
+            self._bullet_shape._bullet_id,
+            position + [0, 0, 0.2 + self._bullet_shape._height * 0.5],
+            orientation,
+        )
 
     def teardown(self):
         """Clean up unmanaged resources."""
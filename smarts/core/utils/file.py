@@ -21,6 +21,7 @@ import dataclasses
 import hashlib
 import os
 import shutil
+from collections import abc
 from contextlib import contextmanager
 
 
@@ -69,6 +70,9 @@ def unpack(obj):
         return dataclasses.asdict(obj)
     elif isinstance(obj, tuple):
         return tuple(unpack(value) for value in obj)
+    elif isinstance(obj, abc.Sequence) and not isinstance(obj, (str, bytes)):
+        # e.g. `WaypointPath`s, which are read as lists
+        return [unpack(value) for value in obj]
     else:
         return obj
 
@@ -19,7 +19,9 @@
 # THE SOFTWARE.
 
 import math
-from typing import List
+import multiprocessing
+import os
+from typing import List, Optional
 
 import numpy as np
 import trimesh
@@ -55,17 +57,37 @@ def triangulate_polygon(polygon: Polygon):
     ]
 
 
-def generate_mesh_from_polygons(polygons: List[Polygon]) -> trimesh.Trimesh:
-    """Creates a mesh out of a list of polygons."""
+def _triangle_coords(polygon: Polygon):
+    return [list(tri.exterior.coords) for tri in triangulate_polygon(polygon)]
+
+
+def generate_mesh_from_polygons(
+    polygons: List[Polygon], processes: Optional[int] = 1
+) -> trimesh.Trimesh:
+    """Creates a mesh out of a list of polygons.
+
+    Args:
+        polygons: The polygons to mesh.
+        processes: The number of worker processes used to triangulate the
+            polygons. `None` uses all available cores. Triangulation falls back
+            to the calling process when already inside a daemonic worker.
+    """
     vertices, faces = [], []
     point_dict = dict()
     current_point_index = 0
 
+    processes = processes or os.cpu_count() or 1
+    if processes > 1 and not multiprocessing.current_process().daemon:
+        chunksize = max(1, len(polygons) // (4 * processes))
+        with multiprocessing.Pool(processes) as pool:
+            triangulated = pool.map(_triangle_coords, polygons, chunksize)
+    else:
+        triangulated = map(_triangle_coords, polygons)
+
     # Trimesh's API require a list of vertices and a list of faces, where each
     # face contains three indexes into the vertices list. Ideally, the vertices
     # are all unique and the faces list references the same indexes as needed.
-    # TODO: Batch the polygon processing.
-    for poly in polygons:
+    for poly, triangles in zip(polygons, triangulated):
         # Collect all the points on the shape to reduce checks by 3 times
         for x, y in poly.exterior.coords:
             p = (x, y, 0)
@@ -73,11 +95,8 @@ def generate_mesh_from_polygons(polygons: List[Polygon]) -> trimesh.Trimesh:
                 vertices.append(p)
                 point_dict[p] = current_point_index
                 current_point_index += 1
-        triangles = triangulate_polygon(poly)
         for triangle in triangles:
-            face = np.array(
-                [point_dict.get((x, y, 0), -1) for x, y in triangle.exterior.coords]
-            )
+            face = np.array([point_dict.get((x, y, 0), -1) for x, y in triangle])
             # Add face if not invalid
             if -1 not in face:
                 faces.append(face)
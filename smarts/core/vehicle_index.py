@@ -18,6 +18,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import logging
+import os
 from copy import copy, deepcopy
 from enum import IntEnum
 from io import StringIO
@@ -92,6 +93,8 @@ class VehicleIndex:
 
         # Loaded from yaml file on scenario reset
         self._controller_params = {}
+        # (filepath, modification time) of the loaded controller params
+        self._controller_params_source = None
 
     @classmethod
     def identity(cls):
@@ -739,7 +742,15 @@ class VehicleIndex:
 
     def load_controller_params(self, controller_filepath: str):
         """Set the default controller parameters for actor controlled vehicles."""
+        mtime = None
+        if controller_filepath and os.path.exists(controller_filepath):
+            mtime = os.path.getmtime(controller_filepath)
+        source = (controller_filepath, mtime)
+        if self._controller_params and source == self._controller_params_source:
+            # Scenarios from the same root share the file, so skip parsing it again
+            return
         self._controller_params = resources.load_controller_params(controller_filepath)
+        self._controller_params_source = source
 
     def controller_params_for_vehicle_type(self, vehicle_type: str):
         """Get the controller parameters for the given vehicle type"""
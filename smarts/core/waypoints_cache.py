@@ -0,0 +1,142 @@
+# MIT License
+#
+# Copyright (C) 2022. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from collections import OrderedDict
+from typing import Callable, List, Sequence, Tuple
+
+from smarts.core.lanepoints import LanePoints, LinkedLanePoint
+from smarts.core.road_map import Waypoint
+
+
+class WaypointsCache:
+    """A bounded LRU cache of waypoint paths shared by all vehicles on a road map.
+
+    Two levels are kept:
+      - The waypoint paths for a `(lanepoint, point, route filter)`. These can serve
+        requests for a smaller lookahead, for example when the waypoints sensor and
+        the lane following controller query the same vehicle pose.
+      - The lanepoint paths for a `(lanepoint, lookahead, route filter)`. When a
+        vehicle moves within or advances along the same lane these are reused, or
+        derived incrementally from the paths of the previous lanepoint, and only
+        the equally spaced resampling is redone.
+
+    Args:
+        maxsize: The maximum number of entries of each level.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self._maxsize = maxsize
+        self._waypoint_paths = OrderedDict()
+        self._lanepoint_paths = OrderedDict()
+        # (next lanepoint, lookahead, route filter) -> key into `_lanepoint_paths`
+        self._predecessors = OrderedDict()
+        self.hits = 0
+        self.lanepoint_hits = 0
+        self.incremental_hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> dict:
+        """The hit and miss counters of this cache."""
+        return {
+            "hits": self.hits,
+            "lanepoint_hits": self.lanepoint_hits,
+            "incremental_hits": self.incremental_hits,
+            "misses": self.misses,
+            "size": len(self._waypoint_paths),
+        }
+
+    def clear(self):
+        """Drop all entries. Counters are kept."""
+        self._waypoint_paths.clear()
+        self._lanepoint_paths.clear()
+        self._predecessors.clear()
+
+    def waypoint_paths(
+        self,
+        lanepoints: LanePoints,
+        lanepoint: LinkedLanePoint,
+        lookahead: int,
+        filter_road_ids: tuple,
+        point: Tuple[float, float, float],
+        equally_spaced_path: Callable[
+            [Sequence[LinkedLanePoint], Tuple[float, float, float]], List[Waypoint]
+        ],
+    ) -> List[List[Waypoint]]:
+        """Get the equally spaced waypoint paths starting at `point` for all lane
+        paths starting at `lanepoint`, computing them if not cached.
+        """
+        # Lanepoints live as long as the road map so their ids are stable, the
+        # entry still holds the lanepoint to make sure.
+        key = (id(lanepoint), point[0], point[1], filter_road_ids)
+        entry = self._waypoint_paths.get(key)
+        if entry is not None and entry[0] is lanepoint and entry[1] >= lookahead:
+            self._waypoint_paths.move_to_end(key)
+            self.hits += 1
+            return [path[: (lookahead + 1)] for path in entry[2]]
+
+        lanepoint_paths = self._lanepoint_paths_for(
+            lanepoints, lanepoint, lookahead, filter_road_ids
+        )
+        result = [equally_spaced_path(path, point) for path in lanepoint_paths]
+        self._put(self._waypoint_paths, key, (lanepoint, lookahead, result))
+        return result
+
+    def _lanepoint_paths_for(
+        self,
+        lanepoints: LanePoints,
+        lanepoint: LinkedLanePoint,
+        lookahead: int,
+        filter_road_ids: tuple,
+    ) -> List[List[LinkedLanePoint]]:
+        key = (id(lanepoint), lookahead, filter_road_ids)
+        entry = self._lanepoint_paths.get(key)
+        if entry is not None and entry[0] is lanepoint:
+            self._lanepoint_paths.move_to_end(key)
+            self.lanepoint_hits += 1
+            return entry[1]
+
+        paths = None
+        previous_key = self._predecessors.get(key)
+        previous = self._lanepoint_paths.get(previous_key)
+        if previous is not None:
+            paths = LanePoints.advance_paths(previous[1], filter_road_ids)
+            if paths is not None and paths[0][0] is not lanepoint:
+                paths = None
+        if paths is not None:
+            self.incremental_hits += 1
+        else:
+            paths = lanepoints.paths_starting_at_lanepoint(
+                lanepoint, lookahead, filter_road_ids
+            )
+            self.misses += 1
+
+        self._put(self._lanepoint_paths, key, (lanepoint, paths))
+        if len(lanepoint.nexts) == 1:
+            next_key = (id(lanepoint.nexts[0]), lookahead, filter_road_ids)
+            self._put(self._predecessors, next_key, key)
+        return paths
+
+    def _put(self, cache: OrderedDict, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self._maxsize:
+            cache.popitem(last=False)
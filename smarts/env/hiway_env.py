@@ -57,6 +57,10 @@ class HiWayEnv(gym.Env):
         endless_traffic: bool = True,
         envision_endpoint: Optional[str] = None,
         envision_record_data_replay_path: Optional[str] = None,
+        envision_delta_encoding: bool = False,
+        envision_binary: bool = False,
+        envision_max_queue_size: Optional[int] = None,
+        envision_send_every_n_steps: int = 1,
         zoo_addrs: Optional[str] = None,
         timestep_sec: Optional[
             float
@@ -94,6 +98,15 @@ class HiWayEnv(gym.Env):
                 Defaults to None.
             envision_record_data_replay_path (Optional[str], optional):
                 Envision's data replay output directory. Defaults to None.
+            envision_delta_encoding (bool, optional): If True, Envision states
+                are sent as keyframes and per-step deltas. Defaults to False.
+            envision_binary (bool, optional): If True, Envision states are sent
+                to the server in the msgpack wire format. Defaults to False.
+            envision_max_queue_size (Optional[int], optional): Maximum number of
+                states waiting to be sent to Envision, the oldest are dropped
+                beyond it. Defaults to None (unbounded).
+            envision_send_every_n_steps (int, optional): Only send every Nth
+                step to Envision. Defaults to 1.
             zoo_addrs (Optional[str], optional): List of (ip, port) tuples of
                 zoo server, used to instantiate remote social agents. Defaults
                 to None.
@@ -132,6 +145,10 @@ class HiWayEnv(gym.Env):
                 sim_name=sim_name,
                 output_dir=envision_record_data_replay_path,
                 headless=headless,
+                delta_encoding=envision_delta_encoding,
+                binary=envision_binary,
+                max_queue_size=envision_max_queue_size,
+                send_every_n_steps=envision_send_every_n_steps,
             )
 
         visdom_client = None
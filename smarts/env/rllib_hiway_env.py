@@ -48,6 +48,14 @@ class RLlibHiWayEnv(MultiAgentEnv):
                 specify envision's data replay output directory (default None)
             envision_endpoint:
                 used to specify envision's uri (default None)
+            envision_delta_encoding:
+                true|false send envision states as keyframes and deltas (default False)
+            envision_binary:
+                true|false send envision states in the msgpack wire format (default False)
+            envision_max_queue_size:
+                maximum number of states waiting to be sent to envision (default None)
+            envision_send_every_n_steps:
+                only send every Nth step to envision (default 1)
             headless:
                 true|false envision disabled (default True)
             num_external_sumo_clients:
@@ -95,6 +103,10 @@ class RLlibHiWayEnv(MultiAgentEnv):
         self._envision_record_data_replay_path = config.get(
             "envision_record_data_replay_path", None
         )
+        self._envision_delta_encoding = config.get("envision_delta_encoding", False)
+        self._envision_binary = config.get("envision_binary", False)
+        self._envision_max_queue_size = config.get("envision_max_queue_size", None)
+        self._envision_send_every_n_steps = config.get("envision_send_every_n_steps", 1)
         timestep_sec = config.get("timestep_sec")
         if timestep_sec:
             warnings.warn(
@@ -206,6 +218,10 @@ class RLlibHiWayEnv(MultiAgentEnv):
                 sim_name=self._sim_name,
                 output_dir=self._envision_record_data_replay_path,
                 headless=self._headless,
+                delta_encoding=self._envision_delta_encoding,
+                binary=self._envision_binary,
+                max_queue_size=self._envision_max_queue_size,
+                send_every_n_steps=self._envision_send_every_n_steps,
             )
 
         sim = SMARTS(
@@ -19,14 +19,25 @@
 # THE SOFTWARE.
 
 import dataclasses
+from types import SimpleNamespace
 
 import gym
+import numpy as np
 import pytest
 
 from smarts.core.agent import Agent
 from smarts.core.agent_interface import AgentInterface, Waypoints
 from smarts.core.controllers import ActionSpaceType
-from smarts.env.wrappers.format_obs import FormatObs, get_spaces, intrfc_to_stdobs
+from smarts.core.coordinates import Dimensions, Heading, Pose
+from smarts.core.road_map import WAYPOINT_DTYPE, WaypointPath
+from smarts.core.sensors import VehicleObservations
+from smarts.env.wrappers.format_obs import (
+    FormatObs,
+    _std_neighbors,
+    _std_waypoints,
+    get_spaces,
+    intrfc_to_stdobs,
+)
 from smarts.zoo.agent_spec import AgentSpec
 
 
@@ -168,3 +179,39 @@ def test_observation(make_env):
         _check_observation(rcv_space[agent_id], ob)
 
     env.close()
+
+
+def test_arrays_match_objects():
+    rng = np.random.default_rng(42)
+    states = [
+        SimpleNamespace(
+            vehicle_id=f"car-{idx}",
+            pose=Pose.from_center(rng.uniform(-100, 100, 3), Heading(rng.uniform())),
+            dimensions=Dimensions(*rng.uniform(1, 5, 3)),
+            speed=rng.uniform(0, 30),
+        )
+        for idx in range(12)
+    ]
+    lane = SimpleNamespace(index=2, lane_id="lane_2", road=SimpleNamespace(road_id="r"))
+    arrays = VehicleObservations.from_vehicle_states(states[:7], [lane] * 7)
+    for nghbs in [arrays, VehicleObservations.from_vehicle_states(states, [lane] * 12)]:
+        expected = _std_neighbors(list(nghbs))
+        for name, val in _std_neighbors(nghbs).items():
+            np.testing.assert_array_equal(val, expected[name])
+            assert val.dtype == expected[name].dtype
+    assert arrays[3].id == "car-3" and arrays[3].lane_index == 2
+    assert isinstance(arrays[2:4], VehicleObservations)
+
+    paths = []
+    for length in (30, 30, 30):
+        array = np.zeros(length, dtype=WAYPOINT_DTYPE)
+        array["pos"] = rng.uniform(-100, 100, (length, 2))
+        array["heading"] = rng.uniform(-3, 3, length)
+        array["lane_width"] = 3.2
+        array["speed_limit"] = 13.9
+        array["lane_index"] = rng.integers(0, 3, length)
+        paths.append(WaypointPath(array, np.array(["lane"] * length, dtype=object)))
+    expected = _std_waypoints([list(path) for path in paths])
+    for name, val in _std_waypoints(paths).items():
+        np.testing.assert_array_equal(val, expected[name])
+        assert val.dtype == expected[name].dtype
@@ -26,7 +26,7 @@ import gym
 import numpy as np
 
 from smarts.core.events import Events
-from smarts.core.road_map import Waypoint
+from smarts.core.road_map import Waypoint, WaypointPath
 from smarts.core.sensors import (
     DrivableAreaGridMap,
     EgoVehicleObservation,
@@ -34,6 +34,7 @@ from smarts.core.sensors import (
     OccupancyGridMap,
     TopDownRGB,
     VehicleObservation,
+    VehicleObservations,
 )
 from smarts.env.custom_observations import lane_ttc
 
@@ -491,6 +492,8 @@ def _std_neighbors(
 ) -> Optional[Dict[str, np.ndarray]]:
     if not nghbs:
         return None
+    if isinstance(nghbs, VehicleObservations):
+        return _std_neighbors_from_arrays(nghbs)
 
     des_shp = _NEIGHBOR_SHP
     rcv_shp = len(nghbs)
@@ -531,6 +534,34 @@ def _std_neighbors(
     }
 
 
+def _std_neighbors_from_arrays(
+    nghbs: VehicleObservations,
+) -> Dict[str, np.ndarray]:
+    rows = nghbs.array[:_NEIGHBOR_SHP]
+    rcv = len(rows)
+
+    box = np.zeros((_NEIGHBOR_SHP, 3), dtype=np.float32)
+    heading = np.zeros((_NEIGHBOR_SHP,), dtype=np.float32)
+    lane_index = np.zeros((_NEIGHBOR_SHP,), dtype=np.int8)
+    pos = np.zeros((_NEIGHBOR_SHP, 3), dtype=np.float64)
+    speed = np.zeros((_NEIGHBOR_SHP,), dtype=np.float32)
+
+    box[:rcv] = rows["bounding_box"]
+    heading[:rcv] = rows["heading"]
+    # Vehicles which are not on a lane get the padding value.
+    lane_index[:rcv] = np.maximum(rows["lane_index"], 0)
+    pos[:rcv] = rows["position"]
+    speed[:rcv] = rows["speed"]
+
+    return {
+        "box": box,
+        "heading": heading,
+        "lane_index": lane_index,
+        "pos": pos,
+        "speed": speed,
+    }
+
+
 def _std_ogm(val: Optional[OccupancyGridMap]) -> Optional[np.ndarray]:
     if not val:
         return None
@@ -561,6 +592,8 @@ def _std_waypoints(
 ) -> Optional[Dict[str, np.ndarray]]:
     if not paths:
         return None
+    if all(isinstance(path, WaypointPath) for path in paths):
+        return _std_waypoints_from_arrays(paths)
 
     des_shp = _WAYPOINT_SHP
     rcv_shp = (len(paths), len(paths[0]))
@@ -601,3 +634,28 @@ def _std_waypoints(
         "pos": pos,
         "speed_limit": speed_limit,
     }
+
+
+def _std_waypoints_from_arrays(paths: List[WaypointPath]) -> Dict[str, np.ndarray]:
+    heading = np.zeros(_WAYPOINT_SHP, dtype=np.float32)
+    lane_index = np.zeros(_WAYPOINT_SHP, dtype=np.int8)
+    lane_width = np.zeros(_WAYPOINT_SHP, dtype=np.float32)
+    pos = np.zeros(_WAYPOINT_SHP + (3,), dtype=np.float64)
+    speed_limit = np.zeros(_WAYPOINT_SHP, dtype=np.float32)
+
+    for idx, path in enumerate(paths[: _WAYPOINT_SHP[0]]):
+        rows = path.array[: _WAYPOINT_SHP[1]]
+        rcv = len(rows)
+        heading[idx, :rcv] = rows["heading"]
+        lane_index[idx, :rcv] = rows["lane_index"]
+        lane_width[idx, :rcv] = rows["lane_width"]
+        pos[idx, :rcv, :2] = rows["pos"]
+        speed_limit[idx, :rcv] = rows["speed_limit"]
+
+    return {
+        "heading": heading,
+        "lane_index": lane_index,
+        "lane_width": lane_width,
+        "pos": pos,
+        "speed_limit": speed_limit,
+    }
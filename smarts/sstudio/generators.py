@@ -17,18 +17,22 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+import json
 import logging
+import math
 import os
 import random
 import tempfile
+import xml.etree.ElementTree as ET
 from dataclasses import replace
-from typing import Optional
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
 
 import sh
 from yattag import Doc, indent
 
 from smarts.core.road_map import RoadMap
-from smarts.core.utils.file import make_dir_in_smarts_log_dir
+from smarts.core.utils.file import file_md5_hash, make_dir_in_smarts_log_dir
 
 from . import types
 
@@ -106,12 +110,17 @@ class RandomRouteGenerator:
 class TrafficGenerator:
     """Generates traffic from scenario information."""
 
+    FLOWS_PER_CHUNK = 256
+    """The fewest flows routed by each parallel duarouter process."""
+
     def __init__(
         self,
         scenario_dir: str,
         scenario_map_spec: Optional[types.MapSpec],
         log_dir: Optional[str] = None,
         overwrite: bool = False,
+        route_cache_dir: Optional[str] = None,
+        processes: Optional[int] = None,
     ):
         """
         Args:
@@ -123,6 +132,12 @@ class TrafficGenerator:
                 Where logging information about traffic planning should be written to.
             overwrite:
                 Whether to overwrite existing traffic information.
+            route_cache_dir:
+                Where the routes repaired by duarouter are cached for each road
+                network. Defaults to `~/.smarts/_duarouter_route_cache`.
+            processes:
+                The most duarouter processes to route with in parallel. Defaults to
+                the number of cores.
         """
         from smarts.core.utils.sumo import sumolib
 
@@ -142,6 +157,10 @@ class TrafficGenerator:
         self._road_network = None
         self._random_route_generator = None
         self._log_dir = self._resolve_log_dir(log_dir)
+        self._route_cache_dir = route_cache_dir or make_dir_in_smarts_log_dir(
+            "_duarouter_route_cache"
+        )
+        self._processes = processes or os.cpu_count() or 1
 
     def plan_and_save(
         self,
@@ -152,6 +171,10 @@ class TrafficGenerator:
     ):
         """Writes a traffic spec to a route file in the given output_dir.
 
+        The flows are split into chunks that are routed by parallel duarouter
+        processes and merged in order of departure. Vehicles departing at the same
+        time keep the order of their flows, so the routes are the same for a seed.
+
         traffic: The traffic to write out
         name: The name of the traffic resource file
         output_dir: The output directory of the traffic file
@@ -172,8 +195,8 @@ class TrafficGenerator:
                 return None
 
         with tempfile.TemporaryDirectory() as temp_dir:
-            trips_path = os.path.join(temp_dir, "trips.trips.xml")
-            self._writexml(traffic, trips_path)
+            route_cache = self._read_route_cache()
+            trips_paths, uncached_flows = self._writexml(traffic, temp_dir, route_cache)
 
             scenario_name = os.path.basename(os.path.normpath(output_dir))
             log_path = f"{self._log_dir}/{scenario_name}"
@@ -181,81 +204,163 @@ class TrafficGenerator:
 
             import smarts.core.utils.sumo  # Set SUMO_HOME environment variable
 
-            # Validates, and runs route planner
-            self._duarouter(
-                unsorted_input=True,
-                net_file=self.road_network.source,
-                route_files=trips_path,
-                output_file=route_path,
-                seed=seed,
-                ignore_errors=False,
-                no_step_log=True,
-                repair=True,
-                error_log=f"{log_path}/{name}.log",
-            )
+            if len(trips_paths) == 1:
+                self._route(trips_paths[0], route_path, seed, f"{log_path}/{name}.log")
+            else:
+                chunk_route_paths = [
+                    os.path.join(temp_dir, f"chunk-{i}.rou.xml")
+                    for i in range(len(trips_paths))
+                ]
+                self._route_in_parallel(
+                    trips_paths,
+                    chunk_route_paths,
+                    seed,
+                    [f"{log_path}/{name}-{i}.log" for i in range(len(trips_paths))],
+                )
+                self._merge_routes(chunk_route_paths, route_path)
 
             # Remove the rou.alt.xml file
             if os.path.exists(route_alt_path):
                 os.remove(route_alt_path)
 
+        if uncached_flows:
+            self._update_route_cache(route_path, uncached_flows)
+
         return route_path
 
-    def _writexml(self, traffic: types.Traffic, route_path: str):
-        """Writes a traffic spec into a route file. Typically this would be the source
-        data to Sumo's DUAROUTER.
+    def _route(
+        self,
+        trips_path: str,
+        route_path: str,
+        seed: int,
+        error_log: str,
+        background: bool = False,
+    ):
+        # Validates, and runs route planner
+        return self._duarouter(
+            unsorted_input=True,
+            net_file=self.road_network.source,
+            route_files=trips_path,
+            output_file=route_path,
+            seed=seed,
+            ignore_errors=False,
+            no_step_log=True,
+            repair=True,
+            error_log=error_log,
+            _bg=background,
+        )
+
+    def _route_in_parallel(
+        self,
+        trips_paths: List[str],
+        route_paths: List[str],
+        seed: int,
+        error_logs: List[str],
+    ):
+        running = [
+            self._route(trips_path, route_path, seed, error_log, background=True)
+            for trips_path, route_path, error_log in zip(
+                trips_paths, route_paths, error_logs
+            )
+        ]
+
+        errors = []
+        for process in running:
+            try:
+                process.wait()
+            except sh.ErrorReturnCode as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+    def _merge_routes(self, chunk_route_paths: List[str], route_path: str):
+        """Merges the routes of each chunk into one route file with the vehicles in
+        order of departure.
         """
-        doc = Doc()
-        doc.asis('<?xml version="1.0" encoding="UTF-8"?>')
-        with doc.tag(
-            "routes",
-            ("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance"),
-            ("xsi:noNamespaceSchemaLocation", "http://sumo.sf.net/xsd/routes_file.xsd"),
-        ):
-            # Actors and routes may be declared once then reused. To prevent creating
-            # duplicates we unique them here.
-            for actor in {
-                actor for flow in traffic.flows for actor in flow.actors.keys()
-            }:
-                sigma = min(1, max(0, actor.imperfection.sample()))  # range [0,1]
-                min_gap = max(0, actor.min_gap.sample())  # range >= 0
-                doc.stag(
-                    "vType",
-                    id=actor.id,
-                    accel=actor.accel,
-                    decel=actor.decel,
-                    vClass=actor.vehicle_type,
-                    speedFactor=actor.speed.mean,
-                    speedDev=actor.speed.sigma,
-                    sigma=sigma,
-                    minGap=min_gap,
-                    maxSpeed=actor.max_speed,
-                    **actor.lane_changing_model,
-                    **actor.junction_model,
-                )
+        vtypes = {}
+        vehicles = []
+        for chunk_route_path in chunk_route_paths:
+            for element in ET.parse(chunk_route_path).getroot():
+                if element.tag == "vType":
+                    vtypes.setdefault(element.get("id"), element)
+                else:
+                    vehicles.append(element)
+        # The sort is stable so vehicles departing together keep the chunk order.
+        vehicles.sort(key=lambda vehicle: float(vehicle.get("depart")))
+
+        with open(route_path, "w") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n\n')
+            f.write(
+                '<routes xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                'xsi:noNamespaceSchemaLocation="http://sumo.dlr.de/xsd/routes_file.xsd">\n'
+            )
+            for element in chain(vtypes.values(), vehicles):
+                element.tail = "\n"
+                f.write("    " + ET.tostring(element, encoding="unicode"))
+            f.write("</routes>\n")
+
+    def _writexml(
+        self, traffic: types.Traffic, temp_dir: str, route_cache: Dict[str, str]
+    ) -> Tuple[List[str], Dict[str, str]]:
+        """Writes a traffic spec into trips files, one for each chunk of flows. These
+        are the source data to Sumo's DUAROUTER.
+
+        Returns:
+            The paths of the trips files and the route cache keys of the flows whose
+            routes were not in the cache, by flow id.
+        """
+        # Actors and routes may be declared once then reused. To prevent creating
+        # duplicates we unique them here.
+        vtypes = {}
+        for actor in {actor for flow in traffic.flows for actor in flow.actors.keys()}:
+            sigma = min(1, max(0, actor.imperfection.sample()))  # range [0,1]
+            min_gap = max(0, actor.min_gap.sample())  # range >= 0
+            vtypes[actor.id] = dict(
+                id=actor.id,
+                accel=actor.accel,
+                decel=actor.decel,
+                vClass=actor.vehicle_type,
+                speedFactor=actor.speed.mean,
+                speedDev=actor.speed.sigma,
+                sigma=sigma,
+                minGap=min_gap,
+                maxSpeed=actor.max_speed,
+                **actor.lane_changing_model,
+                **actor.junction_model,
+            )
 
-            # Make sure all routes are "resolved" (e.g. `RandomRoute` are converted to
-            # `Route`) so that we can write them all to file.
-            resolved_routes = {}
-            for route in {flow.route for flow in traffic.flows}:
-                resolved_routes[route] = self.resolve_route(route)
-
-            for route in set(resolved_routes.values()):
-                doc.stag("route", id=route.id, edges=" ".join(route.roads))
-
-            # We don't de-dup flows since defining the same flow multiple times should
-            # create multiple traffic flows. Since IDs can't be reused, we also unique
-            # them here.
-            for flow_idx, flow in enumerate(traffic.flows):
-                total_weight = sum(flow.actors.values())
-                route = resolved_routes[flow.route]
-                for actor_idx, (actor, weight) in enumerate(flow.actors.items()):
-                    doc.stag(
-                        "flow",
-                        id="{}-{}-{}-{}".format(
-                            actor.name, flow.id, flow_idx, actor_idx
-                        ),
+        # Make sure all routes are "resolved" (e.g. `RandomRoute` are converted to
+        # `Route`) so that we can write them all to file.
+        resolved_routes = {}
+        for route in {flow.route for flow in traffic.flows}:
+            resolved_routes[route] = self.resolve_route(route)
+
+        # Duarouter repairs a route for the vehicle class driving it, so routes are
+        # declared for each vehicle class and taken from the cache when they have
+        # already been repaired.
+        routes = {}
+        uncached_flows = {}
+        flows = []
+        # We don't de-dup flows since defining the same flow multiple times should
+        # create multiple traffic flows. Since IDs can't be reused, we also unique
+        # them here.
+        for flow_idx, flow in enumerate(traffic.flows):
+            total_weight = sum(flow.actors.values())
+            route = resolved_routes[flow.route]
+            for actor_idx, (actor, weight) in enumerate(flow.actors.items()):
+                flow_id = "{}-{}-{}-{}".format(actor.name, flow.id, flow_idx, actor_idx)
+                route_id = "{}{}".format(route.id, actor.vehicle_type)
+                cache_key = self._route_cache_key(actor.vehicle_type, route.roads)
+                if cache_key not in route_cache:
+                    uncached_flows[flow_id] = cache_key
+                routes.setdefault(
+                    route_id, route_cache.get(cache_key, " ".join(route.roads))
+                )
+                flows.append(
+                    dict(
+                        id=flow_id,
                         type=actor.id,
-                        route=route.id,
+                        route=route_id,
                         vehsPerHour=flow.rate * (weight / total_weight),
                         departLane=route.begin[1],
                         departPos=route.begin[2],
@@ -265,14 +370,105 @@ class TrafficGenerator:
                         begin=flow.begin,
                         end=flow.end,
                     )
+                )
 
-        with open(route_path, "w") as f:
+        chunks = min(self._processes, math.ceil(len(flows) / self.FLOWS_PER_CHUNK))
+        chunk_size = max(1, math.ceil(len(flows) / max(1, chunks)))
+        trips_paths = []
+        for start in range(0, max(1, len(flows)), chunk_size):
+            chunk_flows = flows[start : start + chunk_size]
+            chunk_types = {flow["type"] for flow in chunk_flows}
+            trips_path = os.path.join(
+                temp_dir, "trips-{}.trips.xml".format(len(trips_paths))
+            )
+            self._write_trips(
+                [vtype for vtype in vtypes.values() if vtype["id"] in chunk_types],
+                {flow["route"]: routes[flow["route"]] for flow in chunk_flows},
+                chunk_flows,
+                trips_path,
+            )
+            trips_paths.append(trips_path)
+
+        return trips_paths, uncached_flows
+
+    def _write_trips(
+        self,
+        vtypes: List[dict],
+        routes: Dict[str, str],
+        flows: List[dict],
+        trips_path: str,
+    ):
+        doc = Doc()
+        doc.asis('<?xml version="1.0" encoding="UTF-8"?>')
+        with doc.tag(
+            "routes",
+            ("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance"),
+            ("xsi:noNamespaceSchemaLocation", "http://sumo.sf.net/xsd/routes_file.xsd"),
+        ):
+            for vtype in vtypes:
+                doc.stag("vType", **vtype)
+
+            for route_id, edges in routes.items():
+                doc.stag("route", id=route_id, edges=edges)
+
+            for flow in flows:
+                doc.stag("flow", **flow)
+
+        with open(trips_path, "w") as f:
             f.write(
                 indent(
                     doc.getvalue(), indentation="    ", newline="\r\n", indent_text=True
                 )
             )
 
+    @staticmethod
+    def _route_cache_key(vehicle_type: str, roads) -> str:
+        return "{}:{}".format(vehicle_type, " ".join(roads))
+
+    def _route_cache_path(self) -> str:
+        return os.path.join(
+            self._route_cache_dir,
+            "{}.json".format(file_md5_hash(self.road_network.source)),
+        )
+
+    def _read_route_cache(self) -> Dict[str, str]:
+        """Reads the routes repaired by duarouter on this road network, by vehicle
+        class and the roads of the route spec.
+        """
+        try:
+            with open(self._route_cache_path(), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_route_cache(self, route_path: str, uncached_flows: Dict[str, str]):
+        """Caches the routes that duarouter repaired for the flows that were not in
+        the cache.
+        """
+        repaired = {}
+        for _, element in ET.iterparse(route_path):
+            if element.tag != "vehicle":
+                continue
+            # Duarouter names the vehicles of a flow `<flow id>.<index>`.
+            cache_key = uncached_flows.get(element.get("id").rsplit(".", 1)[0])
+            route = element.find("route")
+            if cache_key and route is not None:
+                repaired.setdefault(cache_key, route.get("edges"))
+            element.clear()
+        if not repaired:
+            return
+
+        # Other generators may be routing on the same road network, so merge with
+        # the latest cache and replace it atomically.
+        os.makedirs(self._route_cache_dir, exist_ok=True)
+        route_cache = self._read_route_cache()
+        route_cache.update(repaired)
+        cache_path = self._route_cache_path()
+        fd, temp_path = tempfile.mkstemp(dir=self._route_cache_dir, suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(route_cache, f)
+        os.replace(temp_path, cache_path)
+
     def _cache_road_network(self):
         if not self._road_network:
             from smarts.core.sumo_road_network import SumoRoadNetwork
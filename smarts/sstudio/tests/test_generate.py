@@ -19,6 +19,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+import json
 import os
 import tempfile
 from typing import Sequence
@@ -28,6 +29,7 @@ import pytest
 
 from smarts.core.scenario import Scenario
 from smarts.sstudio import gen_map, gen_missions, gen_traffic
+from smarts.sstudio.generators import TrafficGenerator
 from smarts.sstudio.types import (
     Distribution,
     Flow,
@@ -99,6 +101,55 @@ def test_generate_traffic(traffic: Traffic):
         assert sorted(items) == sorted(generated_items)
 
 
+def _generate_vehicles(traffic, output_dir, route_cache_dir, processes, name):
+    generator = TrafficGenerator(
+        "scenarios/intersections/4lane_t",
+        None,
+        route_cache_dir=route_cache_dir,
+        processes=processes,
+    )
+    route_path = generator.plan_and_save(traffic, name, output_dir)
+    with open(route_path) as f:
+        return [
+            (v.get("id"), v.get("depart"), v.find("route").get("edges"))
+            for v in ElementTree(file=f).iter("vehicle")
+        ]
+
+
+def test_generate_traffic_in_chunks(traffic: Traffic, monkeypatch):
+    monkeypatch.setattr(TrafficGenerator, "FLOWS_PER_CHUNK", 1)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        vehicles = _generate_vehicles(traffic, temp_dir, temp_dir, 1, "single")
+        chunked_vehicles = _generate_vehicles(traffic, temp_dir, temp_dir, 3, "a")
+        assert sorted(chunked_vehicles) == sorted(vehicles)
+        departures = [float(depart) for _, depart, _ in chunked_vehicles]
+        assert departures == sorted(departures)
+
+        assert _generate_vehicles(traffic, temp_dir, temp_dir, 3, "b") == (
+            chunked_vehicles
+        )
+        with open(os.path.join(temp_dir, "a.rou.xml")) as a, open(
+            os.path.join(temp_dir, "b.rou.xml")
+        ) as b:
+            assert a.read() == b.read()
+
+
+def test_generate_traffic_route_cache(traffic: Traffic):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        route_cache_dir = os.path.join(temp_dir, "route_cache")
+        vehicles = _generate_vehicles(traffic, temp_dir, route_cache_dir, 1, "a")
+        (cache_file,) = os.listdir(route_cache_dir)
+        with open(os.path.join(route_cache_dir, cache_file)) as f:
+            route_cache = json.load(f)
+        assert route_cache == {
+            "passenger:edge-west-WE edge-east-WE": "edge-west-WE edge-east-WE",
+            "passenger:edge-east-EW edge-west-EW": "edge-east-EW edge-west-EW",
+        }
+
+        cached_vehicles = _generate_vehicles(traffic, temp_dir, route_cache_dir, 1, "b")
+        assert cached_vehicles == vehicles
+
+
 def _gen_map_from_spec(scenario_root: str, map_spec: MapSpec):
     with tempfile.TemporaryDirectory() as temp_dir:
         gen_map(scenario_root, map_spec, output_dir=temp_dir)
@@ -0,0 +1,91 @@
+# MIT License
+#
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import shutil
+from pathlib import Path
+
+import pytest
+
+from cli.benchmark import (
+    BenchmarkCell,
+    benchmark_matrix,
+    compare_to_baseline,
+    run_cell,
+)
+from smarts.sstudio import gen_scenario
+from smarts.sstudio import types as t
+
+MAP_PATH = Path(__file__).parent.parent / "smarts/core/tests/maps/straight.net.xml"
+
+
+@pytest.fixture
+def scenario(tmp_path):
+    scenario = tmp_path / "straight"
+    scenario.mkdir()
+    shutil.copyfile(MAP_PATH, scenario / "map.net.xml")
+    gen_scenario(
+        t.Scenario(
+            ego_missions=[
+                t.Mission(t.Route(begin=("west", 0, 10), end=("east", 0, "max")))
+            ]
+        ),
+        output_dir=scenario,
+    )
+    return scenario
+
+
+def test_benchmark_matrix_skips_unbuilt_families(scenario, monkeypatch):
+    monkeypatch.chdir(scenario)
+    cells, skipped = benchmark_matrix(["loop", "ngsim"], ["none", "lidar"], ["."])
+    assert len(skipped) == 2
+    assert [cell.key for cell in cells] == [
+        "./1-agents/none",
+        "./1-agents/lidar",
+    ]
+
+
+def test_run_cell(scenario):
+    cell = BenchmarkCell("straight", str(scenario), 1, "vector")
+    result = run_cell(cell, episodes=2, max_episode_steps=5, seed=42)
+    assert result["key"] == "straight/1-agents/vector"
+    # Agents are done after `max_episode_steps`, including those taken on reset
+    assert 0 < result["steps"] <= 10
+    assert result["timings"]["reset"]["count"] == 2
+    assert result["timings"]["step"]["count"] == result["steps"]
+    assert result["steps_per_second"] > 0
+    assert result["peak_rss_mb"] > 0
+
+
+def test_compare_to_baseline():
+    baseline = [
+        {"key": "a", "steps_per_second": 100, "reset_ms": 50, "peak_rss_mb": 200},
+        {"key": "b", "steps_per_second": 100, "reset_ms": 50, "peak_rss_mb": 200},
+    ]
+    results = [
+        {"key": "a", "steps_per_second": 90, "reset_ms": 55, "peak_rss_mb": 210},
+        {"key": "b", "steps_per_second": 70, "reset_ms": 40, "peak_rss_mb": 300},
+        {"key": "c", "steps_per_second": 1, "reset_ms": 1000, "peak_rss_mb": 1000},
+    ]
+    regressions = compare_to_baseline(results, baseline, tolerance=0.2)
+    assert [(r["key"], r["metric"]) for r in regressions] == [
+        ("b", "steps_per_second"),
+        ("b", "peak_rss_mb"),
+    ]
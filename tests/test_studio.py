@@ -0,0 +1,104 @@
+# MIT License
+#
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from cli.studio import build_all_scenarios, build_scenario
+
+MAP_PATH = Path(__file__).parent.parent / "smarts/core/tests/maps/straight.net.xml"
+
+SCENARIO_PY = """
+from pathlib import Path
+
+from smarts.sstudio import gen_scenario
+from smarts.sstudio import types as t
+
+gen_scenario(
+    t.Scenario(
+        ego_missions=[t.Mission(t.Route(begin=("west", 0, 10), end=("east", 0, "max")))]
+    ),
+    output_dir=Path(__file__).parent,
+)
+"""
+
+
+@pytest.fixture
+def scenario(tmp_path):
+    scenario = tmp_path / "straight"
+    scenario.mkdir()
+    shutil.copyfile(MAP_PATH, scenario / "map.net.xml")
+    (scenario / "scenario.py").write_text(SCENARIO_PY)
+    return scenario
+
+
+@pytest.fixture
+def build(capfd):
+    def build(command, path):
+        capfd.readouterr()
+        if command == "build":
+            build_scenario.callback(clean=False, allow_offset_map=False, scenario=path)
+        else:
+            build_all_scenarios.callback(
+                clean=False, allow_offset_maps=False, scenarios=[path]
+            )
+        return capfd.readouterr().out
+
+    return build
+
+
+def _mtimes(scenario):
+    return {
+        name: os.stat(scenario / name).st_mtime_ns
+        for name in ("map.glb", "missions.pkl")
+    }
+
+
+def test_build_only_rebuilds_stale_artifacts(scenario, build):
+    build("build", str(scenario))
+    assert (scenario / ".build_hashes.json").exists()
+    built = _mtimes(scenario)
+
+    output = build("build", str(scenario))
+    assert "rebuilding" not in output
+    assert _mtimes(scenario) == built
+
+    with open(scenario / "scenario.py", "a") as f:
+        f.write("# changed\n")
+    output = build("build", str(scenario))
+    assert "rebuilding histories, traffic" in output
+    rebuilt = _mtimes(scenario)
+    assert rebuilt["missions.pkl"] != built["missions.pkl"]
+    assert rebuilt["map.glb"] == built["map.glb"]
+
+
+def test_build_all_shares_glb_between_scenarios_with_the_same_map(scenario, build):
+    shutil.copytree(scenario, scenario.parent / "straight_copy")
+    output = build("build-all", str(scenario.parent))
+    assert output.count("rebuilding map.glb") == 1
+    assert output.count("copying map.glb") == 1
+    assert (scenario.parent / "straight_copy" / "map.glb").exists()
+
+    output = build("build-all", str(scenario.parent))
+    assert "rebuilding" not in output
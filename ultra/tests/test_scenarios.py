@@ -395,6 +395,43 @@ class ScenariosTest(unittest.TestCase):
                 else:
                     self.assertTrue(False)
 
+    def test_generate_scenarios_resume(self):
+        save_dir = os.path.join(ScenariosTest.OUTPUT_DIRECTORY, "maps/resume_test/")
+        if os.path.exists(save_dir):
+            shutil.rmtree(save_dir)
+
+        build_kwargs = dict(
+            task="task00",
+            level_name="bubbles_test",
+            stopwatcher_behavior=None,
+            stopwatcher_route=None,
+            root_path="tests/scenarios/",
+            save_dir=save_dir,
+            processes=2,
+        )
+        build_scenarios(**build_kwargs)
+        scenario_directories = sorted(glob.glob(os.path.join(save_dir, "*/")))
+        self.assertTrue(len(scenario_directories) > 1)
+        metadata_times = {
+            scenario_directory: os.path.getmtime(
+                os.path.join(scenario_directory, "metadata.json")
+            )
+            for scenario_directory in scenario_directories
+        }
+
+        # Interrupted before the first scenario was complete.
+        os.remove(os.path.join(scenario_directories[0], "metadata.json"))
+        build_scenarios(resume=True, **build_kwargs)
+
+        self.assertTrue(
+            os.path.isfile(os.path.join(scenario_directories[0], "metadata.json"))
+        )
+        for scenario_directory in scenario_directories[1:]:
+            self.assertTrue(
+                os.path.getmtime(os.path.join(scenario_directory, "metadata.json"))
+                == metadata_times[scenario_directory]
+            )
+
     @classmethod
     def tearDownClass(cls):
         if os.path.exists(ScenariosTest.OUTPUT_DIRECTORY):
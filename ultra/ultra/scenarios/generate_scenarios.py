@@ -30,7 +30,7 @@ import shutil
 import time
 from collections import Counter, defaultdict
 from dataclasses import replace
-from multiprocessing import Manager, Process
+from multiprocessing import Manager, Pool
 from shutil import copyfile
 from typing import Any, Dict, Sequence
 
@@ -38,11 +38,13 @@ import numpy as np
 import yaml
 
 from smarts.core.utils.sumo import sumolib
-from smarts.sstudio import gen_bubbles, gen_missions, gen_traffic
+from smarts.sstudio import gen_bubbles, gen_missions
+from smarts.sstudio.generators import TrafficGenerator
 from smarts.sstudio.types import (
     Bubble,
     Distribution,
     Flow,
+    MapSpec,
     MapZone,
     Mission,
     PositionalZone,
@@ -59,6 +61,25 @@ from ultra.scenarios.common.social_vehicle_definitions import (
 
 LANE_LENGTH = 137.85
 
+# The road network and traffic generator of each map in the pool. These are loaded
+# by build_scenarios before the worker pool is forked so that the workers share them.
+_SHARED_MAPS = {}
+
+
+def shared_map(map_dir, speed):
+    """Returns the sumolib road network and the traffic generator of the pool map
+    with the given speed, loading them on first use in this process.
+    """
+    map_path = f"{map_dir}/{speed}/map.net.xml"
+    if map_path not in _SHARED_MAPS:
+        traffic_generator = TrafficGenerator(
+            os.path.dirname(map_path), MapSpec(source=map_path), processes=1
+        )
+        # Load the road network now rather than on the first route planned.
+        traffic_generator.road_network
+        _SHARED_MAPS[map_path] = (sumolib.net.readNet(map_path), traffic_generator)
+    return _SHARED_MAPS[map_path]
+
 
 def ego_mission_config_to_route(
     ego_mission_config: Dict[str, Any],
@@ -120,7 +141,10 @@ def ego_mission_config_to_route(
 
 
 def bubble_config_to_bubble_object(
-    scenario: str, bubble_config: Dict[str, Any], vehicles_to_not_hijack: Sequence[str]
+    scenario: str,
+    bubble_config: Dict[str, Any],
+    vehicles_to_not_hijack: Sequence[str],
+    map_file=None,
 ) -> Bubble:
     """Converts a bubble config to a bubble object.
 
@@ -133,12 +157,16 @@ def bubble_config_to_bubble_object(
         vehicles_to_not_hijack:
             A tuple of vehicle IDs that are passed to the bubble. The bubble will not
             capture those vehicles that have an ID in this tuple.
+        map_file:
+            The sumolib road network of this scenario. It is read from the scenario
+            if not given.
 
     Returns:
         Bubble: The bubble object created from the bubble config.
     """
     BUBBLE_MARGIN = 2
-    map_file = sumolib.net.readNet(f"{scenario}/map.net.xml")
+    if map_file is None:
+        map_file = sumolib.net.readNet(f"{scenario}/map.net.xml")
 
     location_name = bubble_config["location"][0]
     location_data = bubble_config["location"][1:]
@@ -183,7 +211,10 @@ def bubble_config_to_bubble_object(
 
 
 def add_stops_to_traffic(
-    scenario: str, stops: Sequence[Sequence[Any]], vehicles_to_not_hijack: Sequence[str]
+    scenario: str,
+    stops: Sequence[Sequence[Any]],
+    vehicles_to_not_hijack: Sequence[str],
+    map_file=None,
 ):
     """Adds stopped vehicles to the traffic by overwriting all.rou.xml and replacing
     some vehicles' attributes so that they start, and remain stopped.
@@ -199,9 +230,13 @@ def add_stops_to_traffic(
         vehicles_to_not_hijack:
             A list of vehicle IDs that is appended to. Each stopped vehicle's ID is
             appended to this list as stopped vehicles should not be hijacked.
+        map_file:
+            The sumolib road network of this scenario. It is read from the scenario
+            if not given.
     """
     route_file_path = f"{scenario}/traffic/all.rou.xml"
-    map_file = sumolib.net.readNet(f"{scenario}/map.net.xml")
+    if map_file is None:
+        map_file = sumolib.net.readNet(f"{scenario}/map.net.xml")
     vehicle_types = list(sumolib.output.parse(route_file_path, "vType"))
     vehicles = list()
     stops_added = 0
@@ -417,13 +452,16 @@ def generate_left_turn_missions(
         scenario += f"-stopwatcher-{stopwatcher_info['behavior']}"
 
     copy_map_files(scenario, map_dir, speed)
+    map_file, traffic_generator = shared_map(map_dir, speed)
 
     vehicles_to_not_hijack = []
     traffic = Traffic(flows=all_flows)
     try:
-        gen_traffic(scenario, traffic, name=f"all", seed=sumo_seed)
+        traffic_dir = os.path.join(scenario, "traffic")
+        os.makedirs(traffic_dir, exist_ok=True)
+        traffic_generator.plan_and_save(traffic, "all", traffic_dir, seed=sumo_seed)
         if stops:
-            add_stops_to_traffic(scenario, stops, vehicles_to_not_hijack)
+            add_stops_to_traffic(scenario, stops, vehicles_to_not_hijack, map_file)
     except Exception as exception:
         print(exception)
 
@@ -472,7 +510,7 @@ def generate_left_turn_missions(
     if bubbles:
         bubble_objects = [
             bubble_config_to_bubble_object(
-                scenario, bubble_config, vehicles_to_not_hijack
+                scenario, bubble_config, vehicles_to_not_hijack, map_file
             )
             for bubble_config in bubbles
         ]
@@ -636,51 +674,21 @@ def generate_social_vehicles(
     return flows, log_info
 
 
-def scenario_worker(
-    seeds,
-    ego_missions,
-    shuffle_missions,
-    route_lanes,
-    route_distributions,
-    map_dir,
-    stopwatcher_route,
-    level_name,
-    save_dir,
-    speed,
-    stopwatcher_behavior,
-    traffic_density,
-    intersection_type,
-    mode,
-    total_seeds,
-    percent,
-    stops,
-    bubbles,
-    dynamic_pattern_func,
-):
-    for i, seed in enumerate(seeds):
-        if not dynamic_pattern_func is None:
-            route_distributions = dynamic_pattern_func(route_distributions, i)
-
-        generate_left_turn_missions(
-            missions=ego_missions,
-            shuffle_missions=shuffle_missions,
-            route_lanes=route_lanes,
-            route_distributions=route_distributions,
-            map_dir=map_dir,
-            level_name=level_name,
-            save_dir=save_dir,
-            speed=speed,
-            stopwatcher_behavior=stopwatcher_behavior,
-            stopwatcher_route=stopwatcher_route,
-            seed=seed,
-            stops=stops,
-            bubbles=bubbles,
-            traffic_density=traffic_density,
-            intersection_name=intersection_type,
-        )
-    # print(
-    #     f"{mode} {intersection_type} {speed} {traffic_density}, counts:{len(seeds)}, generated:{len(seeds)/len(total_seeds)}, real:{percent}"
-    # )
+def scenario_path(save_dir, seed, stopwatcher_behavior):
+    scenario = save_dir + f"-flow-{seed}"
+    if stopwatcher_behavior:
+        scenario += f"-stopwatcher-{stopwatcher_behavior}"
+    return scenario
+
+
+def scenario_worker(task):
+    try:
+        generate_left_turn_missions(**task)
+    except Exception as exception:
+        print(f"Failed to generate seed {task['seed']} of {task['save_dir']}:")
+        print(exception)
+        return False
+    return True
 
 
 def build_scenarios(
@@ -693,7 +701,17 @@ def build_scenarios(
     shuffle_missions=True,
     pool_dir=None,
     dynamic_pattern_func=None,
+    processes=None,
+    resume=False,
 ):
+    """Generates the scenarios of a task level with a pool of processes. The seeds
+    of all scenarios are handed out to the workers as they become free.
+
+    Args:
+        processes: The number of worker processes. Defaults to the number of cores.
+        resume: Skip the scenarios that were fully generated by an earlier run, for
+            example one that was interrupted.
+    """
     print("Generating Scenario ...")
     manager = Manager()
 
@@ -716,7 +734,8 @@ def build_scenarios(
         "train": [i for i in range(train_total)],
         "test": [i for i in range(train_total, train_total + test_total)],
     }
-    jobs = []
+    tasks = []
+    skipped = 0
     # print(M)
     start = time.time()
     for mode, mode_seeds in splitted_seeds.items():
@@ -779,32 +798,40 @@ def build_scenarios(
                 else:
                     temp_save_dir = os.path.join(save_dir, "_".join(name_additions))
 
-                sub_proc = Process(
-                    target=scenario_worker,
-                    args=(
-                        temp_seeds,
-                        ego_missions,
-                        shuffle_missions,
-                        route_lanes,
-                        route_distributions,
-                        map_dir,
-                        stopwatcher_route,
-                        level_name,
-                        temp_save_dir,
-                        speed,
-                        stopwatcher_behavior,
-                        traffic_density,
-                        intersection_type,
-                        mode,
-                        seeds,
-                        percent,
-                        stops,
-                        bubbles,
-                        dynamic_pattern_func,
-                    ),
-                )
-                jobs.append(sub_proc)
-                sub_proc.start()
+                # Load the map once so that the workers share it.
+                shared_map(map_dir, speed)
+                for i, seed in enumerate(temp_seeds):
+                    if not dynamic_pattern_func is None:
+                        route_distributions = copy.deepcopy(
+                            dynamic_pattern_func(route_distributions, i)
+                        )
+                    if resume and os.path.exists(
+                        os.path.join(
+                            scenario_path(temp_save_dir, seed, stopwatcher_behavior),
+                            "metadata.json",
+                        )
+                    ):
+                        skipped += 1
+                        continue
+                    tasks.append(
+                        dict(
+                            missions=ego_missions,
+                            shuffle_missions=shuffle_missions,
+                            route_lanes=route_lanes,
+                            route_distributions=route_distributions,
+                            map_dir=map_dir,
+                            level_name=level_name,
+                            save_dir=temp_save_dir,
+                            speed=speed,
+                            stopwatcher_behavior=stopwatcher_behavior,
+                            stopwatcher_route=stopwatcher_route,
+                            seed=seed,
+                            stops=stops,
+                            bubbles=bubbles,
+                            traffic_density=traffic_density,
+                            intersection_name=intersection_type,
+                        )
+                    )
                 inner_prev_split = inner_cur_split
             print(
                 f">> {mode} {intersection_type} count:{seed_count} generated: {seed_count/len(mode_seeds)} real: {intersection_percent}"
@@ -814,6 +841,25 @@ def build_scenarios(
             main_seed_count += seed_count
         # print(f"Finished: {mode}  {main_seed_count/(train_total+test_total)}")
         # print("--------------------------------------------")
-    for process in jobs:
-        process.join()
-    print("*** time took:", time.time() - start)
+    if skipped:
+        print(f">> skipping {skipped} scenarios generated by an earlier run")
+
+    generated = 0
+    report_every = max(1, len(tasks) // 20)
+    with Pool(processes or os.cpu_count()) as pool:
+        for done, success in enumerate(
+            pool.imap_unordered(scenario_worker, tasks), start=1
+        ):
+            generated += success
+            if done % report_every == 0 or done == len(tasks):
+                minutes = (time.time() - start) / 60
+                print(
+                    f">> {done}/{len(tasks)} scenarios, "
+                    f"{done / minutes:.1f} scenarios/minute"
+                )
+    elapsed = time.time() - start
+    print("*** time took:", elapsed)
+    print(
+        f"*** generated {generated}/{len(tasks)} scenarios, "
+        f"{60 * generated / elapsed:.1f} scenarios/minute"
+    )
@@ -79,6 +79,17 @@ if __name__ == "__main__":
         help="Do not shuffle ego missions.",
         action="store_false",
     )
+    parser_generate_scenarios.add_argument(
+        "--processes",
+        help="number of worker processes (default is the number of cores)",
+        type=int,
+        default=None,
+    )
+    parser_generate_scenarios.add_argument(
+        "--resume",
+        help="Skip the scenarios generated by an earlier, interrupted run.",
+        action="store_true",
+    )
 
     parser_generate_scenarios.set_defaults(which="generate")
 
@@ -147,6 +158,8 @@ if __name__ == "__main__":
             root_path=args.root_dir,
             pool_dir=args.pool_dir,
             shuffle_missions=args.no_mission_shuffle,
+            processes=args.processes,
+            resume=args.resume,
         )
     else:
         ray.init()